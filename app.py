@@ -113,10 +113,7 @@ st.markdown("""
 def obtener_movimientos_recientes(usuario_id, limite=5):
     """Obtiene los movimientos más recientes."""
     try:
-        movimientos = obtener_historial_movimientos(usuario_id)
-        if movimientos:
-            return movimientos[:limite]
-        return []
+        return obtener_historial_movimientos(usuario_id, limite=limite)
     except Exception as e:
         st.error(f"Error al obtener movimientos recientes: {e}")
         return []
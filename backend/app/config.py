@@ -10,11 +10,71 @@ class Settings:
     # Supabase
     SUPABASE_URL: str = os.getenv("SUPABASE_URL")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY")
-    
+    # "async": cliente asíncrono con pool HTTP (no bloquea el event loop)
+    # "threadpool": cliente síncrono ejecutado en un pool de hilos acotado
+    # "sync": cliente síncrono original (bloquea el event loop en cada consulta)
+    # Por defecto "threadpool": contra benchmarks.postgrest_server fuera de proceso iguala a
+    # "async" con poca concurrencia y rinde más con 50 clientes (ver README)
+    SUPABASE_CLIENT_MODE: str = os.getenv("SUPABASE_CLIENT_MODE", "threadpool").lower()
+    SUPABASE_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50"))
+    SUPABASE_THREADPOOL_SIZE: int = int(os.getenv("SUPABASE_THREADPOOL_SIZE", "20"))
+    # Máximo de consultas simultáneas por proceso (protege la cuota de conexiones)
+    SUPABASE_MAX_IN_FLIGHT: int = int(os.getenv("SUPABASE_MAX_IN_FLIGHT", "50"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+    # "supabase": proyecto real; "memory": base de datos en memoria sin red (benchmarks y pruebas de carga)
+    SUPABASE_BACKEND: str = os.getenv("SUPABASE_BACKEND", "supabase").lower()
+    # Datos iniciales del backend en memoria: JSON {tabla: [filas]} o directorio de <tabla>.json/.jsonl
+    SUPABASE_MEMORY_FIXTURE: str = os.getenv("SUPABASE_MEMORY_FIXTURE")
+    # Filas máximas por respuesta, como `max-rows` de PostgREST en Supabase
+    SUPABASE_MEMORY_MAX_ROWS: int = int(os.getenv("SUPABASE_MEMORY_MAX_ROWS", "1000"))
+
     # JWT
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-super-secret-jwt-key")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+    # Autenticación: "local" emite tokens propios (JWT_SECRET_KEY);
+    # "supabase" verifica localmente el JWT de sesión emitido por Supabase Auth
+    AUTH_MODE: str = os.getenv("AUTH_MODE", "local").lower()
+    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET")
+    # Conjunto de claves públicas (JSON de /auth/v1/.well-known/jwks.json) para tokens RS256/ES256
+    SUPABASE_JWKS: str = os.getenv("SUPABASE_JWKS")
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+    
+    # Caché de tokens verificados y perfiles de usuario
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    
+    # Caché de ids de categorías por (usuario_id, nombre, tipo)
+    CATEGORY_CACHE_TTL_SECONDS: int = int(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "600"))
+    CATEGORY_CACHE_MAX_SIZE: int = int(os.getenv("CATEGORY_CACHE_MAX_SIZE", "10000"))
+    CATEGORY_NEGATIVE_TTL_SECONDS: int = int(os.getenv("CATEGORY_NEGATIVE_TTL_SECONDS", "30"))
+    
+    # Versiones de datos de los ETag (migración 010): segundos que cada proceso guarda la leída
+    DATA_VERSION_CACHE_SECONDS: float = float(os.getenv("DATA_VERSION_CACHE_SECONDS", "1"))
+    DATA_VERSION_CACHE_MAX_SIZE: int = int(os.getenv("DATA_VERSION_CACHE_MAX_SIZE", "10000"))
+    
+    # Catálogo global de categorías (tabla categories) en memoria
+    CATEGORY_CATALOGUE_TTL_SECONDS: int = int(os.getenv("CATEGORY_CATALOGUE_TTL_SECONDS", "3600"))
+    
+    # Creación de movimientos en lote (POST /movements/batch)
+    MOVEMENT_BATCH_MAX_ITEMS: int = int(os.getenv("MOVEMENT_BATCH_MAX_ITEMS", "5000"))
+    MOVEMENT_BATCH_CHUNK_SIZE: int = int(os.getenv("MOVEMENT_BATCH_CHUNK_SIZE", "500"))
+    
+    # Totales mensuales (migración 005): activar tras reconstruirlos con app.rollup_cli
+    ROLLUPS_ENABLED: bool = os.getenv("ROLLUPS_ENABLED", "False").lower() == "true"
+    
+    # Meses hacia adelante que cubre el calendario guardado de cada elemento del presupuesto
+    BUDGET_SCHEDULE_MONTHS: int = int(os.getenv("BUDGET_SCHEDULE_MONTHS", "180"))
+    
+    # Tareas en segundo plano (app/jobs.py); requiere la migración 009
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "False").lower() == "true"
+    # Fracción del intervalo que varía al azar en cada turno
+    SCHEDULER_JITTER: float = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+    SCHEDULER_STARTUP_DELAY_SECONDS: float = float(os.getenv("SCHEDULER_STARTUP_DELAY_SECONDS", "30"))
+    SCHEDULER_RECURRING_INTERVAL_SECONDS: int = int(os.getenv("SCHEDULER_RECURRING_INTERVAL_SECONDS", "3600"))
+    SCHEDULER_DERIVED_INTERVAL_SECONDS: int = int(os.getenv("SCHEDULER_DERIVED_INTERVAL_SECONDS", "21600"))
+    SCHEDULER_ROLLUP_CHECK_INTERVAL_SECONDS: int = int(os.getenv("SCHEDULER_ROLLUP_CHECK_INTERVAL_SECONDS", "86400"))
     
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Importar un extracto bancario (CSV u OFX) como movimientos de un usuario.
+
+El archivo se lee de forma incremental y se escribe por bloques. Cada bloque
+muestra el `offset` alcanzado: si la importación se interrumpe, se reanuda
+con --offset.
+
+Uso (desde backend/):
+    python -m app.import_cli extracto.csv --user <id>
+    python -m app.import_cli extracto.ofx --user <id> --offset 12000
+    python -m app.import_cli extracto.csv --user <id> --dry-run   # solo validar
+    python -m app.import_cli extracto.csv --user <id> --decimal ,  # importes como 1.234,56
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.services.import_service import import_service
+from app.services.supabase_service import supabase_service
+
+async def main(args) -> int:
+    file_format = args.format or ("ofx" if args.path.lower().endswith((".ofx", ".qfx")) else "csv")
+    failed = 0
+    try:
+        with open(args.path, encoding=args.encoding, newline="") as f:
+            async for event in import_service.import_movements(
+                args.user,
+                f,
+                file_format=file_format,
+                offset=args.offset,
+                chunk_size=args.chunk_size,
+                default_category=args.category,
+                dry_run=args.dry_run,
+                decimal=args.decimal
+            ):
+                for error in event["errors"]:
+                    print(f"  línea {error['line']}: {error['error']}")
+                print(
+                    f"offset {event['offset']}: {event['created']} creados, {event['failed']} con error "
+                    f"({event['rows_per_second']:.0f} filas/s)"
+                )
+                failed = event["failed"]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    finally:
+        await supabase_service.close()
+    
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Archivo CSV u OFX")
+    parser.add_argument("--user", required=True, help="Id del usuario dueño de los movimientos")
+    parser.add_argument("--format", choices=["csv", "ofx"], help="Formato (por defecto según la extensión)")
+    parser.add_argument("--offset", type=int, default=0, help="Registros ya importados a omitir")
+    parser.add_argument("--chunk-size", type=int, help="Movimientos por bloque")
+    parser.add_argument("--category", default="Importado", help="Categoría para filas sin categoría")
+    parser.add_argument("--decimal", choices=[",", "."], help="Separador decimal de los importes (por defecto se deduce; \"1.234\" se rechaza por ambiguo)")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del archivo (p. ej. latin-1)")
+    parser.add_argument("--dry-run", action="store_true", help="Validar sin escribir en la base de datos")
+    sys.exit(asyncio.run(main(parser.parse_args())))
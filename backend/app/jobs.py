@@ -0,0 +1,53 @@
+"""
+Tareas en segundo plano del backend.
+
+Se registran en el planificador (`app.services.scheduler`) al iniciar la
+API con `SCHEDULER_ENABLED=true`; sacan de las peticiones el trabajo que
+hoy se hace al abrir una pantalla.
+"""
+
+from app.config import settings
+from app.services.supabase_service import supabase_service
+from app.services.recurring_service import recurring_service
+from app.services.projection_engine import projection_engine, schedule_horizon
+from app.services.rollup_service import rollup_service
+from app.services.scheduler import Scheduler
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def materialize_recurring() -> None:
+    """Guardar como pendientes las ocurrencias vencidas de todos los usuarios."""
+    result = await recurring_service.materialize()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+
+async def extend_budget_schedules() -> None:
+    """Regenerar los calendarios de presupuesto que no llegan al horizonte."""
+    horizon = schedule_horizon()
+    rows = await supabase_service.fetch_all(
+        lambda: supabase_service.table('presupuesto_items').select('id, usuario_id').lt('ocurrencias_hasta', horizon).order('id')
+    )
+    
+    generated = 0
+    for user_id in dict.fromkeys(row["usuario_id"] for row in rows):
+        generated += await projection_engine.regenerate_schedule(user_id)
+    logger.info(f"✅ Calendarios de presupuesto extendidos: {len(rows)} elementos, {generated} ocurrencias")
+
+async def reconcile_rollups() -> None:
+    """Reconstruir los totales mensuales de los usuarios que no coinciden con movimientos."""
+    result = await rollup_service.check()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    
+    for user_id in dict.fromkeys(row["usuario_id"] for row in result["data"]):
+        rebuilt = await rollup_service.rebuild(user_id)
+        if not rebuilt["success"]:
+            raise RuntimeError(rebuilt["error"])
+
+def register_jobs(scheduler: Scheduler) -> None:
+    """Registrar las tareas periódicas con sus intervalos configurados."""
+    scheduler.add_job("materializar_recurrentes", materialize_recurring, settings.SCHEDULER_RECURRING_INTERVAL_SECONDS)
+    scheduler.add_job("extender_calendarios_presupuesto", extend_budget_schedules, settings.SCHEDULER_DERIVED_INTERVAL_SECONDS)
+    if settings.ROLLUPS_ENABLED:
+        scheduler.add_job("conciliar_resumen_mensual", reconcile_rollups, settings.SCHEDULER_ROLLUP_CHECK_INTERVAL_SECONDS) 
\ No newline at end of file
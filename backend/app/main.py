@@ -1,18 +1,36 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, File, Query, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional
+import codecs
+import csv
+import io
+import json
 import logging
+import shutil
+import tempfile
 
 from app.config import settings
 from app.services.supabase_service import supabase_service
 from app.services.auth_service import auth_service
 from app.services.movement_service import movement_service
 from app.services.budget_service import budget_service
+from app.services.budget_item_service import budget_item_service
+from app.services.recurring_service import recurring_service
 from app.services.category_service import category_service
-from app.models.user import UserCreate, UserResponse, UserLogin, Token
-from app.models.movement import MovementCreate, MovementUpdate, MovementFilter
+from app.services.import_service import import_service
+from app.services.data_version import data_version_service, GLOBAL_SCOPE
+from app.services.scheduler import scheduler
+from app.jobs import register_jobs
+from app.models.user import UserCreate, UserResponse, UserLogin
+from app.models.movement import MovementCreate, MovementBatchCreate, MovementUpdate, MovementFilter, MovementType
 from app.models.budget import BudgetCreate, BudgetUpdate
+from app.models.budget_item import BudgetItemCreate, BudgetItemUpdate
+from app.models.recurring import RecurringDecision, OccurrenceStatus
 from app.models.category import MovementType as CategoryMovementType
 
 # Configurar logging
@@ -22,6 +40,9 @@ logger = logging.getLogger(__name__)
 # Security
 security = HTTPBearer()
 
+# Columnas de la exportación CSV de movimientos
+EXPORT_COLUMNS = ["id", "movement_date", "movement_type", "category", "amount", "description"]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Eventos de inicio y cierre de la aplicación."""
@@ -35,10 +56,17 @@ async def lifespan(app: FastAPI):
     else:
         logger.error("❌ Error al conectar con Supabase")
     
+    # Tareas en segundo plano (recurrentes y datos derivados)
+    if settings.SCHEDULER_ENABLED:
+        register_jobs(scheduler)
+        scheduler.start()
+    
     yield
     
     # Shutdown
     logger.info("🛑 Cerrando Financial Control API...")
+    await scheduler.stop()
+    await supabase_service.close()
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -55,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Dependencia para obtener usuario actual
@@ -72,6 +101,30 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     
     return user
 
+async def _check_etag(request: Request, response: Response, scope: str) -> None:
+    """Responder 304 si el cliente ya tiene la versión actual; si no, enviar el ETag."""
+    resource = request.url.path + ("?" + str(request.query_params) if request.query_params else "")
+    etag = await data_version_service.etag(scope, resource)
+    if etag is None:
+        # Sin versión no hay forma segura de responder 304
+        return
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+
+# Dependencias de GET condicional: 304 sin consultar los datos si la versión no cambió
+async def user_data_etag(request: Request, response: Response, current_user: UserResponse = Depends(get_current_user)) -> None:
+    """ETag según la versión de datos del usuario (movimientos, presupuestos, reportes)."""
+    await _check_etag(request, response, current_user.id)
+
+async def global_data_etag(request: Request, response: Response, current_user: UserResponse = Depends(get_current_user)) -> None:
+    """ETag según la versión de los datos compartidos (catálogo de categorías)."""
+    await _check_etag(request, response, GLOBAL_SCOPE)
+
 # Rutas de autenticación
 @app.post(f"{settings.API_V1_STR}/auth/register", response_model=dict)
 async def register(user_data: UserCreate):
@@ -80,13 +133,17 @@ async def register(user_data: UserCreate):
         result = await auth_service.register_user(user_data)
         
         if result["success"]:
-            # Crear token para el usuario registrado
-            from datetime import timedelta
-            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = auth_service.create_access_token(
-                data={"sub": result["user"].id}, 
-                expires_delta=access_token_expires
-            )
+            if result.get("token"):
+                # Modo supabase: se reutiliza el token de sesión de Supabase Auth
+                access_token = result["token"].access_token
+            else:
+                # Crear token para el usuario registrado
+                from datetime import timedelta
+                access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+                access_token = auth_service.create_access_token(
+                    data={"sub": result["user"].id}, 
+                    expires_delta=access_token_expires
+                )
             
             return {
                 "success": True,
@@ -199,46 +256,154 @@ async def create_movement(
             detail="Error interno del servidor"
         )
 
-@app.get(f"{settings.API_V1_STR}/movements", response_model=dict)
-async def get_movements(
+@app.post(f"{settings.API_V1_STR}/movements/batch", response_model=dict)
+async def create_movements_batch(
+    batch: MovementBatchCreate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Crear varios movimientos en una petición (importación de historial)."""
+    if len(batch.items) > settings.MOVEMENT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.MOVEMENT_BATCH_MAX_ITEMS} movimientos por lote"
+        )
+    
+    try:
+        result = await movement_service.create_movements(current_user.id, batch.items)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": f"{result['data']['created']} de {len(batch.items)} movimientos creados",
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al crear movimientos en lote: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.post(f"{settings.API_V1_STR}/movements/import")
+async def import_movements(
+    file: UploadFile = File(...),
+    import_format: str = Query(None, alias="format", pattern="^(csv|ofx)$"),
+    offset: int = Query(0, ge=0),
+    default_category: str = Query("Importado", min_length=1),
+    encoding: str = "utf-8-sig",
+    decimal: str = Query(None, pattern="^[,.]$"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Importar un extracto bancario CSV u OFX.
+    
+    La respuesta es NDJSON: un evento de progreso por bloque escrito, con el
+    `offset` desde el que se puede reanudar, y un último evento con `done`.
+    `decimal` ("," o ".") es el separador decimal de los importes del CSV; sin
+    él, los importes ambiguos como "1.234" se rechazan.
+    """
+    file_format = import_format or ("ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv")
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Codificación no soportada: {encoding}"
+        )
+    
+    # FastAPI cierra el archivo subido al terminar la función: la respuesta,
+    # que se envía después, lee de una copia propia en disco
+    spooled = tempfile.TemporaryFile()
+    await run_in_threadpool(shutil.copyfileobj, file.file, spooled)
+    spooled.seek(0)
+    lines = io.TextIOWrapper(spooled, encoding=encoding, newline="")
+    
+    async def stream():
+        try:
+            async for event in import_service.import_movements(
+                current_user.id,
+                lines,
+                file_format=file_format,
+                offset=offset,
+                default_category=default_category,
+                decimal=decimal
+            ):
+                yield json.dumps(event) + "\n"
+        except (ValueError, UnicodeDecodeError) as e:
+            yield json.dumps({"done": True, "error": str(e)}) + "\n"
+        except Exception as e:
+            logger.error(f"Error al importar movimientos: {e}")
+            yield json.dumps({"done": True, "error": "Error interno del servidor"}) + "\n"
+        finally:
+            lines.close()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Dependencia para los filtros de movimientos (query string)
+def get_movement_filter(
     movement_type: str = None,
     category: str = None,
     date_from: str = None,
     date_to: str = None,
     amount_min: float = None,
-    amount_max: float = None,
+    amount_max: float = None
+) -> Optional[MovementFilter]:
+    """Construir el filtro de movimientos a partir de los parámetros de la URL."""
+    if not any([movement_type, category, date_from, date_to, amount_min, amount_max]):
+        return None
+    
+    try:
+        return MovementFilter(
+            movement_type=MovementType(movement_type) if movement_type else None,
+            category=category,
+            date_from=date.fromisoformat(date_from) if date_from else None,
+            date_to=date.fromisoformat(date_to) if date_to else None,
+            amount_min=amount_min,
+            amount_max=amount_max
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Filtro inválido: {e}"
+        )
+
+@app.get(f"{settings.API_V1_STR}/movements", response_model=dict, dependencies=[Depends(user_data_etag)])
+async def get_movements(
+    filters: Optional[MovementFilter] = Depends(get_movement_filter),
+    limit: int = Query(None, ge=1, le=500),
+    cursor: str = None,
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Obtener movimientos del usuario con filtros opcionales."""
+    """Obtener movimientos del usuario con filtros opcionales.
+    
+    Con `limit` la respuesta se pagina y trae `next_cursor` para pedir la siguiente página.
+    """
     try:
-        # Construir filtros
-        filters = None
-        if any([movement_type, category, date_from, date_to, amount_min, amount_max]):
-            from datetime import date
-            from app.models.movement import MovementType
-            
-            filters = MovementFilter(
-                movement_type=MovementType(movement_type) if movement_type else None,
-                category=category,
-                date_from=date.fromisoformat(date_from) if date_from else None,
-                date_to=date.fromisoformat(date_to) if date_to else None,
-                amount_min=amount_min,
-                amount_max=amount_max
-            )
-        
-        result = await movement_service.get_movements(current_user.id, filters)
+        result = await movement_service.get_movements(current_user.id, filters, limit=limit, cursor=cursor)
         
         if result["success"]:
-            return {
+            response = {
                 "success": True,
                 "data": result["data"]
             }
+            if limit:
+                response["next_cursor"] = result["next_cursor"]
+            return response
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result["error"]
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al obtener movimientos: {e}")
         raise HTTPException(
@@ -246,7 +411,50 @@ async def get_movements(
             detail="Error interno del servidor"
         )
 
-@app.get(f"{settings.API_V1_STR}/movements/{{movement_id}}", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/movements/export")
+async def export_movements(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    filters: Optional[MovementFilter] = Depends(get_movement_filter),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Exportar movimientos del usuario en CSV o NDJSON.
+    
+    Las filas se leen por páginas y se envían a medida que llegan, sin
+    armar el historial completo en memoria.
+    """
+    pages = movement_service.iter_movements(current_user.id, filters)
+    
+    async def stream():
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+        
+        try:
+            async for page in pages:
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for movement in page:
+                        writer.writerow([getattr(movement[column], "value", movement[column]) for column in EXPORT_COLUMNS])
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(json.dumps(movement, default=str) + "\n" for movement in page)
+        except Exception as e:
+            # La respuesta ya empezó: solo queda registrar el error y cortar el archivo
+            logger.error(f"Error al exportar movimientos: {e}")
+            raise
+    
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"movimientos.{export_format}"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get(f"{settings.API_V1_STR}/movements/{{movement_id}}", response_model=dict, dependencies=[Depends(user_data_etag)])
 async def get_movement(
     movement_id: str,
     current_user: UserResponse = Depends(get_current_user)
@@ -329,6 +537,139 @@ async def delete_movement(
             detail="Error interno del servidor"
         )
 
+# Rutas de movimientos recurrentes
+@app.post(f"{settings.API_V1_STR}/recurring/materialize", response_model=dict)
+async def materialize_recurring(current_user: UserResponse = Depends(get_current_user)):
+    """Calcular las ocurrencias vencidas de los movimientos recurrentes del usuario."""
+    try:
+        result = await recurring_service.materialize(current_user.id)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al materializar movimientos recurrentes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.get(f"{settings.API_V1_STR}/recurring/occurrences", response_model=dict)
+async def get_recurring_occurrences(
+    status_filter: OccurrenceStatus = Query(OccurrenceStatus.PENDIENTE, alias="status"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Obtener las ocurrencias de movimientos recurrentes (pendientes por defecto).
+    
+    Solo lectura: las ocurrencias vencidas las guarda la tarea
+    `materializar_recurrentes` o POST /recurring/materialize.
+    """
+    try:
+        result = await recurring_service.get_occurrences(current_user.id, status_filter, limit)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener ocurrencias recurrentes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.post(f"{settings.API_V1_STR}/recurring/occurrences/approve", response_model=dict)
+async def approve_recurring_occurrences(
+    decision: RecurringDecision,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Aprobar varias ocurrencias pendientes: crea sus movimientos en lote."""
+    if len(decision.keys) > settings.MOVEMENT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.MOVEMENT_BATCH_MAX_ITEMS} ocurrencias por petición"
+        )
+    
+    try:
+        result = await recurring_service.approve(current_user.id, decision.keys)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": f"{result['data']['resolved']} de {len(decision.keys)} ocurrencias procesadas",
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al aprobar ocurrencias recurrentes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.post(f"{settings.API_V1_STR}/recurring/occurrences/reject", response_model=dict)
+async def reject_recurring_occurrences(
+    decision: RecurringDecision,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Rechazar varias ocurrencias pendientes."""
+    if len(decision.keys) > settings.MOVEMENT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.MOVEMENT_BATCH_MAX_ITEMS} ocurrencias por petición"
+        )
+    
+    try:
+        result = await recurring_service.reject(current_user.id, decision.keys)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": f"{result['data']['resolved']} de {len(decision.keys)} ocurrencias procesadas",
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al rechazar ocurrencias recurrentes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 # Rutas de presupuestos
 @app.post(f"{settings.API_V1_STR}/budgets", response_model=dict)
 async def create_budget(
@@ -358,7 +699,7 @@ async def create_budget(
             detail="Error interno del servidor"
         )
 
-@app.get(f"{settings.API_V1_STR}/budgets", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/budgets", response_model=dict, dependencies=[Depends(user_data_etag)])
 async def get_budgets(current_user: UserResponse = Depends(get_current_user)):
     """Obtener todos los presupuestos del usuario."""
     try:
@@ -382,7 +723,7 @@ async def get_budgets(current_user: UserResponse = Depends(get_current_user)):
             detail="Error interno del servidor"
         )
 
-@app.get(f"{settings.API_V1_STR}/budgets/{{budget_id}}", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/budgets/{{budget_id}}", response_model=dict, dependencies=[Depends(user_data_etag)])
 async def get_budget(
     budget_id: str,
     current_user: UserResponse = Depends(get_current_user)
@@ -466,7 +807,7 @@ async def delete_budget(
         )
 
 # Rutas de reportes
-@app.get(f"{settings.API_V1_STR}/reports/financial-summary", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/reports/financial-summary", response_model=dict, dependencies=[Depends(user_data_etag)])
 async def get_financial_summary(
     start_date: str = None,
     end_date: str = None,
@@ -499,7 +840,7 @@ async def get_financial_summary(
             detail="Error interno del servidor"
         )
 
-@app.get(f"{settings.API_V1_STR}/reports/budget-summary", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/reports/budget-summary", response_model=dict, dependencies=[Depends(user_data_etag)])
 async def get_budget_summary(current_user: UserResponse = Depends(get_current_user)):
     """Obtener resumen de presupuestos del usuario."""
     try:
@@ -523,20 +864,193 @@ async def get_budget_summary(current_user: UserResponse = Depends(get_current_us
             detail="Error interno del servidor"
         )
 
+# Rutas del presupuesto estratégico
+@app.post(f"{settings.API_V1_STR}/budget-items", response_model=dict)
+async def create_budget_item(
+    item_data: BudgetItemCreate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Crear un elemento del presupuesto (ingreso recurrente o gasto proyectado)."""
+    try:
+        result = await budget_item_service.create_item(current_user.id, item_data)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": "Elemento creado exitosamente",
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al crear elemento de presupuesto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.get(f"{settings.API_V1_STR}/budget-items", response_model=dict, dependencies=[Depends(user_data_etag)])
+async def get_budget_items(current_user: UserResponse = Depends(get_current_user)):
+    """Obtener todos los elementos del presupuesto del usuario."""
+    try:
+        result = await budget_item_service.get_items(current_user.id)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener elementos de presupuesto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.get(f"{settings.API_V1_STR}/budget-items/{{item_id}}", response_model=dict, dependencies=[Depends(user_data_etag)])
+async def get_budget_item(
+    item_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Obtener un elemento del presupuesto específico."""
+    try:
+        result = await budget_item_service.get_item_by_id(current_user.id, item_id)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener elemento de presupuesto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.put(f"{settings.API_V1_STR}/budget-items/{{item_id}}", response_model=dict)
+async def update_budget_item(
+    item_id: str,
+    update_data: BudgetItemUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Actualizar un elemento del presupuesto."""
+    try:
+        result = await budget_item_service.update_item(current_user.id, item_id, update_data)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": "Elemento actualizado exitosamente",
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al actualizar elemento de presupuesto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.delete(f"{settings.API_V1_STR}/budget-items/{{item_id}}", response_model=dict)
+async def delete_budget_item(
+    item_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Eliminar un elemento del presupuesto."""
+    try:
+        result = await budget_item_service.delete_item(current_user.id, item_id)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": result["message"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al eliminar elemento de presupuesto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@app.get(f"{settings.API_V1_STR}/budget-projections", response_model=dict)
+async def get_budget_projections(
+    months: int = Query(12, ge=1, le=120, description="Meses a proyectar desde el mes actual"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Obtener ingresos y gastos proyectados vs reales por mes."""
+    try:
+        result = await budget_item_service.get_projections(current_user.id, months)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "data": result["data"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result["error"]
+            )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener proyecciones: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 # Rutas de categorías
-@app.get(f"{settings.API_V1_STR}/categories", response_model=dict)
+@app.get(f"{settings.API_V1_STR}/categories", response_model=dict, dependencies=[Depends(global_data_etag)])
 async def get_categories(
+    response: Response,
     type: CategoryMovementType = None,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Obtener categorías, opcionalmente filtradas por tipo."""
     try:
-        categories = await category_service.get_categories(type)
-        
-        return {
-            "success": True,
-            "data": [category.dict() for category in categories]
-        }
+        # Respuesta ya serializada desde el catálogo en memoria (incluye el ETag de la dependencia)
+        payload = await category_service.get_categories_json(type)
+        return Response(content=payload, media_type="application/json", headers=dict(response.headers))
             
     except Exception as e:
         logger.error(f"Error getting categories: {e}")
@@ -607,7 +1121,9 @@ async def health_check():
     """Verificar estado de la API."""
     return {
         "status": "healthy",
-        "database": "connected" if await supabase_service.test_connection() else "disconnected"
+        "database": "connected" if await supabase_service.test_connection() else "disconnected",
+        "database_pool": supabase_service.get_pool_metrics(),
+        "scheduler": scheduler.get_metrics()
     }
 
 if __name__ == "__main__":
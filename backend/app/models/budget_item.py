@@ -0,0 +1,73 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+from datetime import date, datetime
+from enum import Enum
+from app.models.budget import BudgetPeriod
+
+class BudgetItemType(str, Enum):
+    """Tipos de elementos del presupuesto estratégico."""
+    INGRESO_RECURRENTE = "ingreso_recurrente"
+    GASTO_PROYECTADO = "gasto_proyectado"
+
+class BudgetItemBase(BaseModel):
+    """Modelo base para elementos del presupuesto."""
+    name: str = Field(..., min_length=1, max_length=100, description="Nombre del elemento")
+    amount: float = Field(..., gt=0, description="Monto de cada ocurrencia")
+    type: BudgetItemType = Field(..., description="Ingreso recurrente o gasto proyectado")
+    category: str = Field(..., min_length=1, description="Categoría del elemento")
+    frequency: BudgetPeriod = Field(..., description="Frecuencia de las ocurrencias")
+    start_date: date = Field(..., description="Fecha de la primera ocurrencia")
+    end_date: Optional[date] = Field(None, description="Fecha de fin (sin fin si se omite)")
+
+class BudgetItemCreate(BudgetItemBase):
+    """Modelo para crear un elemento del presupuesto."""
+    
+    @model_validator(mode="after")
+    def check_dates(self):
+        """Validar que la fecha de fin no sea anterior a la de inicio."""
+        if self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date debe ser posterior a start_date")
+        return self
+
+class BudgetItemUpdate(BaseModel):
+    """Modelo para actualizar un elemento del presupuesto."""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    amount: Optional[float] = Field(None, gt=0)
+    type: Optional[BudgetItemType] = None
+    category: Optional[str] = Field(None, min_length=1)
+    frequency: Optional[BudgetPeriod] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    is_active: Optional[bool] = None
+
+class BudgetItemResponse(BudgetItemBase):
+    """Modelo de respuesta para elementos del presupuesto."""
+    id: str
+    user_id: str
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class BudgetProjection(BaseModel):
+    """Proyección de un mes: proyectado, real y diferencia."""
+    month: date
+    projected_income: float
+    projected_expenses: float
+    projected_balance: float
+    actual_income: float
+    actual_expenses: float
+    actual_balance: float
+    variance_income: float
+    variance_expenses: float
+    variance_balance: float
+
+class BudgetProjectionSummary(BaseModel):
+    """Resumen de proyecciones (BudgetSummary en el frontend)."""
+    total_projected_income: float
+    total_projected_expenses: float
+    total_projected_balance: float
+    total_actual_income: float
+    total_actual_expenses: float
+    total_actual_balance: float
+    projections: List[BudgetProjection]
+    period_months: int 
\ No newline at end of file
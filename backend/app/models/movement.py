@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import date, datetime
 from enum import Enum
 
@@ -19,6 +19,10 @@ class MovementCreate(MovementBase):
     """Modelo para crear un movimiento."""
     movement_date: date = Field(..., description="Fecha del movimiento")
 
+class MovementBatchCreate(BaseModel):
+    """Modelo para crear varios movimientos en una petición."""
+    items: List[MovementCreate] = Field(..., min_length=1, description="Movimientos a crear")
+
 class MovementUpdate(BaseModel):
     """Modelo para actualizar un movimiento."""
     amount: Optional[float] = Field(None, gt=0)
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import date
+from enum import Enum
+from app.models.movement import MovementType
+
+class RecurringFrequency(str, Enum):
+    """Frecuencias de los movimientos recurrentes."""
+    DIARIO = "diario"
+    SEMANAL = "semanal"
+    MENSUAL = "mensual"
+    ANUAL = "anual"
+
+class OccurrenceStatus(str, Enum):
+    """Estados de una ocurrencia de un movimiento recurrente."""
+    PENDIENTE = "pendiente"
+    APROBADA = "aprobada"
+    RECHAZADA = "rechazada"
+
+class RecurringDecision(BaseModel):
+    """Modelo para aprobar o rechazar varias ocurrencias en una petición."""
+    keys: List[str] = Field(..., min_length=1, description="Claves de las ocurrencias ('<plantilla_id>:<fecha>')")
+
+class OccurrenceResponse(BaseModel):
+    """Modelo de respuesta para ocurrencias de movimientos recurrentes."""
+    key: str
+    template_id: str
+    occurrence_date: date
+    amount: float
+    category: str
+    description: Optional[str] = None
+    movement_type: MovementType
+    status: OccurrenceStatus  
\ No newline at end of file
@@ -34,4 +34,5 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     """Modelo para datos del token."""
-    user_id: Optional[str] = None 
\ No newline at end of file
+    user_id: Optional[str] = None
+    exp: Optional[int] = None 
\ No newline at end of file
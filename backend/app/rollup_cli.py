@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Mantenimiento de los totales mensuales (`resumen_mensual`).
+
+Uso (desde backend/, con la clave de servicio en SUPABASE_KEY):
+    python -m app.rollup_cli rebuild               # reconstruir todos los usuarios
+    python -m app.rollup_cli rebuild --user <id>   # reconstruir un usuario
+    python -m app.rollup_cli check [--user <id>]   # listar diferencias (código 1 si hay)
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.services.rollup_service import rollup_service
+from app.services.supabase_service import supabase_service
+
+async def main(args) -> int:
+    try:
+        if args.command == "rebuild":
+            result = await rollup_service.rebuild(args.user)
+            if not result["success"]:
+                print(f"❌ {result['error']}")
+                return 2
+            print(f"✅ Filas reconstruidas: {result['data']['rows']}")
+            return 0
+        
+        result = await rollup_service.check(args.user)
+        if not result["success"]:
+            print(f"❌ {result['error']}")
+            return 2
+        
+        for row in result["data"]:
+            print(
+                f"{row['usuario_id']} {row['mes']} {row['tipo']} {row['categoria_id']}: "
+                f"total {row['total_resumen']} vs {row['total_real']}, "
+                f"cantidad {row['cantidad_resumen']} vs {row['cantidad_real']}"
+            )
+        if result["data"]:
+            print(f"⚠️ {len(result['data'])} diferencias; ejecutar 'rebuild' para corregirlas")
+            return 1
+        print("✅ Los totales mensuales coinciden con movimientos")
+        return 0
+    finally:
+        await supabase_service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild", "check"], help="Acción a ejecutar")
+    parser.add_argument("--user", help="Limitar a un usuario (id)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -2,7 +2,9 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from app.config import settings
+import json
 from app.services.supabase_service import supabase_service
+from app.services.cache import TTLCache
 from app.models.user import UserCreate, UserResponse, Token, TokenData
 import logging
 
@@ -13,7 +15,14 @@ class AuthService:
     
     def __init__(self):
         """Inicializar servicio de autenticación."""
-        self.supabase = supabase_service.get_client()
+        self.supabase = supabase_service
+        # token -> user_id (hasta el `exp` del token) y user_id -> perfil
+        self.token_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+        self.profile_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+        # Claves públicas de Supabase Auth indexadas por `kid`
+        self.supabase_jwks = {
+            key["kid"]: key for key in json.loads(settings.SUPABASE_JWKS).get("keys", [])
+        } if settings.SUPABASE_JWKS else {}
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Crear token JWT de acceso."""
@@ -34,17 +43,56 @@ class AuthService:
             user_id: str = payload.get("sub")
             if user_id is None:
                 return None
-            return TokenData(user_id=user_id)
+            return TokenData(user_id=user_id, exp=payload.get("exp"))
         except JWTError:
             return None
     
+    def verify_supabase_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verificar localmente un JWT de sesión de Supabase y devolver sus claims."""
+        try:
+            header = jwt.get_unverified_header(token)
+            
+            # El algoritmo lo fija la clave configurada, nunca el encabezado del token
+            if header.get("kid") in self.supabase_jwks:
+                key = self.supabase_jwks[header["kid"]]
+                algorithm = key.get("alg", "RS256")
+            elif settings.SUPABASE_JWT_SECRET:
+                key = settings.SUPABASE_JWT_SECRET
+                algorithm = "HS256"
+            else:
+                return None
+            
+            payload = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=settings.SUPABASE_JWT_AUDIENCE
+            )
+            if payload.get("sub") is None:
+                return None
+            return payload
+        except JWTError:
+            return None
+    
+    def user_from_claims(self, claims: Dict[str, Any]) -> UserResponse:
+        """Construir el usuario a partir de los claims del token de Supabase."""
+        metadata = claims.get("user_metadata") or {}
+        email = claims.get("email", "")
+        return UserResponse(
+            id=claims["sub"],
+            email=email,
+            name=metadata.get("name") or email.split("@")[0]
+        )
+    
     async def register_user(self, user_data: UserCreate) -> Optional[Dict[str, Any]]:
         """Registrar un nuevo usuario."""
         try:
             # Crear usuario en Supabase Auth
-            auth_response = self.supabase.auth.sign_up({
+            auth_response = await self.supabase.call(self.supabase.auth.sign_up, {
                 "email": user_data.email,
-                "password": user_data.password
+                "password": user_data.password,
+                # El nombre viaja en user_metadata para leerlo de los claims del token
+                "options": {"data": {"name": user_data.name}}
             })
             
             if not auth_response.user:
@@ -61,18 +109,20 @@ class AuthService:
             
             if result["success"]:
                 logger.info(f"✅ Usuario registrado exitosamente: {user_data.email}")
+                session = auth_response.session
                 return {
                     "success": True,
                     "user": UserResponse(
                         id=auth_response.user.id,
                         email=user_data.email,
                         name=user_data.name
-                    )
+                    ),
+                    "token": Token(access_token=session.access_token) if settings.AUTH_MODE == "supabase" and session else None
                 }
             else:
                 # Si falla la creación del perfil, eliminar el usuario de auth
                 try:
-                    self.supabase.auth.admin.delete_user(auth_response.user.id)
+                    await self.supabase.call(self.supabase.auth.admin.delete_user, auth_response.user.id)
                 except:
                     pass
                 return {"success": False, "error": "Error al crear el perfil del usuario"}
@@ -85,7 +135,7 @@ class AuthService:
         """Autenticar un usuario."""
         try:
             # Iniciar sesión con Supabase
-            auth_response = self.supabase.auth.sign_in_with_password({
+            auth_response = await self.supabase.call(self.supabase.auth.sign_in_with_password, {
                 "email": email,
                 "password": password
             })
@@ -93,6 +143,21 @@ class AuthService:
             if not auth_response.user:
                 return {"success": False, "error": "Credenciales inválidas"}
             
+            if settings.AUTH_MODE == "supabase":
+                # El token de sesión de Supabase ya trae identidad y perfil
+                metadata = auth_response.user.user_metadata or {}
+                if metadata.get("name"):
+                    logger.info(f"✅ Usuario autenticado exitosamente: {email}")
+                    return {
+                        "success": True,
+                        "user": UserResponse(
+                            id=auth_response.user.id,
+                            email=auth_response.user.email,
+                            name=metadata["name"]
+                        ),
+                        "token": Token(access_token=auth_response.session.access_token)
+                    }
+            
             # Obtener datos del usuario
             user_result = await supabase_service.get_records("usuarios", {"id": auth_response.user.id})
             
@@ -102,11 +167,17 @@ class AuthService:
             user_data = user_result["data"][0]
             
             # Crear token JWT
-            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = self.create_access_token(
-                data={"sub": auth_response.user.id}, 
-                expires_delta=access_token_expires
-            )
+            if settings.AUTH_MODE == "supabase":
+                # Usuario registrado sin nombre en user_metadata (antes de AUTH_MODE=supabase):
+                # completarlo para que los próximos tokens lo traigan en sus claims
+                await self._sync_supabase_profile(user_data["id"], user_data)
+                access_token = auth_response.session.access_token
+            else:
+                access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+                access_token = self.create_access_token(
+                    data={"sub": auth_response.user.id}, 
+                    expires_delta=access_token_expires
+                )
             
             logger.info(f"✅ Usuario autenticado exitosamente: {email}")
             return {
@@ -126,30 +197,63 @@ class AuthService:
     async def get_current_user(self, token: str) -> Optional[UserResponse]:
         """Obtener usuario actual basado en el token."""
         try:
-            token_data = self.verify_token(token)
-            if token_data is None:
-                return None
+            if settings.AUTH_MODE == "supabase":
+                return self._get_user_from_supabase_token(token)
+            
+            user_id = self.token_cache.get(token)
+            if user_id is None:
+                token_data = self.verify_token(token)
+                if token_data is None:
+                    return None
+                user_id = token_data.user_id
+                # Nunca mantener el token en caché más allá de su expiración
+                self.token_cache.set(token, user_id, expires_at=token_data.exp)
+            
+            user = self.profile_cache.get(user_id)
+            if user is not None:
+                return user
             
-            user_result = await supabase_service.get_records("usuarios", {"id": token_data.user_id})
+            user_result = await supabase_service.get_records("usuarios", {"id": user_id})
             
             if not user_result["success"] or not user_result["data"]:
                 return None
             
             user_data = user_result["data"][0]
-            return UserResponse(
+            user = UserResponse(
                 id=user_data["id"],
                 email=user_data["email"],
                 name=user_data["name"]
             )
+            self.profile_cache.set(user_id, user)
+            return user
             
         except Exception as e:
             logger.error(f"❌ Error al obtener usuario actual: {e}")
             return None
     
+    def _get_user_from_supabase_token(self, token: str) -> Optional[UserResponse]:
+        """Resolver el usuario solo con los claims del token (sin consultas)."""
+        user = self.token_cache.get(token)
+        if user is not None:
+            return self.profile_cache.get(user.id, user)
+        
+        claims = self.verify_supabase_token(token)
+        if claims is None:
+            return None
+        
+        user = self.user_from_claims(claims)
+        self.token_cache.set(token, user, expires_at=claims.get("exp"))
+        # Un perfil recién actualizado tiene prioridad sobre los claims del token
+        return self.profile_cache.get(user.id, user)
+    
     async def update_user_profile(self, user_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Actualizar perfil de usuario."""
         try:
             result = await supabase_service.update_record("usuarios", user_id, update_data)
+            self.profile_cache.delete(user_id)
+            
+            if result["success"] and settings.AUTH_MODE == "supabase" and result["data"]:
+                await self._sync_supabase_profile(user_id, result["data"][0])
             
             if result["success"]:
                 logger.info(f"✅ Perfil de usuario actualizado: {user_id}")
@@ -160,6 +264,26 @@ class AuthService:
         except Exception as e:
             logger.error(f"❌ Error al actualizar perfil: {e}")
             return {"success": False, "error": str(e)}
+    
+    async def _sync_supabase_profile(self, user_id: str, profile: Dict[str, Any]) -> None:
+        """Propagar el perfil actualizado a user_metadata y a la caché de perfiles."""
+        # Los tokens vigentes conservan los claims viejos hasta refrescarse
+        # (1 hora por defecto en Supabase), así que el perfil nuevo se mantiene ese tiempo.
+        # La caché es de este proceso: los otros workers siguen mostrando el nombre de
+        # los claims hasta que el cliente refresca el token (como máximo esa hora)
+        self.profile_cache.set(user_id, UserResponse(
+            id=profile["id"],
+            email=profile["email"],
+            name=profile["name"]
+        ), ttl=3600)
+        try:
+            await self.supabase.call(
+                self.supabase.auth.admin.update_user_by_id,
+                user_id,
+                {"user_metadata": {"name": profile["name"]}}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo actualizar user_metadata de {user_id}: {e}")
 
 # Instancia global del servicio
 auth_service = AuthService() 
\ No newline at end of file
@@ -0,0 +1,221 @@
+from typing import Optional, Dict, Any
+from datetime import date
+from app.services.supabase_service import supabase_service
+from app.services.category_resolver import category_resolver
+from app.services.data_version import data_version_service
+from app.services.projection_engine import projection_engine
+from app.models.budget_item import BudgetItemCreate, BudgetItemUpdate, BudgetItemType
+from app.models.budget import BudgetPeriod
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Campos que cambian las ocurrencias: al escribirlos se regenera el calendario
+SCHEDULE_FIELDS = {"monto", "tipo", "frecuencia", "fecha_inicio", "fecha_fin", "activo"}
+
+class BudgetItemService:
+    """Servicio para el presupuesto estratégico (elementos y proyecciones)."""
+    
+    def __init__(self):
+        """Inicializar servicio de elementos del presupuesto."""
+        self.supabase = supabase_service
+        self.engine = projection_engine
+    
+    async def create_item(self, user_id: str, item_data: BudgetItemCreate) -> Optional[Dict[str, Any]]:
+        """Crear un elemento y generar su calendario de ocurrencias."""
+        try:
+            category_id = await self._get_or_create_category(user_id, item_data.category, item_data.type)
+            
+            if not category_id:
+                return {"success": False, "error": "Error al obtener/crear categoría"}
+            
+            item_record = {
+                "usuario_id": user_id,
+                "nombre": item_data.name,
+                "monto": item_data.amount,
+                "tipo": item_data.type.value,
+                "categoria_id": category_id,
+                "frecuencia": item_data.frequency.value,
+                "fecha_inicio": item_data.start_date.strftime('%Y-%m-%d'),
+                "fecha_fin": item_data.end_date.strftime('%Y-%m-%d') if item_data.end_date else None
+            }
+            
+            result = await self.supabase.insert_record("presupuesto_items", item_record)
+            data_version_service.bump(user_id)
+            
+            if not result["success"]:
+                return {"success": False, "error": result["error"]}
+            
+            item = result["data"][0]
+            await self._regenerate_schedule(user_id, item["id"])
+            logger.info(f"✅ Elemento de presupuesto creado exitosamente para usuario {user_id}")
+            return {"success": True, "data": self._format_item(item, item_data.category)}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al crear elemento de presupuesto: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_items(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Obtener todos los elementos del usuario."""
+        try:
+            response = await self.supabase.execute(
+                self.supabase.table('presupuesto_items').select('*, categorias(nombre)').eq('usuario_id', user_id).order('created_at')
+            )
+            return {"success": True, "data": [self._format_item(item) for item in response.data or []]}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al obtener elementos de presupuesto: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_item_by_id(self, user_id: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Obtener un elemento específico por ID."""
+        try:
+            response = await self.supabase.execute(
+                self.supabase.table('presupuesto_items').select('*, categorias(nombre)').eq('id', item_id).eq('usuario_id', user_id)
+            )
+            
+            if response.data:
+                return {"success": True, "data": self._format_item(response.data[0])}
+            else:
+                return {"success": False, "error": "Elemento no encontrado"}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al obtener elemento de presupuesto: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def update_item(self, user_id: str, item_id: str, update_data: BudgetItemUpdate) -> Optional[Dict[str, Any]]:
+        """Actualizar un elemento; el calendario se regenera solo si cambian sus ocurrencias."""
+        try:
+            update_record = {}
+            
+            if update_data.name is not None:
+                update_record["nombre"] = update_data.name
+            
+            if update_data.amount is not None:
+                update_record["monto"] = update_data.amount
+            
+            if update_data.type is not None:
+                update_record["tipo"] = update_data.type.value
+            
+            if update_data.frequency is not None:
+                update_record["frecuencia"] = update_data.frequency.value
+            
+            if update_data.start_date is not None:
+                update_record["fecha_inicio"] = update_data.start_date.strftime('%Y-%m-%d')
+            
+            # end_date: null explícito deja el elemento sin fin
+            if "end_date" in update_data.model_fields_set:
+                update_record["fecha_fin"] = update_data.end_date.strftime('%Y-%m-%d') if update_data.end_date else None
+            
+            if update_data.is_active is not None:
+                update_record["activo"] = update_data.is_active
+            
+            if update_data.category is not None or update_data.type is not None:
+                # La categoría depende del tipo (Ingreso/Gasto): completar lo que falte con el elemento actual
+                category_name, item_type = update_data.category, update_data.type
+                if category_name is None or item_type is None:
+                    current = await self.get_item_by_id(user_id, item_id)
+                    if not current["success"]:
+                        return current
+                    category_name = category_name or current["data"]["category"]
+                    item_type = item_type or current["data"]["type"]
+                
+                category_id = await self._get_or_create_category(user_id, category_name, item_type)
+                if category_id:
+                    update_record["categoria_id"] = category_id
+            
+            if not update_record:
+                return {"success": False, "error": "No hay datos para actualizar"}
+            
+            schedule_changed = bool(SCHEDULE_FIELDS & update_record.keys())
+            if schedule_changed:
+                # Marcar el calendario como pendiente en la misma escritura: si la
+                # regeneración falla, la siguiente proyección lo vuelve a generar
+                update_record["ocurrencias_hasta"] = "-infinity"
+            
+            # Filtrar por id y usuario: la verificación de pertenencia va en la misma escritura
+            result = await self.supabase.update_record("presupuesto_items", item_id, update_record, user_id=user_id)
+            data_version_service.bump(user_id)
+            
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Elemento no encontrado"}
+            elif not result["success"]:
+                return {"success": False, "error": result["error"]}
+            
+            if schedule_changed:
+                await self._regenerate_schedule(user_id, item_id)
+            
+            logger.info(f"✅ Elemento de presupuesto actualizado exitosamente: {item_id}")
+            return await self.get_item_by_id(user_id, item_id)
+        
+        except Exception as e:
+            logger.error(f"❌ Error al actualizar elemento de presupuesto: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def delete_item(self, user_id: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Eliminar un elemento (sus ocurrencias se borran en cascada)."""
+        try:
+            result = await self.supabase.delete_record("presupuesto_items", item_id, user_id=user_id)
+            data_version_service.bump(user_id)
+            
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Elemento no encontrado"}
+            elif result["success"]:
+                logger.info(f"✅ Elemento de presupuesto eliminado exitosamente: {item_id}")
+                return {"success": True, "message": "Elemento eliminado exitosamente"}
+            else:
+                return {"success": False, "error": result["error"]}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al eliminar elemento de presupuesto: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_projections(self, user_id: str, months: int = 12, start: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Obtener proyectado vs real vs diferencia de los próximos `months` meses."""
+        try:
+            summary = await self.engine.get_projection(user_id, months, start)
+            return {"success": True, "data": summary}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al obtener proyecciones: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def _regenerate_schedule(self, user_id: str, item_id: str) -> None:
+        """Regenerar el calendario de un elemento tras escribirlo."""
+        try:
+            generated = await self.engine.regenerate_schedule(user_id, item_id)
+            logger.info(f"✅ Calendario del elemento {item_id} regenerado: {generated} ocurrencias")
+        
+        except Exception as e:
+            # El elemento queda marcado como pendiente; la próxima proyección lo regenera
+            logger.error(f"❌ Error al regenerar calendario del elemento {item_id}: {e}")
+    
+    def _format_item(self, item: Dict[str, Any], category_name: Optional[str] = None) -> Dict[str, Any]:
+        """Convertir una fila de presupuesto_items al formato de la API."""
+        return {
+            "id": item["id"],
+            "user_id": item["usuario_id"],
+            "name": item["nombre"],
+            "amount": float(item["monto"]),
+            "type": BudgetItemType(item["tipo"]),
+            "category": category_name or (item.get("categorias") or {}).get("nombre", "Sin categoría"),
+            "frequency": BudgetPeriod(item["frecuencia"]),
+            "start_date": item["fecha_inicio"],
+            "end_date": item.get("fecha_fin"),
+            "is_active": item.get("activo", True),
+            "created_at": item.get("created_at"),
+            "updated_at": item.get("updated_at")
+        }
+    
+    async def _get_or_create_category(self, user_id: str, category_name: str, item_type: BudgetItemType) -> Optional[str]:
+        """Obtener o crear la categoría del elemento (de ingreso o de gasto según su tipo)."""
+        try:
+            movement_type = "Ingreso" if item_type == BudgetItemType.INGRESO_RECURRENTE else "Gasto"
+            return await category_resolver.get_or_create(user_id, category_name, movement_type)
+        
+        except Exception as e:
+            logger.error(f"❌ Error al obtener/crear categoría: {e}")
+            return None
+
+# Instancia global del servicio
+budget_item_service = BudgetItemService() 
\ No newline at end of file
@@ -1,8 +1,9 @@
 from typing import Optional, Dict, Any, List
-from datetime import date, datetime
 from app.services.supabase_service import supabase_service
-from app.models.budget import BudgetCreate, BudgetResponse, BudgetUpdate, BudgetPeriod
-from app.services.movement_service import movement_service
+from app.services.category_resolver import category_resolver
+from app.services.data_version import data_version_service
+from app.services.spending_engine import spending_engine
+from app.models.budget import BudgetCreate, BudgetUpdate, BudgetPeriod
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +13,7 @@ class BudgetService:
     
     def __init__(self):
         """Inicializar servicio de presupuestos."""
-        self.supabase = supabase_service.get_client()
+        self.supabase = supabase_service
     
     async def create_budget(self, user_id: str, budget_data: BudgetCreate) -> Optional[Dict[str, Any]]:
         """Crear un nuevo presupuesto."""
@@ -34,6 +35,7 @@ class BudgetService:
             }
             
             result = await supabase_service.insert_record("presupuestos", budget_record)
+            data_version_service.bump(user_id)
             
             if result["success"]:
                 logger.info(f"✅ Presupuesto creado exitosamente para usuario {user_id}")
@@ -43,7 +45,7 @@ class BudgetService:
                 }
             else:
                 return {"success": False, "error": result["error"]}
-                
+        
         except Exception as e:
             logger.error(f"❌ Error al crear presupuesto: {e}")
             return {"success": False, "error": str(e)}
@@ -51,19 +53,14 @@ class BudgetService:
     async def get_budgets(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Obtener todos los presupuestos del usuario."""
         try:
-            response = self.supabase.table('presupuestos').select('*, categorias(nombre)').eq('usuario_id', user_id).execute()
+            response = await self.supabase.execute(self.supabase.table('presupuestos').select('*, categorias(nombre)').eq('usuario_id', user_id))
             
             if response.data:
+                # Gasto de todos los presupuestos con una sola lectura de movimientos
+                spending = await self._calculate_spending_for_budgets(user_id, response.data)
+                
                 budgets = []
-                for budget in response.data:
-                    # Calcular gasto actual y estadísticas
-                    current_amount = await self._calculate_current_spending(
-                        user_id, 
-                        budget.get("categorias", {}).get("nombre", ""),
-                        budget["fecha_inicio"],
-                        budget["fecha_fin"]
-                    )
-                    
+                for budget, current_amount in zip(response.data, spending):
                     max_amount = budget["monto_maximo"]
                     remaining_amount = max(0, max_amount - current_amount)
                     percentage_used = (current_amount / max_amount * 100) if max_amount > 0 else 0
@@ -86,7 +83,7 @@ class BudgetService:
                 return {"success": True, "data": budgets}
             else:
                 return {"success": True, "data": []}
-                
+        
         except Exception as e:
             logger.error(f"❌ Error al obtener presupuestos: {e}")
             return {"success": False, "error": str(e)}
@@ -94,18 +91,13 @@ class BudgetService:
     async def get_budget_by_id(self, user_id: str, budget_id: str) -> Optional[Dict[str, Any]]:
         """Obtener un presupuesto específico por ID."""
         try:
-            response = self.supabase.table('presupuestos').select('*, categorias(nombre)').eq('id', budget_id).eq('usuario_id', user_id).execute()
+            response = await self.supabase.execute(self.supabase.table('presupuestos').select('*, categorias(nombre)').eq('id', budget_id).eq('usuario_id', user_id))
             
             if response.data:
                 budget = response.data[0]
                 
                 # Calcular gasto actual y estadísticas
-                current_amount = await self._calculate_current_spending(
-                    user_id,
-                    budget.get("categorias", {}).get("nombre", ""),
-                    budget["fecha_inicio"],
-                    budget["fecha_fin"]
-                )
+                current_amount = (await self._calculate_spending_for_budgets(user_id, [budget]))[0]
                 
                 max_amount = budget["monto_maximo"]
                 remaining_amount = max(0, max_amount - current_amount)
@@ -130,7 +122,7 @@ class BudgetService:
                 }
             else:
                 return {"success": False, "error": "Presupuesto no encontrado"}
-                
+        
         except Exception as e:
             logger.error(f"❌ Error al obtener presupuesto: {e}")
             return {"success": False, "error": str(e)}
@@ -138,11 +130,6 @@ class BudgetService:
     async def update_budget(self, user_id: str, budget_id: str, update_data: BudgetUpdate) -> Optional[Dict[str, Any]]:
         """Actualizar un presupuesto."""
         try:
-            # Verificar que el presupuesto existe y pertenece al usuario
-            budget_check = await self.get_budget_by_id(user_id, budget_id)
-            if not budget_check["success"]:
-                return {"success": False, "error": "Presupuesto no encontrado"}
-            
             # Preparar datos de actualización
             update_record = {}
             
@@ -167,14 +154,18 @@ class BudgetService:
             if not update_record:
                 return {"success": False, "error": "No hay datos para actualizar"}
             
-            result = await supabase_service.update_record("presupuestos", budget_id, update_record)
+            # Filtrar por id y usuario: la verificación de pertenencia va en la misma escritura
+            result = await supabase_service.update_record("presupuestos", budget_id, update_record, user_id=user_id)
+            data_version_service.bump(user_id)
             
-            if result["success"]:
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Presupuesto no encontrado"}
+            elif result["success"]:
                 logger.info(f"✅ Presupuesto actualizado exitosamente: {budget_id}")
                 return {"success": True, "data": result["data"]}
             else:
                 return {"success": False, "error": result["error"]}
-                
+        
         except Exception as e:
             logger.error(f"❌ Error al actualizar presupuesto: {e}")
             return {"success": False, "error": str(e)}
@@ -182,19 +173,17 @@ class BudgetService:
     async def delete_budget(self, user_id: str, budget_id: str) -> Optional[Dict[str, Any]]:
         """Eliminar un presupuesto."""
         try:
-            # Verificar que el presupuesto existe y pertenece al usuario
-            budget_check = await self.get_budget_by_id(user_id, budget_id)
-            if not budget_check["success"]:
-                return {"success": False, "error": "Presupuesto no encontrado"}
-            
-            result = await supabase_service.delete_record("presupuestos", budget_id)
+            result = await supabase_service.delete_record("presupuestos", budget_id, user_id=user_id)
+            data_version_service.bump(user_id)
             
-            if result["success"]:
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Presupuesto no encontrado"}
+            elif result["success"]:
                 logger.info(f"✅ Presupuesto eliminado exitosamente: {budget_id}")
                 return {"success": True, "message": "Presupuesto eliminado exitosamente"}
             else:
                 return {"success": False, "error": result["error"]}
-                
+        
         except Exception as e:
             logger.error(f"❌ Error al eliminar presupuesto: {e}")
             return {"success": False, "error": str(e)}
@@ -235,52 +224,27 @@ class BudgetService:
                     "budgets": budgets
                 }
             }
-            
+        
         except Exception as e:
             logger.error(f"❌ Error al obtener resumen de presupuestos: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _calculate_current_spending(self, user_id: str, category_name: str, start_date: str, end_date: str) -> float:
-        """Calcular el gasto actual en una categoría durante un período."""
+    async def _calculate_spending_for_budgets(self, user_id: str, budgets: List[Dict[str, Any]]) -> List[float]:
+        """Calcular el gasto actual de cada presupuesto en su categoría y período."""
         try:
-            # Obtener movimientos de gasto en la categoría durante el período
-            response = self.supabase.table('movimientos').select('monto').eq('usuario_id', user_id).eq('tipo', 'Gasto').eq('es_recurrente', False).gte('fecha', start_date).lte('fecha', end_date).execute()
-            
-            if response.data:
-                # Filtrar por categoría (esto requeriría un join, pero por simplicidad calculamos el total)
-                # En una implementación real, deberías hacer un join con la tabla categorias
-                total_spent = sum(mov["monto"] for mov in response.data)
-                return total_spent
-            
-            return 0.0
-            
+            windows = [(budget.get("categoria_id"), budget["fecha_inicio"], budget["fecha_fin"]) for budget in budgets]
+            return await spending_engine.get_totals(user_id, windows)
+        
         except Exception as e:
             logger.error(f"❌ Error al calcular gasto actual: {e}")
-            return 0.0
+            return [0.0] * len(budgets)
     
     async def _get_or_create_category(self, user_id: str, category_name: str) -> Optional[str]:
         """Obtener una categoría existente o crear una nueva."""
         try:
-            # Buscar categoría existente (asumimos que es para gastos)
-            response = self.supabase.table('categorias').select('id').eq('usuario_id', user_id).eq('nombre', category_name).eq('tipo', 'Gasto').execute()
-            
-            if response.data:
-                return response.data[0]['id']
-            
-            # Crear nueva categoría
-            category_data = {
-                "nombre": category_name,
-                "tipo": "Gasto",
-                "usuario_id": user_id
-            }
-            
-            result = await supabase_service.insert_record("categorias", category_data)
-            
-            if result["success"] and result["data"]:
-                return result["data"][0]['id']
-            
-            return None
-            
+            # Los presupuestos siempre son de gastos
+            return await category_resolver.get_or_create(user_id, category_name, "Gasto")
+        
         except Exception as e:
             logger.error(f"❌ Error al obtener/crear categoría: {e}")
             return None
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Any, Optional, Hashable
+import time
+
+class TTLCache:
+    """Caché LRU acotada en memoria con expiración por entrada."""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 60):
+        """Inicializar caché con tamaño máximo y TTL por defecto (segundos)."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtener un valor vigente, o `default` si no existe o expiró."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """Guardar un valor; `expires_at` (epoch) acota el TTL si vence antes."""
+        ttl = self.ttl if ttl is None else ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: Hashable) -> None:
+        """Eliminar una entrada si existe."""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Vaciar la caché."""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> dict:
+        """Estadísticas de uso de la caché."""
+        return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,128 @@
+from typing import Optional, Dict, Iterable, List, Tuple
+from app.config import settings
+from app.services.supabase_service import supabase_service
+from app.services.cache import TTLCache
+import asyncio
+
+_MISSING = object()
+
+class CategoryResolver:
+    """Resolver ids de `categorias` por (usuario_id, nombre, tipo) con caché y creación única."""
+    
+    def __init__(self):
+        """Inicializar caché LRU y registro de consultas en curso."""
+        self.cache = TTLCache(settings.CATEGORY_CACHE_MAX_SIZE, settings.CATEGORY_CACHE_TTL_SECONDS)
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+    
+    async def get_or_create(self, user_id: str, name: str, movement_type: str) -> Optional[str]:
+        """Obtener el id de la categoría, creándola si no existe."""
+        return await self._resolve(user_id, name, movement_type, create=True)
+    
+    async def lookup(self, user_id: str, name: str, movement_type: str) -> Optional[str]:
+        """Obtener el id de la categoría sin crearla (None si no existe)."""
+        return await self._resolve(user_id, name, movement_type, create=False)
+    
+    async def get_or_create_many(self, user_id: str, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[str]]:
+        """Resolver varias (nombre, tipo) a la vez: una lectura y una inserción como máximo."""
+        result: Dict[Tuple[str, str], Optional[str]] = {}
+        missing = []
+        for name, movement_type in set(keys):
+            category_id = self.cache.get((user_id, name, movement_type))
+            if category_id is None:
+                missing.append((name, movement_type))
+            else:
+                result[(name, movement_type)] = category_id
+        
+        if not missing:
+            return result
+        
+        found = await self._select_many(user_id, missing)
+        to_create = [key for key in missing if key not in found]
+        if to_create:
+            response = await supabase_service.insert_record("categorias", [
+                {"nombre": name, "tipo": movement_type, "usuario_id": user_id}
+                for name, movement_type in to_create
+            ])
+            if response["success"] and response["data"]:
+                found.update({(row["nombre"], row["tipo"]): row["id"] for row in response["data"]})
+            else:
+                # Otro proceso pudo crear alguna primero (índice único): volver a leer
+                found.update(await self._select_many(user_id, to_create))
+        
+        for name, movement_type in missing:
+            category_id = found.get((name, movement_type))
+            if category_id is not None:
+                self.cache.set((user_id, name, movement_type), category_id)
+            result[(name, movement_type)] = category_id
+        return result
+    
+    def remember(self, user_id: str, name: str, movement_type: str, category_id: str) -> None:
+        """Registrar un id ya conocido (por ejemplo, devuelto por otra consulta)."""
+        self.cache.set((user_id, name, movement_type), category_id)
+    
+    async def _resolve(self, user_id: str, name: str, movement_type: str, create: bool) -> Optional[str]:
+        """Resolver desde caché o compartiendo la consulta en curso."""
+        key = (user_id, name, movement_type)
+        category_id = self.cache.get(key, _MISSING)
+        # Un resultado negativo sirve para búsquedas, pero no impide crear la categoría
+        if category_id is not _MISSING and (category_id is not None or not create):
+            return category_id
+        
+        # Single-flight: las peticiones concurrentes por la misma clave comparten una sola consulta
+        flight = (key, create)
+        future = self._inflight.get(flight)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, create))
+            self._inflight[flight] = future
+            future.add_done_callback(lambda _: self._inflight.pop(flight, None))
+        
+        return await asyncio.shield(future)
+    
+    async def _load(self, key: Tuple[str, str, str], create: bool) -> Optional[str]:
+        """Consultar (y opcionalmente crear) la categoría en Supabase."""
+        user_id, name, movement_type = key
+        
+        category_id = await self._select(user_id, name, movement_type)
+        if category_id is None and create:
+            result = await supabase_service.insert_record("categorias", {
+                "nombre": name,
+                "tipo": movement_type,
+                "usuario_id": user_id
+            })
+            
+            if result["success"] and result["data"]:
+                category_id = result["data"][0]["id"]
+            else:
+                # Otro proceso pudo crearla primero (índice único): volver a leer
+                category_id = await self._select(user_id, name, movement_type)
+        
+        if category_id is not None:
+            self.cache.set(key, category_id)
+        elif not create and self.cache.get(key) is None:
+            # No pisar un id que una creación concurrente acaba de guardar
+            self.cache.set(key, None, ttl=settings.CATEGORY_NEGATIVE_TTL_SECONDS)
+        
+        return category_id
+    
+    async def _select(self, user_id: str, name: str, movement_type: str) -> Optional[str]:
+        """Buscar el id de una categoría existente."""
+        response = await supabase_service.execute(
+            supabase_service.table('categorias').select('id').eq('usuario_id', user_id).eq('nombre', name).eq('tipo', movement_type)
+        )
+        return response.data[0]['id'] if response.data else None
+
+    async def _select_many(self, user_id: str, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Buscar los ids de varias categorías existentes en una consulta."""
+        names = sorted({name for name, _ in keys})
+        response = await supabase_service.execute(
+            supabase_service.table('categorias').select('id, nombre, tipo').eq('usuario_id', user_id).in_('nombre', names)
+        )
+        wanted = set(keys)
+        return {
+            (row["nombre"], row["tipo"]): row["id"]
+            for row in response.data or []
+            if (row["nombre"], row["tipo"]) in wanted
+        }
+
+# Instancia global del servicio
+category_resolver = CategoryResolver()
@@ -1,6 +1,12 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
 from app.services.supabase_service import supabase_service
+from app.services.cache import TTLCache
+from app.services.data_version import data_version_service, GLOBAL_SCOPE
 from app.models.category import CategoryCreate, CategoryUpdate, CategoryResponse, MovementType
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,18 +14,67 @@ logger = logging.getLogger(__name__)
 class CategoryService:
     def __init__(self):
         self.table_name = "categories"
+        # Catálogo por tipo (None = todos): (versión '*' de versiones_datos, categorías,
+        # respuesta JSON ya serializada). El TTL solo acota el retraso sin la migración 010
+        self.catalogue = TTLCache(max_size=8, ttl=settings.CATEGORY_CATALOGUE_TTL_SECONDS)
+        self._catalogue_lock = asyncio.Lock()
+        self._catalogue_generation = 0
 
     async def get_categories(self, type: Optional[MovementType] = None) -> List[CategoryResponse]:
-        """Obtener todas las categorías o filtrar por tipo."""
+        """Obtener todas las categorías o filtrar por tipo (desde el catálogo en memoria)."""
+        categories, _ = await self._get_catalogue(type)
+        return categories
+
+    async def get_categories_json(self, type: Optional[MovementType] = None) -> bytes:
+        """Respuesta de GET /categories ya serializada; no consulta `categories` si la versión no cambió."""
+        _, payload = await self._get_catalogue(type)
+        return payload
+
+    def invalidate_catalogue(self) -> None:
+        """Descartar el catálogo en memoria tras una escritura."""
+        self._catalogue_generation += 1
+        self.catalogue.clear()
+
+    async def _get_catalogue(self, type: Optional[MovementType]) -> Tuple[List[CategoryResponse], bytes]:
+        """Obtener el catálogo de un tipo, cargándolo una sola vez por versión de los datos.
+        
+        La versión global es la misma que usa el ETag de GET /categories (y
+        ya está en la caché de versiones): si otro proceso cambia `categories`,
+        cambian a la vez el ETag y el catálogo servido.
+        """
+        version = await data_version_service.get(GLOBAL_SCOPE)
+        entry = self.catalogue.get(type)
+        if entry is not None and entry[0] == version:
+            return entry[1:]
+        
+        async with self._catalogue_lock:
+            # Otra petición pudo cargarlo mientras se esperaba el lock
+            entry = self.catalogue.get(type)
+            if entry is None or entry[0] != version:
+                generation = self._catalogue_generation
+                categories = await self._load_categories(type)
+                payload = json.dumps(
+                    jsonable_encoder({"success": True, "data": [category.dict() for category in categories]}),
+                    ensure_ascii=False,
+                    separators=(",", ":")
+                ).encode("utf-8")
+                entry = (version, categories, payload)
+                # No guardar lo leído si una escritura lo invalidó mientras tanto
+                if generation == self._catalogue_generation:
+                    self.catalogue.set(type, entry)
+            return entry[1:]
+
+    async def _load_categories(self, type: Optional[MovementType] = None) -> List[CategoryResponse]:
+        """Consultar las categorías en Supabase."""
         try:
-            query = supabase_service.supabase.table(self.table_name).select("*")
+            query = supabase_service.table(self.table_name).select("*")
             
             if type:
                 # Convertir el enum a string para la consulta
                 type_str = "INGRESO" if type == MovementType.INGRESO else "GASTO"
                 query = query.eq("type", type_str)
             
-            response = query.execute()
+            response = await supabase_service.execute(query)
             
             if response.data:
                 categories = []
@@ -47,7 +102,7 @@ class CategoryService:
     async def get_category_by_id(self, category_id: str) -> Optional[CategoryResponse]:
         """Obtener una categoría por ID."""
         try:
-            response = supabase_service.supabase.table(self.table_name).select("*").eq("id", category_id).execute()
+            response = await supabase_service.execute(supabase_service.table(self.table_name).select("*").eq("id", category_id))
             
             if response.data:
                 item = response.data[0]
@@ -80,7 +135,9 @@ class CategoryService:
                 "color": category_data.color
             }
             
-            response = supabase_service.supabase.table(self.table_name).insert(data).execute()
+            response = await supabase_service.execute(supabase_service.table(self.table_name).insert(data))
+            data_version_service.bump(GLOBAL_SCOPE)
+            self.invalidate_catalogue()
             
             if response.data:
                 item = response.data[0]
@@ -117,7 +174,9 @@ class CategoryService:
             if not data:
                 return await self.get_category_by_id(category_id)
             
-            response = supabase_service.supabase.table(self.table_name).update(data).eq("id", category_id).execute()
+            response = await supabase_service.execute(supabase_service.table(self.table_name).update(data).eq("id", category_id))
+            data_version_service.bump(GLOBAL_SCOPE)
+            self.invalidate_catalogue()
             
             if response.data:
                 item = response.data[0]
@@ -140,7 +199,9 @@ class CategoryService:
     async def delete_category(self, category_id: str) -> bool:
         """Eliminar una categoría."""
         try:
-            response = supabase_service.supabase.table(self.table_name).delete().eq("id", category_id).execute()
+            response = await supabase_service.execute(supabase_service.table(self.table_name).delete().eq("id", category_id))
+            data_version_service.bump(GLOBAL_SCOPE)
+            self.invalidate_catalogue()
             return len(response.data) > 0 if response.data else False
             
         except Exception as e:
@@ -0,0 +1,74 @@
+from typing import Optional
+from app.config import settings
+from app.services.supabase_service import supabase_service
+from app.services.cache import TTLCache
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Alcance de los datos compartidos por todos los usuarios (catálogo de categorías)
+GLOBAL_SCOPE = "*"
+
+class DataVersionService:
+    """Versiones de datos por usuario para responder con ETag / 304.
+    
+    La versión vive en `versiones_datos` (migración 010): triggers de la base
+    de datos la suben en cada escritura, así todos los workers y la app
+    Streamlit ven el mismo valor y un ETag nunca sobrevive a un cambio.
+    Leerla es una consulta por clave primaria; cada proceso la guarda
+    `DATA_VERSION_CACHE_SECONDS` (por defecto 1 s), así las consultas
+    repetidas de un panel no llegan a la base de datos. Ese es también el
+    retraso máximo con que se ve una escritura de otro worker; las del propio
+    proceso descartan la versión guardada (`bump`).
+    """
+    
+    def __init__(self):
+        """Inicializar servicio de versiones."""
+        self.supabase = supabase_service
+        self.cache = TTLCache(max_size=settings.DATA_VERSION_CACHE_MAX_SIZE, ttl=settings.DATA_VERSION_CACHE_SECONDS)
+        self._warned = False
+    
+    async def get(self, scope: str) -> Optional[str]:
+        """Versión actual de un usuario (o del alcance global); None si no se puede leer."""
+        cached = self.cache.get(scope)
+        if cached is not None:
+            # False: la última lectura falló, tampoco se reintenta en cada petición
+            return cached or None
+        
+        version = await self._read(scope)
+        self.cache.set(scope, False if version is None else version)
+        return version
+    
+    def bump(self, scope: str) -> None:
+        """Tras una escritura del proceso: la próxima lectura trae la versión que dejó el trigger."""
+        self.cache.delete(scope)
+    
+    async def _read(self, scope: str) -> Optional[str]:
+        """Leer la versión de `versiones_datos`."""
+        try:
+            response = await self.supabase.execute(
+                self.supabase.table('versiones_datos').select('version, updated_at').eq('alcance', scope)
+            )
+        except Exception as e:
+            # Sin la migración 010 (o con Supabase caído) se responde sin ETag
+            if not self._warned:
+                logger.error(f"❌ No se pudo leer la versión de datos, respuestas sin ETag: {e}")
+                self._warned = True
+            return None
+        
+        if not response.data:
+            return "0"
+        row = response.data[0]
+        return f"{row['version']}.{row['updated_at']}"
+    
+    async def etag(self, scope: str, resource: str) -> Optional[str]:
+        """ETag fuerte para un recurso (ruta y query) en la versión actual; None sin versión."""
+        version = await self.get(scope)
+        if version is None:
+            return None
+        digest = hashlib.sha256(f"{scope}|{version}|{resource}".encode()).hexdigest()[:32]
+        return f'"{digest}"'
+
+# Instancia global del servicio
+data_version_service = DataVersionService() 
@@ -0,0 +1,289 @@
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterator, Tuple
+from datetime import date, datetime
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from app.config import settings
+from app.services.movement_service import movement_service
+from app.models.movement import MovementCreate, MovementType
+import csv
+import itertools
+import re
+import time
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nombres de columna aceptados en extractos CSV (sin tildes, en minúscula)
+CSV_COLUMNS = {
+    "date": ["fecha", "date", "fecha operacion", "fecha movimiento", "fecha valor", "transaction date", "posted date"],
+    "amount": ["monto", "amount", "importe", "valor", "value"],
+    "debit": ["debito", "cargo", "retiro", "debit", "withdrawal"],
+    "credit": ["credito", "abono", "deposito", "credit", "deposit"],
+    "description": ["descripcion", "description", "concepto", "detalle", "memo", "referencia", "name"],
+    "category": ["categoria", "category"],
+    "type": ["tipo", "type", "movement_type"]
+}
+
+INCOME_TYPES = {"ingreso", "income", "credit", "credito", "abono", "deposito"}
+EXPENSE_TYPES = {"gasto", "expense", "debit", "debito", "cargo", "retiro"}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y", "%d.%m.%Y", "%Y%m%d"]
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+# Importes válidos según el separador decimal: miles en grupos de tres
+AMOUNT_PATTERNS = {
+    ",": re.compile(r"-?(\d{1,3}(\.\d{3})+|\d*)(,\d+)?"),
+    ".": re.compile(r"-?(\d{1,3}(,\d{3})+|\d*)(\.\d+)?")
+}
+
+# Errores de filas que se devuelven por bloque (el resto solo se cuenta)
+MAX_REPORTED_ERRORS = 20
+
+def _normalize_header(text: str) -> str:
+    """Quitar tildes, espacios y mayúsculas de un nombre de columna."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(text.replace("_", " ").lower().split())
+
+def parse_amount(text: str, decimal: Optional[str] = None) -> float:
+    """Convertir un importe de extracto ("1.234,56", "-1,234.56", "(45.00)") a float.
+    
+    `decimal` es el separador decimal del extracto ("," o "."). Sin él se
+    deduce del importe, y un único separador seguido de tres dígitos ("1.234",
+    "1,234") es ambiguo: se rechaza en lugar de adivinar.
+    """
+    original = text
+    text = (text or "").strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = re.sub(r"[^\d,.\-]", "", text)
+    if not any(char.isdigit() for char in text):
+        raise ValueError("Monto vacío")
+    
+    if decimal is None:
+        decimal = _guess_decimal(text, original)
+    if decimal not in AMOUNT_PATTERNS:
+        raise ValueError(f"Separador decimal no soportado: {decimal!r}")
+    if not AMOUNT_PATTERNS[decimal].fullmatch(text):
+        raise ValueError(f"Monto no reconocido: {original!r}")
+    
+    thousands = "." if decimal == "," else ","
+    value = float(text.replace(thousands, "").replace(decimal, "."))
+    return -abs(value) if negative else value
+
+def _guess_decimal(text: str, original: str) -> str:
+    """Deducir el separador decimal de un importe (ValueError si es ambiguo)."""
+    comma, dot = text.rfind(","), text.rfind(".")
+    if comma >= 0 and dot >= 0:
+        # El último separador es el decimal
+        return "," if comma > dot else "."
+    if comma < 0 and dot < 0:
+        return "."
+    separator = "," if comma >= 0 else "."
+    if text.count(separator) > 1:
+        # Repetido solo puede ser separador de miles
+        return "." if separator == "," else ","
+    if len(text) - text.rfind(separator) - 1 == 3:
+        raise ValueError(f"Monto ambiguo: {original!r} (indique el separador decimal)")
+    return separator
+
+def parse_date(text: str) -> date:
+    """Convertir una fecha de extracto en los formatos habituales (o de OFX)."""
+    text = (text or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text if fmt != "%Y%m%d" else text[:8], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no reconocida: {text!r}")
+
+class ImportService:
+    """Servicio para importar extractos bancarios (CSV u OFX) por bloques."""
+    
+    def __init__(self):
+        """Inicializar servicio de importación."""
+        self.movements = movement_service
+    
+    def parse_csv(self, lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Leer filas de un CSV de forma incremental como (línea, campos normalizados)."""
+        lines = iter(lines)
+        header_line = next(lines, None)
+        if header_line is None:
+            return
+        
+        # Delimitador más frecuente en la cabecera (",", ";" o tabulador)
+        delimiter = max([",", ";", "\t"], key=header_line.count)
+        header = next(csv.reader([header_line], delimiter=delimiter))
+        
+        columns = {}
+        for position, name in enumerate(header):
+            normalized = _normalize_header(name)
+            for field, aliases in CSV_COLUMNS.items():
+                if normalized in aliases and field not in columns:
+                    columns[field] = position
+        
+        if "date" not in columns or not ({"amount", "debit", "credit"} & columns.keys()):
+            raise ValueError("El CSV debe tener columnas de fecha y monto (o débito/crédito)")
+        
+        reader = csv.reader(lines, delimiter=delimiter)
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            # +1 por la cabecera, leída aparte
+            yield reader.line_num + 1, {
+                field: row[position].strip() if position < len(row) else ""
+                for field, position in columns.items()
+            }
+    
+    def parse_ofx(self, lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Leer las transacciones (<STMTTRN>) de un OFX 1.x (SGML) o 2.x (XML)."""
+        transaction = None
+        start_line = 0
+        for line_number, line in enumerate(lines, start=1):
+            for closing, tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if closing and transaction is not None:
+                        yield start_line, {
+                            "date": transaction.get("DTPOSTED", ""),
+                            # OFX no usa separador de miles: el único separador es el decimal
+                            "amount": transaction.get("TRNAMT", "").replace(",", "."),
+                            "description": " - ".join(
+                                part for part in (transaction.get("NAME"), transaction.get("MEMO")) if part
+                            )
+                        }
+                        transaction = None
+                    elif not closing:
+                        transaction = {}
+                        start_line = line_number
+                elif transaction is not None and not closing and value.strip():
+                    transaction[tag] = value.strip()
+    
+    def normalize(self, record: Dict[str, str], default_category: str, decimal: Optional[str] = None) -> MovementCreate:
+        """Convertir una fila leída en un MovementCreate (ValueError si no es válida)."""
+        if record.get("amount"):
+            amount = parse_amount(record["amount"], decimal)
+        elif record.get("debit"):
+            amount = -abs(parse_amount(record["debit"], decimal))
+        elif record.get("credit"):
+            amount = abs(parse_amount(record["credit"], decimal))
+        else:
+            raise ValueError("Monto vacío")
+        
+        # El tipo explícito manda; si no hay, el signo del monto
+        declared = _normalize_header(record.get("type") or "")
+        if declared in INCOME_TYPES:
+            movement_type = MovementType.INGRESO
+        elif declared in EXPENSE_TYPES:
+            movement_type = MovementType.GASTO
+        else:
+            movement_type = MovementType.GASTO if amount < 0 else MovementType.INGRESO
+        
+        try:
+            return MovementCreate(
+                amount=abs(amount),
+                category=record.get("category") or default_category,
+                description=record.get("description") or None,
+                movement_type=movement_type,
+                movement_date=parse_date(record["date"])
+            )
+        except ValidationError as e:
+            raise ValueError("; ".join(error["msg"] for error in e.errors()))
+    
+    async def import_movements(
+        self,
+        user_id: str,
+        lines: Iterable[str],
+        file_format: str = "csv",
+        offset: int = 0,
+        chunk_size: Optional[int] = None,
+        default_category: str = "Importado",
+        dry_run: bool = False,
+        decimal: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Importar un extracto por bloques, informando el progreso de cada uno.
+        
+        `offset` es el número de registros ya procesados en una importación
+        anterior: se omiten y se continúa desde ahí. Cada evento trae el
+        `offset` desde el que se puede reanudar; el último lleva `done`.
+        Solo se mantiene en memoria el bloque actual, que se lee y valida en
+        un hilo para no bloquear el event loop. `decimal` es el separador
+        decimal de los importes del CSV (se deduce si no se indica).
+        """
+        chunk_size = chunk_size or settings.MOVEMENT_BATCH_CHUNK_SIZE
+        if file_format == "ofx":
+            records, decimal = self.parse_ofx(lines), "."
+        else:
+            records = self.parse_csv(lines)
+        
+        stats = {"offset": offset, "processed": 0, "created": 0, "failed": 0}
+        started = time.perf_counter()
+        chunk: List[Tuple[int, MovementCreate]] = []
+        errors: List[Dict[str, Any]] = []
+        
+        async def flush() -> Dict[str, Any]:
+            nonlocal chunk, errors
+            if chunk and not dry_run:
+                result = await self.movements.create_movements(user_id, [item for _, item in chunk])
+                if result["success"]:
+                    outcomes = result["data"]["results"]
+                else:
+                    outcomes = [{"success": False, "error": result["error"]}] * len(chunk)
+                for (line_number, _), outcome in zip(chunk, outcomes):
+                    if outcome["success"]:
+                        stats["created"] += 1
+                    else:
+                        stats["failed"] += 1
+                        if len(errors) < MAX_REPORTED_ERRORS:
+                            errors.append({"line": line_number, "error": outcome["error"]})
+            elif dry_run:
+                stats["created"] += len(chunk)
+            
+            elapsed = time.perf_counter() - started
+            event = dict(stats, rows_per_second=round(stats["processed"] / elapsed, 1) if elapsed else 0.0, errors=errors)
+            chunk, errors = [], []
+            return event
+        
+        await run_in_threadpool(self._skip, records, offset)
+        while True:
+            block = await run_in_threadpool(self._read_block, records, chunk_size, default_category, decimal)
+            for line_number, movement, error in block:
+                stats["processed"] += 1
+                stats["offset"] += 1
+                if error is None:
+                    chunk.append((line_number, movement))
+                else:
+                    stats["failed"] += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line_number, "error": error})
+            
+            if len(block) < chunk_size:
+                break
+            yield await flush()
+        
+        event = await flush()
+        event["done"] = True
+        logger.info(
+            f"✅ Importación para usuario {user_id}: {stats['created']} creados, "
+            f"{stats['failed']} con error ({event['rows_per_second']} filas/s)"
+        )
+        yield event
+
+    @staticmethod
+    def _skip(records: Iterator[Tuple[int, Dict[str, str]]], count: int) -> None:
+        """Descartar los registros ya importados (se ejecuta en un hilo)."""
+        for _ in itertools.islice(records, count):
+            pass
+    
+    def _read_block(self, records: Iterator[Tuple[int, Dict[str, str]]], size: int, default_category: str, decimal: Optional[str]) -> List[Tuple[int, Optional[MovementCreate], Optional[str]]]:
+        """Leer y validar hasta `size` registros como (línea, movimiento, error) (se ejecuta en un hilo)."""
+        block = []
+        for line_number, record in itertools.islice(records, size):
+            try:
+                block.append((line_number, self.normalize(record, default_category, decimal), None))
+            except ValueError as e:
+                block.append((line_number, None, str(e)))
+        return block
+
+# Instancia global del servicio
+import_service = ImportService() 
\ No newline at end of file
@@ -0,0 +1,1196 @@
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from gotrue.errors import AuthApiError
+from jose import jwt
+from postgrest.exceptions import APIError
+from app.config import settings
+from app.services.supabase_service import SupabaseService
+import bisect
+import calendar
+import hashlib
+import itertools
+import json
+import logging
+import operator
+import os
+import re
+import secrets
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Esquema mínimo de cada tabla: clave primaria, columnas (las que falten en una
+# fila nueva quedan en NULL, como con `default_to_null` de PostgREST), claves
+# únicas (índices únicos de las migraciones) y valores por defecto. Las tablas
+# no listadas usan `id` y solo las columnas que traiga cada fila.
+TABLES: Dict[str, Dict[str, Any]] = {
+    "usuarios": {"columns": ["email", "name"], "unique": [("email",)]},
+    "categorias": {"columns": ["usuario_id", "nombre", "tipo"], "unique": [("usuario_id", "nombre", "tipo")]},
+    "categories": {"columns": ["name", "type", "icon", "color"]},
+    "movimientos": {
+        "columns": ["usuario_id", "fecha", "categoria_id", "monto", "tipo", "descripcion", "frecuencia", "fecha_fin", "ultima_materializacion", "ocurrencia_clave"],
+        "unique": [("ocurrencia_clave",)],
+        "defaults": {"es_recurrente": False}
+    },
+    "presupuestos": {"columns": ["usuario_id", "categoria_id", "monto_maximo", "periodo", "fecha_inicio", "fecha_fin"]},
+    "presupuesto_items": {
+        "columns": ["usuario_id", "nombre", "monto", "tipo", "categoria_id", "frecuencia", "fecha_inicio", "fecha_fin"],
+        "defaults": {"activo": True, "ocurrencias_hasta": "-infinity"}
+    },
+    "presupuesto_item_ocurrencias": {"key": ("item_id", "fecha"), "timestamps": False},
+    "ocurrencias_recurrentes": {
+        "key": ("clave",),
+        "columns": ["plantilla_id", "usuario_id", "fecha", "categoria_id", "monto", "tipo", "descripcion", "resuelta_at"],
+        "defaults": {"estado": "pendiente"}
+    },
+    "resumen_mensual": {"key": ("usuario_id", "mes", "tipo", "categoria_id"), "timestamps": False},
+    "tareas_programadas": {"key": ("nombre",), "timestamps": False},
+    "versiones_datos": {"key": ("alcance",), "timestamps": False}
+}
+
+# Tablas con el trigger de versiones_datos (migración 010); `categories` sube el alcance global
+VERSIONED_TABLES = {"movimientos", "categorias", "presupuestos", "presupuesto_items", "presupuesto_item_ocurrencias", "ocurrencias_recurrentes", "categories"}
+
+# ON DELETE CASCADE: tabla hija y columna que referencia al padre
+CASCADES: Dict[str, List[Tuple[str, str]]] = {
+    "movimientos": [("ocurrencias_recurrentes", "plantilla_id")],
+    "presupuesto_items": [("presupuesto_item_ocurrencias", "item_id")]
+}
+
+_MISSING = object()
+
+# Rango de valores de una columna: (mínimo, incluido, máximo, incluido); None = sin límite
+Bounds = Tuple[Any, bool, Any, bool]
+
+# Listas ordenadas en caché por tabla (usuario, columnas, dirección)
+SORTED_CACHE_SIZE = 256
+
+# Líneas de un `.jsonl` de fixture que se cargan a la vez
+FIXTURE_CHUNK_SIZE = 50_000
+
+def _now() -> str:
+    """Marca de tiempo actual como la devuelve PostgREST."""
+    return datetime.now(timezone.utc).isoformat()
+
+def _month(value: str) -> str:
+    """Primer día del mes de una fecha ISO (date_trunc('month', ...))."""
+    return value[:7] + "-01"
+
+def _add_months(start: date, months: int) -> date:
+    """Sumar meses como Postgres: el último día del mes si ese mes es más corto."""
+    month = start.month - 1 + months
+    year, month = start.year + month // 12, month % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+def _error(message: str, code: str) -> APIError:
+    """Error con el formato de PostgREST."""
+    return APIError({"message": message, "code": code, "hint": None, "details": None})
+
+def _coerce(current: Any, value: Any) -> Any:
+    """Convertir el valor de un filtro al tipo de la columna (los filtros viajan como texto)."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    if isinstance(current, bool):
+        return value if isinstance(value, bool) else str(value).lower() == "true"
+    if isinstance(current, (int, float)):
+        return float(value)
+    if isinstance(value, bool):
+        return str(value).lower()
+    return value if isinstance(value, str) else str(value)
+
+def _like(pattern: str, case_sensitive: bool) -> Callable[[str], bool]:
+    """Traducir un patrón LIKE (% y _, o * en PostgREST) a una expresión regular."""
+    regex = "".join(".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in pattern)
+    compiled = re.compile(f"^{regex}$", 0 if case_sensitive else re.IGNORECASE)
+    return lambda text: compiled.match(text) is not None
+
+def _condition(column: str, op: str, value: Any) -> Callable[[Dict[str, Any]], bool]:
+    """Predicado de un filtro `columna.operador.valor` sobre una fila."""
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}.get(str(value).lower(), value)
+        return lambda row: row.get(column) is expected if expected is None else row.get(column) == expected
+    
+    if op == "in":
+        values = list(value)
+        # Valores convertidos una vez por tipo de columna
+        coerced: Dict[type, set] = {}
+        def in_filter(row):
+            current = row.get(column)
+            if current is None:
+                return False
+            allowed = coerced.get(type(current))
+            if allowed is None:
+                allowed = coerced[type(current)] = {_coerce(current, v) for v in values}
+            return current in allowed
+        return in_filter
+    
+    if op in ("like", "ilike"):
+        match = _like(str(value), op == "like")
+        return lambda row: row.get(column) is not None and match(str(row.get(column)))
+    
+    compare = {
+        "eq": operator.eq,
+        "neq": operator.ne,
+        "gt": operator.gt,
+        "gte": operator.ge,
+        "lt": operator.lt,
+        "lte": operator.le
+    }.get(op)
+    if compare is None:
+        raise _error(f"Operador no soportado por el backend en memoria: {op}", "PGRST100")
+    
+    coerced: Dict[type, Any] = {}
+    def comparison(row):
+        current = row.get(column)
+        # NULL no cumple ninguna comparación (como en SQL)
+        if current is None:
+            return False
+        target = coerced.get(type(current), _MISSING)
+        if target is _MISSING:
+            target = coerced[type(current)] = _coerce(current, value)
+        return compare(current, target)
+    
+    def bounds(target_column: str, convert: Callable[[Any], Any]) -> Optional[Bounds]:
+        if target_column != column or op == "neq":
+            return None
+        bound = convert(value)
+        return {
+            "eq": (bound, True, bound, True),
+            "gt": (bound, False, None, False),
+            "gte": (bound, True, None, False),
+            "lt": (None, False, bound, False),
+            "lte": (None, False, bound, True)
+        }[op]
+    
+    comparison.bounds = bounds
+    return comparison
+
+def _hull(bounds: List[Bounds]) -> Bounds:
+    """Rango que cubre todos los rangos (OR)."""
+    low = None if any(b[0] is None for b in bounds) else min(b[0] for b in bounds)
+    high = None if any(b[2] is None for b in bounds) else max(b[2] for b in bounds)
+    return (
+        low, low is not None and any(b[1] for b in bounds if b[0] == low),
+        high, high is not None and any(b[3] for b in bounds if b[2] == high)
+    )
+
+def _intersection(bounds: List[Bounds]) -> Bounds:
+    """Rango común a todos los rangos (AND)."""
+    lows = [b for b in bounds if b[0] is not None]
+    highs = [b for b in bounds if b[2] is not None]
+    low = max(b[0] for b in lows) if lows else None
+    high = min(b[2] for b in highs) if highs else None
+    return (
+        low, low is not None and all(b[1] for b in lows if b[0] == low),
+        high, high is not None and all(b[3] for b in highs if b[2] == high)
+    )
+
+def _predicate_bounds(predicate: Callable, column: str, convert: Callable[[Any], Any]) -> Optional[Bounds]:
+    """Rango de `column` que implica un predicado (None si no lo acota)."""
+    bounds = getattr(predicate, "bounds", None)
+    return bounds(column, convert) if bounds is not None else None
+
+def _split(text: str) -> List[str]:
+    """Separar por comas de primer nivel (respeta paréntesis y comillas dobles)."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current).strip())
+    return parts
+
+def _unquote(value: str) -> str:
+    """Quitar las comillas dobles de un valor de filtro."""
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+def _parse_logic(text: str) -> Callable[[Dict[str, Any]], bool]:
+    """Predicado de una condición de `or_()`: `col.op.valor`, `and(...)`, `or(...)` o `not.`."""
+    negate = text.startswith("not.")
+    if negate:
+        text = text[4:]
+    
+    if text.startswith(("and(", "or(")):
+        combine = all if text.startswith("and(") else any
+        children = [_parse_logic(part) for part in _split(text[text.index("(") + 1:-1])]
+        predicate = lambda row: combine(child(row) for child in children)
+        
+        def bounds(column: str, convert: Callable[[Any], Any]) -> Optional[Bounds]:
+            found = [_predicate_bounds(child, column, convert) for child in children]
+            if combine is any:
+                # Una rama sin rango deja la columna sin acotar
+                return None if None in found else _hull(found)
+            found = [bound for bound in found if bound is not None]
+            return _intersection(found) if found else None
+        
+        if not negate:
+            predicate.bounds = bounds
+            if combine is any:
+                # Ramas sueltas: cada una puede acotar su propio tramo del índice
+                predicate.branches = children
+    else:
+        column, op, value = text.split(".", 2)
+        if op == "not":
+            negate = not negate
+            op, value = value.split(".", 1)
+        if op == "in":
+            value = [_unquote(v) for v in _split(value[1:-1])]
+        else:
+            value = _unquote(value)
+        predicate = _condition(column, op, value)
+    
+    return (lambda row: not predicate(row)) if negate else predicate
+
+def _parse_columns(columns: str) -> Tuple[Optional[List[str]], Dict[str, Tuple[str, Optional[List[str]]]]]:
+    """Columnas de `select()`: propias (None = todas) y tablas embebidas {alias: (tabla, columnas)}."""
+    own: Optional[List[str]] = []
+    embedded = {}
+    for item in _split(columns or "*"):
+        if "(" in item:
+            name, inner = item[:item.index("(")], item[item.index("(") + 1:-1]
+            alias, _, name = name.rpartition(":")
+            name = name.split("!")[0]
+            embedded[alias or name] = (name, _parse_columns(inner)[0])
+        elif item == "*":
+            own = None
+        elif own is not None:
+            own.append(item)
+    return own, embedded
+
+class MemoryResponse:
+    """Respuesta con la forma de la de postgrest-py (`data` y `count`)."""
+    
+    def __init__(self, data: Any, count: Optional[int] = None):
+        """Inicializar respuesta."""
+        self.data = data
+        self.count = count
+
+class MemoryTable:
+    """Filas de una tabla indexadas por clave primaria, usuario y claves únicas."""
+    
+    def __init__(self, name: str):
+        """Inicializar tabla vacía con el esquema de TABLES."""
+        schema = TABLES.get(name, {})
+        self.name = name
+        self.key: Tuple[str, ...] = schema.get("key", ("id",))
+        self.unique: List[Tuple[str, ...]] = schema.get("unique", [])
+        self.defaults: Dict[str, Any] = dict({column: None for column in schema.get("columns", [])}, **schema.get("defaults", {}))
+        self.timestamps: bool = schema.get("timestamps", True)
+        self.rows: Dict[tuple, Dict[str, Any]] = {}
+        # usuario_id -> {clave: fila}: las consultas de la API siempre filtran por usuario
+        self.by_user: Dict[Any, Dict[tuple, Dict[str, Any]]] = {}
+        self.unique_index: Dict[Tuple[str, ...], Dict[tuple, tuple]] = {columns: {} for columns in self.unique}
+        # Escrituras por usuario (y en total): invalidan las filas ordenadas en caché
+        self.version = 0
+        self.user_versions: Dict[Any, int] = {}
+        self.sorted_cache: Dict[tuple, Tuple[int, List[Dict[str, Any]]]] = {}
+        # (consulta, offset) -> (lista ordenada, última posición entregada): la
+        # página siguiente de un recorrido con range() sigue donde quedó la anterior
+        self.resume_points: Dict[tuple, Tuple[List[Dict[str, Any]], int]] = {}
+    
+    def primary_key(self, row: Dict[str, Any]) -> tuple:
+        """Clave primaria de una fila."""
+        return tuple(row.get(column) for column in self.key)
+    
+    def prepare(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Completar los valores por defecto de una fila nueva."""
+        row = dict(row)
+        if self.key == ("id",) and row.get("id") is None:
+            row["id"] = str(uuid.uuid4())
+        if self.timestamps:
+            now = _now()
+            row.setdefault("created_at", now)
+            row.setdefault("updated_at", now)
+        for column, value in self.defaults.items():
+            row.setdefault(column, value)
+        return row
+    
+    def find(self, columns: Tuple[str, ...], row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fila existente con los mismos valores en una clave (primaria o única)."""
+        values = tuple(row.get(column) for column in columns)
+        if columns == self.key:
+            return self.rows.get(values)
+        index = self.unique_index.get(columns)
+        if index is None:
+            raise _error(f"No hay una restricción única sobre ({', '.join(columns)}) en {self.name}", "42P10")
+        # NULL nunca choca en un índice único
+        pk = index.get(values) if None not in values else None
+        return self.rows.get(pk) if pk is not None else None
+    
+    def check_unique(self, row: Dict[str, Any], pk: tuple, previous: Optional[tuple] = None) -> None:
+        """Rechazar la fila si repite la clave primaria o una clave única de otra fila."""
+        if pk != previous and pk in self.rows:
+            raise _error(f'duplicate key value violates unique constraint "{self.name}_pkey"', "23505")
+        for columns in self.unique:
+            values = tuple(row.get(column) for column in columns)
+            owner = self.unique_index[columns].get(values)
+            if None not in values and owner is not None and owner != previous:
+                raise _error(f'duplicate key value violates unique constraint "{self.name}_{"_".join(columns)}_key"', "23505")
+    
+    def touch(self, user_id: Any) -> None:
+        """Registrar una escritura (también las que modifican una fila en su lugar)."""
+        self.version += 1
+        self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        """Guardar una fila ya validada."""
+        self.touch(row.get("usuario_id"))
+        pk = self.primary_key(row)
+        self.rows[pk] = row
+        self.by_user.setdefault(row.get("usuario_id"), {})[pk] = row
+        for columns in self.unique:
+            values = tuple(row.get(column) for column in columns)
+            if None not in values:
+                self.unique_index[columns][values] = pk
+    
+    def remove(self, row: Dict[str, Any]) -> None:
+        """Quitar una fila y sus entradas de los índices."""
+        self.touch(row.get("usuario_id"))
+        pk = self.primary_key(row)
+        self.rows.pop(pk, None)
+        user_rows = self.by_user.get(row.get("usuario_id"))
+        if user_rows is not None:
+            user_rows.pop(pk, None)
+            if not user_rows:
+                del self.by_user[row.get("usuario_id")]
+        for columns in self.unique:
+            values = tuple(row.get(column) for column in columns)
+            if self.unique_index[columns].get(values) == pk:
+                del self.unique_index[columns][values]
+    
+    def candidates(self, equals: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        """Filas a evaluar: por clave primaria o por usuario si la consulta los fija."""
+        if all(column in equals for column in self.key):
+            pk = tuple(_coerce(None, equals[column]) for column in self.key)
+            row = self.rows.get(pk)
+            return [row] if row is not None else []
+        if "usuario_id" in equals:
+            return list(self.by_user.get(_coerce(None, equals["usuario_id"]), {}).values())
+        return list(self.rows.values())
+    
+    def ordered(self, equals: Dict[str, Any], columns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Filas del usuario (o todas) en orden ascendente por `columns`, en caché hasta la próxima escritura.
+        
+        La clave (es NULL, valor) deja los NULL al final, como Postgres en
+        ascendente (y al principio al recorrerla al revés).
+        """
+        user_id = _coerce(None, equals["usuario_id"]) if "usuario_id" in equals else _MISSING
+        version = self.version if user_id is _MISSING else self.user_versions.get(user_id, 0)
+        cache_key = (user_id, columns)
+        cached = self.sorted_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        rows = self.rows.values() if user_id is _MISSING else self.by_user.get(user_id, {}).values()
+        ordered = sorted(rows, key=lambda row: tuple((row.get(column) is None, row.get(column)) for column in columns))
+        if len(self.sorted_cache) >= SORTED_CACHE_SIZE:
+            self.sorted_cache.clear()
+        self.sorted_cache[cache_key] = (version, ordered)
+        return ordered
+
+class MemoryQuery:
+    """Consulta sobre una tabla en memoria con la API de postgrest-py.
+    
+    Cubre lo que usan los servicios: select (con tablas embebidas como
+    `categorias(nombre)`), insert, upsert, update, delete, los filtros
+    eq/neq/gt/gte/lt/lte/in_/is_/like/ilike/or_, order, limit y range.
+    Como en postgrest-py, cada método modifica la consulta y la devuelve.
+    """
+    
+    def __init__(self, database: "MemoryDatabase", table: str):
+        """Inicializar consulta (un select de todas las columnas por defecto)."""
+        self.database = database
+        self.table_name = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        self.count_rows = False
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        # Filtros tal como se escribieron: identifican la consulta entre páginas
+        self.signature: List[tuple] = []
+        self.equals: Dict[str, Any] = {}
+        self.orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self.offset = 0
+        self.row_limit: Optional[int] = None
+    
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None) -> "MemoryQuery":
+        """Leer filas (o, tras insert/update/delete, elegir las columnas devueltas)."""
+        self.columns = ",".join(columns) or "*"
+        self.count_rows = count is not None
+        return self
+    
+    def insert(self, json: Any, **kwargs) -> "MemoryQuery":
+        """Insertar una fila o una lista de filas (todas o ninguna)."""
+        self.action, self.payload = "insert", json
+        return self
+    
+    def upsert(self, json: Any, *, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs) -> "MemoryQuery":
+        """Insertar o, si la clave ya existe, actualizar (o ignorar con `ignore_duplicates`)."""
+        self.action, self.payload = "upsert", json
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+    
+    def update(self, json: Dict[str, Any], **kwargs) -> "MemoryQuery":
+        """Actualizar las filas que cumplan los filtros."""
+        self.action, self.payload = "update", json
+        return self
+    
+    def delete(self, **kwargs) -> "MemoryQuery":
+        """Eliminar las filas que cumplan los filtros."""
+        self.action = "delete"
+        return self
+    
+    def filter(self, column: str, operator: str, criteria: Any) -> "MemoryQuery":
+        """Filtro genérico `columna operador valor`."""
+        if operator == "eq":
+            self.equals[column] = criteria
+        self.filters.append(_condition(column, operator, criteria))
+        self.signature.append((column, operator, repr(criteria)))
+        return self
+    
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "eq", value)
+    
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "neq", value)
+    
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "gt", value)
+    
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "gte", value)
+    
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "lt", value)
+    
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "lte", value)
+    
+    def like(self, column: str, pattern: str) -> "MemoryQuery":
+        return self.filter(column, "like", pattern)
+    
+    def ilike(self, column: str, pattern: str) -> "MemoryQuery":
+        return self.filter(column, "ilike", pattern)
+    
+    def is_(self, column: str, value: Any) -> "MemoryQuery":
+        return self.filter(column, "is", "null" if value is None else value)
+    
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQuery":
+        return self.filter(column, "in", list(values))
+    
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "MemoryQuery":
+        """Condiciones unidas por OR con la sintaxis de PostgREST (admite `and(...)` anidado)."""
+        self.filters.append(_parse_logic(f"or({filters})"))
+        self.signature.append(("or", filters))
+        return self
+    
+    def where(self, column: str, expression: str) -> "MemoryQuery":
+        """Filtro escrito como en la URL de PostgREST: `columna=op.valor` u `or=(...)`."""
+        if column in ("or", "and"):
+            self.filters.append(_parse_logic(f"{column}{expression}"))
+            self.signature.append((column, expression))
+            return self
+        op, _, value = expression.partition(".")
+        if op == "eq":
+            # Por filter() para que eq use los índices de la tabla
+            return self.filter(_unquote(column), op, _unquote(value))
+        self.filters.append(_parse_logic(f"{_unquote(column)}.{expression}"))
+        self.signature.append((_unquote(column), expression))
+        return self
+    
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, foreign_table: Optional[str] = None) -> "MemoryQuery":
+        """Ordenar por una columna (los NULL van al final en ascendente, como en Postgres)."""
+        self.orders.append((column, desc, nullsfirst))
+        return self
+    
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "MemoryQuery":
+        self.row_limit = size
+        return self
+    
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "MemoryQuery":
+        """Filas de la posición `start` a `end` inclusive."""
+        self.offset, self.row_limit = start, end - start + 1
+        return self
+    
+    def execute(self) -> MemoryResponse:
+        """Ejecutar la consulta contra la base de datos en memoria."""
+        with self.database.lock:
+            return getattr(self, f"_{self.action}")()
+    
+    def _matches(self) -> List[Dict[str, Any]]:
+        """Filas de la tabla que cumplen todos los filtros."""
+        table = self.database.table(self.table_name)
+        return [row for row in table.candidates(self.equals) if all(check(row) for check in self.filters)]
+    
+    def _select(self) -> MemoryResponse:
+        table = self.database.table(self.table_name)
+        # Como PostgREST en Supabase: como mucho `max-rows` filas por respuesta
+        limit = min(self.row_limit, settings.SUPABASE_MEMORY_MAX_ROWS) if self.row_limit is not None else settings.SUPABASE_MEMORY_MAX_ROWS
+        needed = self.offset + limit
+        directions = {desc for _, desc, _ in self.orders}
+        by_key = all(column in self.equals for column in table.key)
+        
+        if len(directions) == 1 and not by_key and all(nullsfirst is None for _, _, nullsfirst in self.orders):
+            # Recorrer las filas ya ordenadas, solo dentro del rango que permiten
+            # los filtros sobre la primera columna, y parar al completar la página
+            columns = tuple(column for column, _, _ in self.orders)
+            ordered = table.ordered(self.equals, columns)
+            desc = directions.pop()
+            # Sin conteo, la página siguiente de un recorrido con range() empieza
+            # donde terminó la anterior (como un índice que salta el offset)
+            resume_key = (tuple(self.signature), columns, desc)
+            resume = table.resume_points.get(resume_key + (self.offset,)) if self.offset and not self.count_rows else None
+            if resume is not None and resume[0] is ordered:
+                skipped, last = self.offset, resume[1]
+            else:
+                skipped, last = 0, None
+            rows, count = [], skipped
+            for position in self._walk(self._spans(ordered, columns), desc, last):
+                row = ordered[position]
+                if all(check(row) for check in self.filters):
+                    count += 1
+                    if len(rows) < needed - skipped:
+                        rows.append(row)
+                        last = position
+                    elif not self.count_rows:
+                        break
+            if not self.count_rows and last is not None and count >= needed:
+                if len(table.resume_points) >= SORTED_CACHE_SIZE:
+                    table.resume_points.clear()
+                table.resume_points[resume_key + (needed,)] = (ordered, last)
+            rows = rows[self.offset - skipped:needed - skipped]
+        else:
+            rows = self._matches()
+            count = len(rows)
+            # Direcciones mezcladas: ordenaciones estables de la última columna a la primera
+            for column, desc, nullsfirst in reversed(self.orders):
+                nulls_first = desc if nullsfirst is None else nullsfirst
+                non_null = [row for row in rows if row.get(column) is not None]
+                nulls = [row for row in rows if row.get(column) is None]
+                non_null.sort(key=lambda row: row[column], reverse=desc)
+                rows = nulls + non_null if nulls_first else non_null + nulls
+            rows = rows[self.offset:needed]
+        
+        return MemoryResponse(self._project(rows), count if self.count_rows else None)
+    
+    def _range(self, ordered: List[Dict[str, Any]], column: str) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de `ordered` que pueden cumplir los filtros sobre `column`."""
+        sample = ordered[0].get(column) if ordered else None
+        if sample is None:
+            return 0, len(ordered)
+        try:
+            found = [_predicate_bounds(check, column, lambda value: _coerce(sample, value)) for check in self.filters]
+            found = [bound for bound in found if bound is not None]
+            if not found:
+                return 0, len(ordered)
+            return self._bisect(ordered, (column,), (), _intersection(found))
+        except (TypeError, ValueError):
+            # Valores que no se pueden comparar con la columna: recorrer todo
+            return 0, len(ordered)
+    
+    @staticmethod
+    def _bisect(ordered: List[Dict[str, Any]], columns: Tuple[str, ...], prefix: tuple, bounds: Bounds) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de las filas que empiezan con `prefix` y cuya columna siguiente cae en `bounds`."""
+        key = lambda row: tuple((row.get(column) is None, row.get(column)) for column in columns)
+        low, low_included, high, high_included = bounds
+        if low is None:
+            start = bisect.bisect_left(ordered, prefix, key=key)
+        else:
+            start = (bisect.bisect_left if low_included else bisect.bisect_right)(ordered, prefix + ((False, low),), key=key)
+        if high is None:
+            end = bisect.bisect_right(ordered, prefix + ((True, None),), key=key)
+        else:
+            end = (bisect.bisect_right if high_included else bisect.bisect_left)(ordered, prefix + ((False, high),), key=key)
+        return start, max(start, end)
+    
+    @staticmethod
+    def _walk(spans: List[Tuple[int, int]], desc: bool, after: Optional[int] = None) -> Iterable[int]:
+        """Posiciones de los tramos en el orden pedido, a partir de la siguiente a `after`."""
+        if desc:
+            for start, end in reversed(spans):
+                yield from range(min(end, after) - 1 if after is not None else end - 1, start - 1, -1)
+        else:
+            for start, end in spans:
+                yield from range(max(start, after + 1) if after is not None else start, end)
+    
+    def _spans(self, ordered: List[Dict[str, Any]], columns: Tuple[str, ...]) -> List[Tuple[int, int]]:
+        """Tramos [inicio, fin) de `ordered` que pueden cumplir los filtros, en orden.
+        
+        Cada rama de un `or_()` que acota la primera columna da su propio
+        tramo, como un índice compuesto en Postgres: con `eq` en la primera
+        columna también se acota la segunda (p. ej.
+        `and(categoria_id.eq.X,fecha.gte.A,fecha.lte.B)` o el cursor
+        `fecha.lt.X,and(fecha.eq.X,id.lt.Y)`). Si no, un único tramo.
+        """
+        start, end = self._range(ordered, columns[0])
+        if len(columns) < 2 or start >= end:
+            return [(start, end)]
+        for check in self.filters:
+            branches = getattr(check, "branches", None)
+            if branches is None:
+                continue
+            found = [self._branch_span(ordered, columns[:2], branch) for branch in branches]
+            if None in found:
+                continue
+            spans: List[Tuple[int, int]] = []
+            for low, high in sorted(found):
+                low, high = max(low, start), min(high, end)
+                if low >= high:
+                    continue
+                if spans and low <= spans[-1][1]:
+                    spans[-1] = (spans[-1][0], max(spans[-1][1], high))
+                else:
+                    spans.append((low, high))
+            return spans
+        return [(start, end)]
+    
+    @classmethod
+    def _branch_span(cls, ordered: List[Dict[str, Any]], columns: Tuple[str, ...], branch: Callable) -> Optional[Tuple[int, int]]:
+        """Tramo de una rama que acota la primera columna (None si no la acota)."""
+        first, second = columns
+        samples = ordered[0].get(first), ordered[0].get(second)
+        if None in samples:
+            return None
+        try:
+            fixed = _predicate_bounds(branch, first, lambda value: _coerce(samples[0], value))
+            if fixed is None:
+                return None
+            if fixed[0] is None or fixed[0] != fixed[2] or not (fixed[1] and fixed[3]):
+                # Solo un rango de la primera columna
+                return cls._bisect(ordered, (first,), (), fixed)
+            inner = _predicate_bounds(branch, second, lambda value: _coerce(samples[1], value))
+            return cls._bisect(ordered, columns, ((False, fixed[0]),), inner or (None, False, None, False))
+        except (TypeError, ValueError):
+            return None
+    
+    def _insert(self) -> MemoryResponse:
+        table = self.database.table(self.table_name)
+        rows = [table.prepare(row) for row in (self.payload if isinstance(self.payload, list) else [self.payload])]
+        # Validar el lote completo antes de guardar: un error no deja filas a medias
+        staged: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            pk = table.primary_key(row)
+            table.check_unique(row, pk)
+            if pk in staged:
+                raise _error(f'duplicate key value violates unique constraint "{self.table_name}_pkey"', "23505")
+            staged[pk] = row
+        for columns in table.unique:
+            values = [tuple(row.get(column) for column in columns) for row in rows]
+            values = [value for value in values if None not in value]
+            if len(values) != len(set(values)):
+                raise _error(f'duplicate key value violates unique constraint "{self.table_name}_{"_".join(columns)}_key"', "23505")
+        
+        for row in rows:
+            self.database.add_row(self.table_name, row)
+        return MemoryResponse(self._project(rows))
+    
+    def _upsert(self) -> MemoryResponse:
+        table = self.database.table(self.table_name)
+        conflict = tuple(column.strip() for column in self.on_conflict.split(",")) if self.on_conflict else table.key
+        written = []
+        for row in (self.payload if isinstance(self.payload, list) else [self.payload]):
+            existing = table.find(conflict, row)
+            if existing is None:
+                row = table.prepare(row)
+                table.check_unique(row, table.primary_key(row))
+                self.database.add_row(self.table_name, row)
+                written.append(row)
+            elif not self.ignore_duplicates:
+                written.append(self.database.update_row(self.table_name, existing, row))
+        return MemoryResponse(self._project(written))
+    
+    def _update(self) -> MemoryResponse:
+        rows = [self.database.update_row(self.table_name, row, self.payload) for row in self._matches()]
+        return MemoryResponse(self._project(rows))
+    
+    def _delete(self) -> MemoryResponse:
+        rows = self._matches()
+        for row in rows:
+            self.database.remove_row(self.table_name, row)
+        return MemoryResponse(self._project(rows))
+    
+    def _project(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copiar las filas con las columnas pedidas y las tablas embebidas."""
+        own, embedded = _parse_columns(self.columns)
+        result = []
+        for row in rows:
+            item = dict(row) if own is None else {column: row.get(column) for column in own}
+            for alias, (name, columns) in embedded.items():
+                # Relación por convención: categorias(...) sigue a categoria_id
+                foreign = row.get(f"{name[:-1] if name.endswith('s') else name}_id")
+                parent = self.database.table(name).rows.get((foreign,)) if foreign is not None else None
+                item[alias] = None if parent is None else (dict(parent) if columns is None else {column: parent.get(column) for column in columns})
+            result.append(item)
+        return result
+
+class MemoryRpc:
+    """Llamada a una función de Postgres reimplementada en memoria."""
+    
+    def __init__(self, database: "MemoryDatabase", name: str, params: Dict[str, Any]):
+        """Inicializar llamada."""
+        self.database = database
+        self.name = name
+        self.params = params
+    
+    def execute(self) -> MemoryResponse:
+        """Ejecutar la función."""
+        function = getattr(self.database, f"rpc_{self.name}", None)
+        if function is None:
+            raise _error(f"Could not find the function public.{self.name}", "PGRST202")
+        with self.database.lock:
+            return MemoryResponse(function(**self.params))
+
+class MemoryAuth:
+    """Subconjunto de Supabase Auth: registro, inicio de sesión y administración."""
+    
+    def __init__(self):
+        """Inicializar usuarios de autenticación vacíos."""
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.admin = SimpleNamespace(create_user=self.create_user, delete_user=self.delete_user, update_user_by_id=self.update_user_by_id)
+    
+    def sign_up(self, credentials: Dict[str, Any]) -> SimpleNamespace:
+        """Crear un usuario (sin confirmación de correo) y devolver su sesión."""
+        email = credentials["email"].lower()
+        if email in self.users:
+            raise AuthApiError("User already registered", 422, "user_already_exists")
+        self.add_user(email, credentials["password"], (credentials.get("options") or {}).get("data") or {})
+        return self._session(self.users[email])
+    
+    def sign_in_with_password(self, credentials: Dict[str, Any]) -> SimpleNamespace:
+        """Iniciar sesión con correo y contraseña."""
+        user = self.users.get(credentials["email"].lower())
+        if user is None or user["password"] != self._hash(credentials["password"], user["salt"]):
+            raise AuthApiError("Invalid login credentials", 400, "invalid_credentials")
+        return self._session(user)
+    
+    def add_user(self, email: str, password: str, metadata: Optional[Dict[str, Any]] = None, user_id: Optional[str] = None) -> str:
+        """Registrar un usuario de autenticación (también desde fixtures)."""
+        salt = secrets.token_hex(8)
+        user_id = user_id or str(uuid.uuid4())
+        self.users[email.lower()] = {
+            "id": user_id,
+            "email": email.lower(),
+            "salt": salt,
+            "password": self._hash(password, salt),
+            "user_metadata": dict(metadata or {})
+        }
+        return user_id
+    
+    def create_user(self, attributes: Dict[str, Any]) -> SimpleNamespace:
+        """Crear un usuario ya confirmado (API de administración)."""
+        email = attributes["email"].lower()
+        if email in self.users:
+            raise AuthApiError("A user with this email address has already been registered", 422, "email_exists")
+        self.add_user(email, attributes["password"], attributes.get("user_metadata"), attributes.get("id"))
+        user = self.users[email]
+        return SimpleNamespace(user=SimpleNamespace(id=user["id"], email=email, user_metadata=dict(user["user_metadata"])))
+    
+    def delete_user(self, user_id: str) -> None:
+        """Eliminar un usuario de autenticación."""
+        self.users = {email: user for email, user in self.users.items() if user["id"] != user_id}
+    
+    def update_user_by_id(self, user_id: str, attributes: Dict[str, Any]) -> None:
+        """Actualizar el user_metadata de un usuario."""
+        for user in self.users.values():
+            if user["id"] == user_id:
+                user["user_metadata"].update(attributes.get("user_metadata") or {})
+    
+    @staticmethod
+    def _hash(password: str, salt: str) -> str:
+        """Hash rápido de la contraseña (solo para pruebas locales)."""
+        return hashlib.sha256(f"{salt}:{password}".encode()).hexdigest()
+    
+    def _session(self, user: Dict[str, Any]) -> SimpleNamespace:
+        """Usuario y sesión con un JWT como el de Supabase (firmado con SUPABASE_JWT_SECRET si existe)."""
+        auth_user = SimpleNamespace(id=user["id"], email=user["email"], user_metadata=dict(user["user_metadata"]))
+        token = jwt.encode({
+            "sub": user["id"],
+            "email": user["email"],
+            "aud": settings.SUPABASE_JWT_AUDIENCE,
+            "role": "authenticated",
+            "user_metadata": auth_user.user_metadata,
+            "exp": datetime.now(timezone.utc) + timedelta(hours=1)
+        }, settings.SUPABASE_JWT_SECRET or settings.JWT_SECRET_KEY, algorithm="HS256")
+        return SimpleNamespace(user=auth_user, session=SimpleNamespace(access_token=token, user=auth_user))
+
+class MemoryDatabase:
+    """Base de datos en memoria con la forma del cliente de Supabase.
+    
+    Expone `table()`, `rpc()` y `auth` como `supabase.Client`. Las funciones
+    de las migraciones que usan los servicios se reimplementan como métodos
+    `rpc_<nombre>`, y el trigger de `resumen_mensual` se aplica en cada
+    escritura de `movimientos`.
+    """
+    
+    def __init__(self):
+        """Inicializar base de datos vacía."""
+        self.tables: Dict[str, MemoryTable] = {}
+        self.auth = MemoryAuth()
+        self.lock = threading.RLock()
+    
+    def table(self, name: str) -> MemoryTable:
+        """Obtener (o crear) una tabla."""
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = MemoryTable(name)
+        return table
+    
+    def query(self, name: str) -> MemoryQuery:
+        """Iniciar una consulta sobre una tabla."""
+        return MemoryQuery(self, name)
+    
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> MemoryRpc:
+        """Iniciar la llamada a una función."""
+        return MemoryRpc(self, name, params or {})
+    
+    def clear(self) -> None:
+        """Vaciar todas las tablas y usuarios."""
+        with self.lock:
+            self.tables.clear()
+            self.auth = MemoryAuth()
+    
+    def load(self, data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        """Cargar filas por tabla; devuelve cuántas se cargaron de cada una.
+        
+        La tabla `auth_users` (email, password, id y name opcionales) crea
+        usuarios de autenticación para poder iniciar sesión con ellos.
+        """
+        loaded = {}
+        with self.lock:
+            for name, rows in data.items():
+                if name == "auth_users":
+                    for user in rows:
+                        self.auth.add_user(user["email"], user["password"], {"name": user.get("name")}, user.get("id"))
+                else:
+                    table = self.table(name)
+                    for row in rows:
+                        row = table.prepare(row)
+                        table.check_unique(row, table.primary_key(row))
+                        self.add_row(name, row)
+                loaded[name] = len(rows)
+        return loaded
+    
+    def load_fixture(self, path: str) -> Dict[str, int]:
+        """Cargar un archivo JSON {tabla: [filas]} o un directorio de `<tabla>.json`/`<tabla>.jsonl`.
+        
+        Los `.jsonl` se cargan por bloques de FIXTURE_CHUNK_SIZE líneas, así un
+        archivo de millones de filas no se tiene entero en memoria dos veces.
+        """
+        if not os.path.isdir(path):
+            with open(path, encoding="utf-8") as f:
+                return self.load(json.load(f))
+        
+        loaded = {}
+        for file_name in sorted(os.listdir(path)):
+            name, extension = os.path.splitext(file_name)
+            if extension not in (".json", ".jsonl"):
+                continue
+            with open(os.path.join(path, file_name), encoding="utf-8") as f:
+                if extension == ".json":
+                    loaded.update(self.load({name: json.load(f)}))
+                    continue
+                loaded[name] = 0
+                # Los valores repetidos (usuario, categoría, fecha...) se guardan una sola vez
+                shared: Dict[str, str] = {}
+                while True:
+                    lines = list(itertools.islice(f, FIXTURE_CHUNK_SIZE))
+                    if not lines:
+                        break
+                    rows = [json.loads(line) for line in lines if line.strip()]
+                    for row in rows:
+                        for column, value in row.items():
+                            if isinstance(value, str) and column != "id":
+                                row[column] = shared.setdefault(value, value)
+                    loaded[name] += self.load({name: rows})[name]
+        return loaded
+    
+    # Escrituras (mantienen índices, cascadas y los triggers de resumen_mensual y versiones_datos)
+    
+    def add_row(self, table_name: str, row: Dict[str, Any]) -> None:
+        """Guardar una fila validada."""
+        self.table(table_name).add(row)
+        if table_name == "movimientos":
+            self._apply_rollup(row, 1)
+        if table_name in VERSIONED_TABLES:
+            self._bump_version(row, table_name)
+    
+    def update_row(self, table_name: str, row: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Aplicar cambios a una fila y devolver la fila nueva."""
+        table = self.table(table_name)
+        updated = dict(row, **changes)
+        if table.timestamps and "updated_at" in row and "updated_at" not in changes:
+            updated["updated_at"] = _now()
+        table.check_unique(updated, table.primary_key(updated), previous=table.primary_key(row))
+        
+        self.remove_row(table_name, row, cascade=False)
+        self.add_row(table_name, updated)
+        return updated
+    
+    def remove_row(self, table_name: str, row: Dict[str, Any], cascade: bool = True) -> None:
+        """Eliminar una fila (y sus hijas con ON DELETE CASCADE)."""
+        self.table(table_name).remove(row)
+        if table_name == "movimientos":
+            self._apply_rollup(row, -1)
+        if table_name in VERSIONED_TABLES:
+            self._bump_version(row, table_name)
+        if cascade:
+            for child, column in CASCADES.get(table_name, []):
+                child_table = self.table(child)
+                for child_row in [r for r in child_table.by_user.get(row.get("usuario_id"), {}).values() if r.get(column) == row.get("id")]:
+                    self.remove_row(child, child_row)
+    
+    def _apply_rollup(self, row: Dict[str, Any], sign: int) -> None:
+        """Trigger de la migración 005: sumar o restar un movimiento real de su mes."""
+        if row.get("es_recurrente"):
+            return
+        table = self.table("resumen_mensual")
+        key = {"usuario_id": row.get("usuario_id"), "mes": _month(row["fecha"]), "tipo": row.get("tipo"), "categoria_id": row.get("categoria_id")}
+        current = table.find(table.key, key)
+        if current is None:
+            current = table.prepare(dict(key, total=0, cantidad=0))
+            table.add(current)
+        table.touch(current["usuario_id"])
+        current["total"] = current["total"] + sign * float(row.get("monto") or 0)
+        current["cantidad"] = current["cantidad"] + sign
+        current["updated_at"] = _now()
+        if current["cantidad"] == 0:
+            table.remove(current)
+    
+    def _bump_version(self, row: Dict[str, Any], table_name: str) -> None:
+        """Trigger de la migración 010: subir la versión de datos del usuario (o la global)."""
+        scope = "*" if table_name == "categories" else row.get("usuario_id")
+        if scope is None:
+            return
+        table = self.table("versiones_datos")
+        current = table.find(table.key, {"alcance": str(scope)})
+        if current is None:
+            current = table.prepare({"alcance": str(scope), "version": 0})
+            table.add(current)
+        table.touch(None)
+        current["version"] += 1
+        current["updated_at"] = _now()
+    
+    def _movements(self, user_id: Optional[str]) -> Iterable[Dict[str, Any]]:
+        """Movimientos de un usuario (o de todos)."""
+        table = self.table("movimientos")
+        return table.by_user.get(user_id, {}).values() if user_id is not None else table.rows.values()
+    
+    # Funciones de las migraciones (mismos nombres y parámetros)
+    
+    def rpc_resumen_movimientos(self, p_usuario_id: str, p_fecha_inicio: Optional[str] = None, p_fecha_fin: Optional[str] = None, p_incluir_recurrentes: bool = False) -> List[Dict[str, Any]]:
+        """Totales por tipo (migración 004)."""
+        totals: Dict[str, List[float]] = {}
+        for row in self._movements(p_usuario_id):
+            if (p_incluir_recurrentes or not row.get("es_recurrente")) \
+                    and (p_fecha_inicio is None or row["fecha"] >= p_fecha_inicio) \
+                    and (p_fecha_fin is None or row["fecha"] <= p_fecha_fin):
+                total = totals.setdefault(row["tipo"], [0.0, 0])
+                total[0] += float(row["monto"])
+                total[1] += 1
+        return [{"tipo": kind, "total": total, "cantidad": count} for kind, (total, count) in totals.items()]
+    
+    def rpc_resumen_movimientos_mensual(self, p_usuario_id: str, p_fecha_inicio: Optional[str] = None, p_fecha_fin: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totales por tipo con los meses completos de resumen_mensual (migración 005); mismo resultado."""
+        return self.rpc_resumen_movimientos(p_usuario_id, p_fecha_inicio, p_fecha_fin)
+    
+    def rpc_resumen_movimientos_por_mes(self, p_usuario_id: str, p_fecha_inicio: str, p_fecha_fin: str) -> List[Dict[str, Any]]:
+        """Totales reales por (mes, tipo) (migración 006)."""
+        totals: Dict[Tuple[str, str], float] = {}
+        for row in self._movements(p_usuario_id):
+            if not row.get("es_recurrente") and p_fecha_inicio <= row["fecha"] <= p_fecha_fin:
+                key = (_month(row["fecha"]), row["tipo"])
+                totals[key] = totals.get(key, 0.0) + float(row["monto"])
+        return [{"mes": month, "tipo": kind, "total": total} for (month, kind), total in totals.items()]
+    
+    def rpc_proyeccion_presupuesto_por_mes(self, p_usuario_id: str, p_fecha_inicio: str, p_fecha_fin: str) -> List[Dict[str, Any]]:
+        """Totales proyectados por (mes, tipo) desde el calendario guardado (migración 007)."""
+        totals: Dict[Tuple[str, str], float] = {}
+        for row in self.table("presupuesto_item_ocurrencias").by_user.get(p_usuario_id, {}).values():
+            if p_fecha_inicio <= row["fecha"] <= p_fecha_fin:
+                key = (_month(row["fecha"]), row["tipo"])
+                totals[key] = totals.get(key, 0.0) + float(row["monto"])
+        return [{"mes": month, "tipo": kind, "total": total} for (month, kind), total in totals.items()]
+    
+    def rpc_regenerar_ocurrencias_presupuesto(self, p_usuario_id: str, p_desde: str, p_hasta: str, p_item_id: Optional[str] = None) -> int:
+        """Regenerar calendarios de elementos del presupuesto (migración 007)."""
+        items = [
+            item for item in self.table("presupuesto_items").by_user.get(p_usuario_id, {}).values()
+            if (item["id"] == p_item_id if p_item_id is not None else item["ocurrencias_hasta"] < p_hasta)
+        ]
+        if not items:
+            return 0
+        
+        occurrences = self.table("presupuesto_item_ocurrencias")
+        ids = {item["id"] for item in items}
+        for row in [r for r in occurrences.by_user.get(p_usuario_id, {}).values() if r["item_id"] in ids]:
+            occurrences.remove(row)
+        
+        first = date.fromisoformat(_month(p_desde))
+        until = date.fromisoformat(p_hasta)
+        generated = 0
+        for item in sorted(items, key=lambda item: item["id"]):
+            end = min(date.fromisoformat(item["fecha_fin"]), until) if item.get("fecha_fin") else until
+            if item.get("activo", True):
+                for occurrence in self._item_dates(date.fromisoformat(item["fecha_inicio"]), item["frecuencia"], first, end):
+                    occurrences.add({
+                        "item_id": item["id"],
+                        "usuario_id": item["usuario_id"],
+                        "fecha": occurrence.isoformat(),
+                        "monto": item["monto"],
+                        "tipo": item["tipo"]
+                    })
+                    generated += 1
+            
+            self.table("presupuesto_items").touch(p_usuario_id)
+            open_ended = item.get("activo", True) and (not item.get("fecha_fin") or item["fecha_fin"] > p_hasta)
+            item["ocurrencias_hasta"] = p_hasta if open_ended else "infinity"
+        self._bump_version({"usuario_id": p_usuario_id}, "presupuesto_items")
+        return generated
+    
+    @staticmethod
+    def _item_dates(start: date, frequency: str, first: date, end: date) -> Iterable[date]:
+        """Fechas de un elemento entre `first` y `end` (semanal, mensual o anual)."""
+        if frequency == "semanal":
+            k = max(0, -(-(first - start).days // 7))
+            occurrence = start + timedelta(days=7 * k)
+            while occurrence <= end:
+                yield occurrence
+                occurrence += timedelta(days=7)
+            return
+        
+        step = 12 if frequency == "anual" else 1
+        k = max(0, ((first.year - start.year) * 12 + first.month - start.month) // step - 1)
+        while True:
+            occurrence = _add_months(start, k * step)
+            if occurrence > end:
+                return
+            if occurrence >= first:
+                yield occurrence
+            k += 1
+    
+    def rpc_reconstruir_resumen_mensual(self, p_usuario_id: Optional[str] = None) -> int:
+        """Reconstruir resumen_mensual desde movimientos (migración 005)."""
+        table = self.table("resumen_mensual")
+        for row in list(table.by_user.get(p_usuario_id, {}).values() if p_usuario_id is not None else table.rows.values()):
+            table.remove(row)
+        for row in list(self._movements(p_usuario_id)):
+            self._apply_rollup(row, 1)
+        return len(table.by_user.get(p_usuario_id, {})) if p_usuario_id is not None else len(table.rows)
+    
+    def rpc_verificar_resumen_mensual(self, p_usuario_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Diferencias entre resumen_mensual y los totales de movimientos (migración 005)."""
+        real: Dict[tuple, List[float]] = {}
+        for row in self._movements(p_usuario_id):
+            if not row.get("es_recurrente"):
+                total = real.setdefault((row["usuario_id"], _month(row["fecha"]), row["tipo"], row.get("categoria_id")), [0.0, 0])
+                total[0] += float(row["monto"])
+                total[1] += 1
+        
+        table = self.table("resumen_mensual")
+        stored = {
+            table.primary_key(row): row
+            for row in (table.by_user.get(p_usuario_id, {}).values() if p_usuario_id is not None else table.rows.values())
+        }
+        differences = []
+        for key in stored.keys() | real.keys():
+            saved, computed = stored.get(key), real.get(key)
+            saved_values = (round(saved["total"], 2), saved["cantidad"]) if saved else (None, None)
+            real_values = (round(computed[0], 2), computed[1]) if computed else (None, None)
+            if saved_values != real_values:
+                differences.append({
+                    "usuario_id": key[0], "mes": key[1], "tipo": key[2], "categoria_id": key[3],
+                    "total_resumen": saved_values[0], "total_real": real_values[0],
+                    "cantidad_resumen": saved_values[1], "cantidad_real": real_values[1]
+                })
+        return differences
+    
+    def rpc_tomar_lease_tarea(self, p_nombre: str, p_propietario: str, p_segundos: int) -> bool:
+        """Tomar o renovar el lease de una tarea (migración 009)."""
+        table = self.table("tareas_programadas")
+        now = datetime.now(timezone.utc)
+        current = table.rows.get((p_nombre,))
+        if current is not None and datetime.fromisoformat(current["vence_at"]) > now and current["propietario"] != p_propietario:
+            return False
+        if current is not None:
+            table.remove(current)
+        table.add({
+            "nombre": p_nombre,
+            "propietario": p_propietario,
+            "vence_at": (now + timedelta(seconds=p_segundos)).isoformat(),
+            "tomado_at": now.isoformat()
+        })
+        return True
+    
+    def rpc_liberar_lease_tarea(self, p_nombre: str, p_propietario: str) -> None:
+        """Liberar el lease de una tarea (migración 009)."""
+        current = self.table("tareas_programadas").rows.get((p_nombre,))
+        if current is not None and current["propietario"] == p_propietario:
+            self.table("tareas_programadas").touch(None)
+            current["vence_at"] = _now()
+        return None
+
+class MemoryClient:
+    """Cliente con la interfaz de `supabase.Client` sobre una MemoryDatabase."""
+    
+    def __init__(self, database: MemoryDatabase):
+        """Inicializar cliente."""
+        self.database = database
+    
+    def table(self, table_name: str) -> MemoryQuery:
+        return self.database.query(table_name)
+    
+    def rpc(self, function_name: str, params: Optional[Dict[str, Any]] = None) -> MemoryRpc:
+        return self.database.rpc(function_name, params)
+    
+    @property
+    def auth(self) -> MemoryAuth:
+        return self.database.auth
+
+class MemorySupabaseService(SupabaseService):
+    """SupabaseService sobre una base de datos en memoria (SUPABASE_BACKEND=memory).
+    
+    Mismo contrato que el servicio real (execute, fetch_all, rpc, insert/
+    update/delete_record, métricas de concurrencia): los servicios no
+    cambian y la API corre sin red, para benchmarks y pruebas de carga.
+    """
+    
+    def __init__(self, database: Optional[MemoryDatabase] = None):
+        """Inicializar sin conexiones; carga SUPABASE_MEMORY_FIXTURE si está configurado."""
+        self.mode = "memory"
+        self.database = database or MemoryDatabase()
+        self.client = MemoryClient(self.database)
+        self.executor = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self.metrics = {
+            "waiting": 0,
+            "in_flight": 0,
+            "total_calls": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+        if settings.SUPABASE_MEMORY_FIXTURE:
+            loaded = self.database.load_fixture(settings.SUPABASE_MEMORY_FIXTURE)
+            logger.info(f"✅ Datos cargados en memoria desde {settings.SUPABASE_MEMORY_FIXTURE}: {loaded}")
+        logger.info("✅ Backend en memoria inicializado (sin conexión a Supabase)")
+    
+    def get_active_client(self) -> MemoryClient:
+        """Obtener el cliente en memoria."""
+        return self.client
+    
+    async def close(self) -> None:
+        """Nada que cerrar: no hay conexiones."""
+        return None
\ No newline at end of file
@@ -1,17 +1,39 @@
-from typing import Optional, Dict, Any, List
-from datetime import date, datetime
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from datetime import date
+from app.config import settings
 from app.services.supabase_service import supabase_service
-from app.models.movement import MovementCreate, MovementResponse, MovementUpdate, MovementFilter, MovementType
+from app.services.category_resolver import category_resolver
+from app.services.data_version import data_version_service
+from app.models.movement import MovementCreate, MovementUpdate, MovementFilter, MovementType
+import base64
+import json
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+def encode_cursor(movement_date: str, movement_id: str) -> str:
+    """Codificar la posición (fecha, id) como cursor opaco."""
+    raw = json.dumps([movement_date, movement_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, str]]:
+    """Decodificar un cursor; None si no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        movement_date, movement_id = json.loads(raw)
+        # Validar antes de interpolar los valores en el filtro de PostgREST
+        date.fromisoformat(movement_date)
+        return movement_date, str(uuid.UUID(movement_id))
+    except (ValueError, TypeError):
+        return None
+
 class MovementService:
     """Servicio para gestionar movimientos financieros."""
     
     def __init__(self):
         """Inicializar servicio de movimientos."""
-        self.supabase = supabase_service.get_client()
+        self.supabase = supabase_service
     
     async def create_movement(self, user_id: str, movement_data: MovementCreate) -> Optional[Dict[str, Any]]:
         """Crear un nuevo movimiento."""
@@ -34,6 +56,7 @@ class MovementService:
             }
             
             result = await supabase_service.insert_record("movimientos", movement_record)
+            data_version_service.bump(user_id)
             
             if result["success"]:
                 logger.info(f"✅ Movimiento creado exitosamente para usuario {user_id}")
@@ -48,64 +71,176 @@ class MovementService:
             logger.error(f"❌ Error al crear movimiento: {e}")
             return {"success": False, "error": str(e)}
     
-    async def get_movements(self, user_id: str, filters: Optional[MovementFilter] = None) -> Optional[Dict[str, Any]]:
-        """Obtener movimientos del usuario con filtros opcionales."""
+    async def create_movements(self, user_id: str, items: List[MovementCreate]) -> Optional[Dict[str, Any]]:
+        """Crear varios movimientos con inserciones de varias filas.
+        
+        Las categorías distintas se resuelven en una sola consulta y las filas
+        se insertan por bloques; el resultado informa el estado de cada ítem
+        en el mismo orden recibido.
+        """
         try:
-            # Construir consulta base
-            query = self.supabase.table('movimientos').select('*, categorias(nombre)').eq('usuario_id', user_id).eq('es_recurrente', False)
+            category_ids = await category_resolver.get_or_create_many(
+                user_id, [(item.category, item.movement_type.value) for item in items]
+            )
             
-            # Aplicar filtros si se proporcionan
-            if filters:
-                if filters.movement_type:
-                    query = query.eq('tipo', filters.movement_type.value)
-                
-                if filters.category:
-                    # Filtrar por nombre de categoría
-                    query = query.eq('categorias.nombre', filters.category)
+            results: List[Dict[str, Any]] = [None] * len(items)
+            pending = []
+            for index, item in enumerate(items):
+                category_id = category_ids.get((item.category, item.movement_type.value))
+                if not category_id:
+                    results[index] = {"index": index, "success": False, "error": "Error al obtener/crear categoría"}
+                    continue
                 
-                if filters.date_from:
-                    query = query.gte('fecha', filters.date_from.strftime('%Y-%m-%d'))
-                
-                if filters.date_to:
-                    query = query.lte('fecha', filters.date_to.strftime('%Y-%m-%d'))
+                pending.append((index, {
+                    "usuario_id": user_id,
+                    "fecha": item.movement_date.strftime('%Y-%m-%d'),
+                    "categoria_id": category_id,
+                    "monto": item.amount,
+                    "tipo": item.movement_type.value,
+                    "descripcion": item.description,
+                    "es_recurrente": False
+                }))
+            
+            chunk_size = settings.MOVEMENT_BATCH_CHUNK_SIZE
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                result = await supabase_service.insert_record("movimientos", [record for _, record in chunk])
+                data_version_service.bump(user_id)
                 
-                if filters.amount_min:
-                    query = query.gte('monto', filters.amount_min)
+                # Un bloque se inserta completo o falla completo
+                if result["success"] and result["data"] and len(result["data"]) == len(chunk):
+                    for (index, _), row in zip(chunk, result["data"]):
+                        results[index] = {"index": index, "success": True, "id": row["id"]}
+                else:
+                    error = result["error"] or "Error al insertar movimientos"
+                    for index, _ in chunk:
+                        results[index] = {"index": index, "success": False, "error": error}
+            
+            created = sum(1 for item in results if item["success"])
+            logger.info(f"✅ {created}/{len(items)} movimientos creados en lote para usuario {user_id}")
+            return {
+                "success": True,
+                "data": {
+                    "created": created,
+                    "failed": len(items) - created,
+                    "results": results
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"❌ Error al crear movimientos en lote: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_movements(self, user_id: str, filters: Optional[MovementFilter] = None, limit: Optional[int] = None, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Obtener movimientos del usuario con filtros opcionales.
+        
+        Con `limit` devuelve una página y `next_cursor` (None en la última);
+        el cursor apunta a (fecha, id) del último movimiento entregado, así
+        cada página cuesta lo mismo sin importar su profundidad.
+        """
+        try:
+            position = None
+            if cursor:
+                position = decode_cursor(cursor)
+                if position is None:
+                    return {"success": False, "error": "Cursor inválido"}
                 
-                if filters.amount_max:
-                    query = query.lte('monto', filters.amount_max)
+            # Una fila extra indica si hay otra página
+            rows = await self._fetch_movements_page(user_id, filters, limit + 1 if limit else None, position)
             
-            # Ordenar por fecha descendente
-            response = query.order('fecha', desc=True).execute()
+            next_cursor = None
+            if limit and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["fecha"], rows[-1]["id"])
             
-            if response.data:
-                # Transformar datos al formato de respuesta
-                movements = []
-                for mov in response.data:
-                    movements.append({
-                        "id": mov["id"],
-                        "user_id": mov["usuario_id"],
-                        "amount": mov["monto"],
-                        "category": mov.get("categorias", {}).get("nombre", "Sin categoría"),
-                        "description": mov["descripcion"],
-                        "movement_type": MovementType(mov["tipo"]),
-                        "movement_date": mov["fecha"],
-                        "created_at": mov.get("created_at"),
-                        "updated_at": mov.get("updated_at")
-                    })
-                
-                return {"success": True, "data": movements}
-            else:
-                return {"success": True, "data": []}
-                
+            # Transformar datos al formato de respuesta
+            movements = [self._format_movement(mov) for mov in rows]
+            
+            if limit:
+                return {"success": True, "data": movements, "next_cursor": next_cursor}
+            return {"success": True, "data": movements}
+        
         except Exception as e:
             logger.error(f"❌ Error al obtener movimientos: {e}")
             return {"success": False, "error": str(e)}
     
+    async def iter_movements(self, user_id: str, filters: Optional[MovementFilter] = None, page_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Recorrer los movimientos del usuario página a página (para exportar).
+        
+        Cada página se pide por cursor, así la memoria usada no depende del
+        tamaño del historial.
+        """
+        position = None
+        while True:
+            rows = await self._fetch_movements_page(user_id, filters, page_size, position)
+            if rows:
+                yield [self._format_movement(mov) for mov in rows]
+            if len(rows) < page_size:
+                return
+            position = (rows[-1]["fecha"], rows[-1]["id"])
+    
+    async def _fetch_movements_page(self, user_id: str, filters: Optional[MovementFilter], limit: Optional[int], position: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Leer una página de movimientos posterior a `position` (fecha, id)."""
+        query = self._build_movements_query(user_id, filters)
+        
+        if position:
+            # Continuar después del último movimiento entregado (orden fecha, id descendente)
+            last_date, last_id = position
+            query = query.or_(f"fecha.lt.{last_date},and(fecha.eq.{last_date},id.lt.{last_id})")
+        
+        # Ordenar por fecha descendente (id desempata para un orden estable)
+        query = query.order('fecha', desc=True).order('id', desc=True)
+        if limit:
+            query = query.limit(limit)
+        
+        response = await self.supabase.execute(query)
+        return response.data or []
+    
+    def _build_movements_query(self, user_id: str, filters: Optional[MovementFilter] = None):
+        """Construir la consulta de movimientos del usuario con filtros opcionales."""
+        query = self.supabase.table('movimientos').select('*, categorias(nombre)').eq('usuario_id', user_id).eq('es_recurrente', False)
+        
+        # Aplicar filtros si se proporcionan
+        if filters:
+            if filters.movement_type:
+                query = query.eq('tipo', filters.movement_type.value)
+            
+            if filters.category:
+                # Filtrar por nombre de categoría
+                query = query.eq('categorias.nombre', filters.category)
+            
+            if filters.date_from:
+                query = query.gte('fecha', filters.date_from.strftime('%Y-%m-%d'))
+            
+            if filters.date_to:
+                query = query.lte('fecha', filters.date_to.strftime('%Y-%m-%d'))
+            
+            if filters.amount_min:
+                query = query.gte('monto', filters.amount_min)
+            
+            if filters.amount_max:
+                query = query.lte('monto', filters.amount_max)
+        
+        return query
+    
+    def _format_movement(self, mov: Dict[str, Any]) -> Dict[str, Any]:
+        """Transformar una fila de `movimientos` al formato de respuesta."""
+        return {
+            "id": mov["id"],
+            "user_id": mov["usuario_id"],
+            "amount": mov["monto"],
+            "category": (mov.get("categorias") or {}).get("nombre", "Sin categoría"),
+            "description": mov["descripcion"],
+            "movement_type": MovementType(mov["tipo"]),
+            "movement_date": mov["fecha"],
+            "created_at": mov.get("created_at"),
+            "updated_at": mov.get("updated_at")
+        }
+    
     async def get_movement_by_id(self, user_id: str, movement_id: str) -> Optional[Dict[str, Any]]:
         """Obtener un movimiento específico por ID."""
         try:
-            response = self.supabase.table('movimientos').select('*, categorias(nombre)').eq('id', movement_id).eq('usuario_id', user_id).execute()
+            response = await self.supabase.execute(self.supabase.table('movimientos').select('*, categorias(nombre)').eq('id', movement_id).eq('usuario_id', user_id))
             
             if response.data:
                 mov = response.data[0]
@@ -133,11 +268,6 @@ class MovementService:
     async def update_movement(self, user_id: str, movement_id: str, update_data: MovementUpdate) -> Optional[Dict[str, Any]]:
         """Actualizar un movimiento."""
         try:
-            # Verificar que el movimiento existe y pertenece al usuario
-            movement_check = await self.get_movement_by_id(user_id, movement_id)
-            if not movement_check["success"]:
-                return {"success": False, "error": "Movimiento no encontrado"}
-            
             # Preparar datos de actualización
             update_record = {}
             
@@ -162,9 +292,13 @@ class MovementService:
             if not update_record:
                 return {"success": False, "error": "No hay datos para actualizar"}
             
-            result = await supabase_service.update_record("movimientos", movement_id, update_record)
+            # Filtrar por id y usuario: la verificación de pertenencia va en la misma escritura
+            result = await supabase_service.update_record("movimientos", movement_id, update_record, user_id=user_id)
+            data_version_service.bump(user_id)
             
-            if result["success"]:
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Movimiento no encontrado"}
+            elif result["success"]:
                 logger.info(f"✅ Movimiento actualizado exitosamente: {movement_id}")
                 return {"success": True, "data": result["data"]}
             else:
@@ -177,14 +311,12 @@ class MovementService:
     async def delete_movement(self, user_id: str, movement_id: str) -> Optional[Dict[str, Any]]:
         """Eliminar un movimiento."""
         try:
-            # Verificar que el movimiento existe y pertenece al usuario
-            movement_check = await self.get_movement_by_id(user_id, movement_id)
-            if not movement_check["success"]:
-                return {"success": False, "error": "Movimiento no encontrado"}
-            
-            result = await supabase_service.delete_record("movimientos", movement_id)
+            result = await supabase_service.delete_record("movimientos", movement_id, user_id=user_id)
+            data_version_service.bump(user_id)
             
-            if result["success"]:
+            if result["success"] and not result["data"]:
+                return {"success": False, "error": "Movimiento no encontrado"}
+            elif result["success"]:
                 logger.info(f"✅ Movimiento eliminado exitosamente: {movement_id}")
                 return {"success": True, "message": "Movimiento eliminado exitosamente"}
             else:
@@ -195,43 +327,33 @@ class MovementService:
             return {"success": False, "error": str(e)}
     
     async def get_financial_summary(self, user_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
-        """Obtener resumen financiero del usuario."""
+        """Obtener resumen financiero del usuario.
+        
+        Los totales se agrupan por tipo en Postgres (`resumen_movimientos`),
+        así la respuesta tiene a lo sumo una fila por tipo. Con los totales
+        mensuales activos, los meses completos se leen de `resumen_mensual`.
+        """
         try:
-            # Construir consulta base
-            query = self.supabase.table('movimientos').select('monto, tipo').eq('usuario_id', user_id).eq('es_recurrente', False)
+            function_name = 'resumen_movimientos_mensual' if settings.ROLLUPS_ENABLED else 'resumen_movimientos'
+            response = await self.supabase.execute(self.supabase.rpc(function_name, {
+                "p_usuario_id": user_id,
+                "p_fecha_inicio": start_date.strftime('%Y-%m-%d') if start_date else None,
+                "p_fecha_fin": end_date.strftime('%Y-%m-%d') if end_date else None
+            }))
             
-            # Aplicar filtros de fecha si se proporcionan
-            if start_date:
-                query = query.gte('fecha', start_date.strftime('%Y-%m-%d'))
-            if end_date:
-                query = query.lte('fecha', end_date.strftime('%Y-%m-%d'))
+            totals = {row["tipo"]: row for row in response.data or []}
+            total_income = float(totals.get("Ingreso", {}).get("total") or 0)
+            total_expenses = float(totals.get("Gasto", {}).get("total") or 0)
             
-            response = query.execute()
-            
-            if response.data:
-                total_income = sum(mov["monto"] for mov in response.data if mov["tipo"] == "Ingreso")
-                total_expenses = sum(mov["monto"] for mov in response.data if mov["tipo"] == "Gasto")
-                balance = total_income - total_expenses
-                
-                return {
-                    "success": True,
-                    "data": {
-                        "total_income": total_income,
-                        "total_expenses": total_expenses,
-                        "balance": balance,
-                        "movement_count": len(response.data)
-                    }
-                }
-            else:
-                return {
-                    "success": True,
-                    "data": {
-                        "total_income": 0,
-                        "total_expenses": 0,
-                        "balance": 0,
-                        "movement_count": 0
-                    }
+            return {
+                "success": True,
+                "data": {
+                    "total_income": total_income,
+                    "total_expenses": total_expenses,
+                    "balance": total_income - total_expenses,
+                    "movement_count": sum(row["cantidad"] for row in totals.values())
                 }
+            }
                 
         except Exception as e:
             logger.error(f"❌ Error al obtener resumen financiero: {e}")
@@ -240,25 +362,7 @@ class MovementService:
     async def _get_or_create_category(self, user_id: str, category_name: str, movement_type: MovementType) -> Optional[str]:
         """Obtener una categoría existente o crear una nueva."""
         try:
-            # Buscar categoría existente
-            response = self.supabase.table('categorias').select('id').eq('usuario_id', user_id).eq('nombre', category_name).eq('tipo', movement_type.value).execute()
-            
-            if response.data:
-                return response.data[0]['id']
-            
-            # Crear nueva categoría
-            category_data = {
-                "nombre": category_name,
-                "tipo": movement_type.value,
-                "usuario_id": user_id
-            }
-            
-            result = await supabase_service.insert_record("categorias", category_data)
-            
-            if result["success"] and result["data"]:
-                return result["data"][0]['id']
-            
-            return None
+            return await category_resolver.get_or_create(user_id, category_name, movement_type.value)
             
         except Exception as e:
             logger.error(f"❌ Error al obtener/crear categoría: {e}")
@@ -0,0 +1,161 @@
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from datetime import date
+from app.config import settings
+from app.services.supabase_service import supabase_service
+import asyncio
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def month_edges(start: date, months: int) -> np.ndarray:
+    """Primer día de cada mes del horizonte y del mes siguiente (months + 1 bordes)."""
+    first = np.datetime64(start.strftime("%Y-%m"), "M")
+    return (first + np.arange(months + 1)).astype("datetime64[D]")
+
+def schedule_horizon(today: Optional[date] = None) -> str:
+    """Último día hasta el que se generan los calendarios de elementos sin fin."""
+    return str(month_edges(today or date.today(), settings.BUDGET_SCHEDULE_MONTHS)[-1] - 1)
+
+class ProjectionEngine:
+    """Proyectar ingresos y gastos por mes y compararlos con los movimientos reales."""
+    
+    def __init__(self):
+        """Inicializar motor de proyecciones."""
+        self.supabase = supabase_service
+    
+    async def get_projection(self, user_id: str, months: int, start: Optional[date] = None) -> Dict[str, Any]:
+        """Proyección de `months` meses desde el mes de `start` (el actual por defecto).
+        
+        Lee los totales proyectados (del calendario guardado de cada elemento)
+        y los reales por mes en paralelo, y calcula todos los meses en una
+        pasada vectorizada.
+        """
+        edges = month_edges(start or date.today(), months)
+        first_day, last_day = str(edges[0]), str(edges[-1] - 1)
+        
+        projected_rows, actual_rows = await asyncio.gather(
+            self._get_projected(user_id, first_day, last_day),
+            self._get_actuals(user_id, first_day, last_day)
+        )
+        
+        projected_income, projected_expenses = self.monthly_totals(projected_rows, edges, "ingreso_recurrente", "gasto_proyectado")
+        actual_income, actual_expenses = self.monthly_totals(actual_rows, edges)
+        return self.build_summary(edges, projected_income, projected_expenses, actual_income, actual_expenses)
+    
+    async def regenerate_schedule(self, user_id: str, item_id: Optional[str] = None) -> int:
+        """Regenerar el calendario de un elemento, o los del usuario que no cubren el horizonte."""
+        response = await self.supabase.execute(self.supabase.rpc('regenerar_ocurrencias_presupuesto', {
+            "p_usuario_id": user_id,
+            "p_desde": date.today().isoformat(),
+            "p_hasta": schedule_horizon(),
+            "p_item_id": item_id
+        }))
+        return response.data or 0
+    
+    async def _get_projected(self, user_id: str, first_day: str, last_day: str) -> List[Dict[str, Any]]:
+        """Totales proyectados por (mes, tipo) desde `presupuesto_item_ocurrencias`.
+        
+        En paralelo se comprueba si algún calendario no llega al final del
+        horizonte (elemento recién escrito o calendario vencido); solo en ese
+        caso se regenera y se vuelve a leer.
+        """
+        def read_projection():
+            return self.supabase.execute(self.supabase.rpc('proyeccion_presupuesto_por_mes', {
+                "p_usuario_id": user_id,
+                "p_fecha_inicio": first_day,
+                "p_fecha_fin": last_day
+            }))
+        
+        projection, stale = await asyncio.gather(
+            read_projection(),
+            self.supabase.execute(
+                self.supabase.table('presupuesto_items').select('id').eq('usuario_id', user_id).lt('ocurrencias_hasta', last_day).limit(1)
+            )
+        )
+        if stale.data:
+            generated = await self.regenerate_schedule(user_id)
+            logger.info(f"✅ Calendarios de presupuesto regenerados para usuario {user_id}: {generated} ocurrencias")
+            projection = await read_projection()
+        return projection.data or []
+    
+    async def _get_actuals(self, user_id: str, first_day: str, last_day: str) -> List[Dict[str, Any]]:
+        """Totales reales por (mes, tipo): de `resumen_mensual` o agrupados en Postgres."""
+        if settings.ROLLUPS_ENABLED:
+            return await self.supabase.fetch_all(
+                lambda: self.supabase.table('resumen_mensual').select('mes, tipo, total').eq('usuario_id', user_id).gte('mes', first_day).lte('mes', last_day).order('mes').order('tipo').order('categoria_id')
+            )
+        
+        response = await self.supabase.execute(self.supabase.rpc('resumen_movimientos_por_mes', {
+            "p_usuario_id": user_id,
+            "p_fecha_inicio": first_day,
+            "p_fecha_fin": last_day
+        }))
+        return response.data or []
+    
+    @staticmethod
+    def monthly_totals(
+        rows: Sequence[Dict[str, Any]],
+        edges: np.ndarray,
+        income_type: str = "Ingreso",
+        expense_type: str = "Gasto"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Ingresos y gastos por mes a partir de filas (mes, tipo, total)."""
+        months = len(edges) - 1
+        if not rows:
+            return np.zeros(months), np.zeros(months)
+        
+        month = np.array([row["mes"][:10] for row in rows], dtype="datetime64[D]").astype("datetime64[M]")
+        index = (month - edges[0].astype("datetime64[M]")).astype(np.int64)
+        totals = np.array([float(row["total"]) for row in rows])
+        kinds = np.array([row["tipo"] for row in rows])
+        
+        inside = (index >= 0) & (index < months)
+        income = inside & (kinds == income_type)
+        expenses = inside & (kinds == expense_type)
+        return (
+            np.bincount(index[income], weights=totals[income], minlength=months),
+            np.bincount(index[expenses], weights=totals[expenses], minlength=months)
+        )
+    
+    @staticmethod
+    def build_summary(
+        edges: np.ndarray,
+        projected_income: np.ndarray,
+        projected_expenses: np.ndarray,
+        actual_income: np.ndarray,
+        actual_expenses: np.ndarray
+    ) -> Dict[str, Any]:
+        """Armar la respuesta (BudgetSummary del frontend); diferencia = real - proyectado."""
+        projected_balance = projected_income - projected_expenses
+        actual_balance = actual_income - actual_expenses
+        columns = {
+            "projected_income": projected_income,
+            "projected_expenses": projected_expenses,
+            "projected_balance": projected_balance,
+            "actual_income": actual_income,
+            "actual_expenses": actual_expenses,
+            "actual_balance": actual_balance,
+            "variance_income": actual_income - projected_income,
+            "variance_expenses": actual_expenses - projected_expenses,
+            "variance_balance": actual_balance - projected_balance
+        }
+        rounded = {name: np.round(values.astype(float), 2).tolist() for name, values in columns.items()}
+        months = [str(month) for month in edges[:-1]]
+        
+        return {
+            "total_projected_income": round(float(projected_income.sum()), 2),
+            "total_projected_expenses": round(float(projected_expenses.sum()), 2),
+            "total_projected_balance": round(float(projected_balance.sum()), 2),
+            "total_actual_income": round(float(actual_income.sum()), 2),
+            "total_actual_expenses": round(float(actual_expenses.sum()), 2),
+            "total_actual_balance": round(float(actual_balance.sum()), 2),
+            "projections": [
+                {"month": month, **{name: values[index] for name, values in rounded.items()}}
+                for index, month in enumerate(months)
+            ],
+            "period_months": len(months)
+        }
+
+# Instancia global del servicio
+projection_engine = ProjectionEngine() 
\ No newline at end of file
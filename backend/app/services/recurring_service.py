@@ -0,0 +1,258 @@
+from typing import Optional, Dict, Any, List, Iterable
+from datetime import date, datetime, timedelta, timezone
+import calendar
+from app.config import settings
+from app.services.supabase_service import supabase_service
+from app.services.data_version import data_version_service
+from app.models.recurring import OccurrenceStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Días entre ocurrencias (mensual y anual se cuentan por meses)
+FREQUENCY_DAYS = {"diario": 1, "semanal": 7}
+FREQUENCY_MONTHS = {"mensual": 1, "anual": 12}
+
+# Valores de `in_` por consulta (las claves viajan en la URL)
+IN_FILTER_SIZE = 100
+
+# ultima_materializacion de una plantilla que ya no tendrá más ocurrencias
+FINISHED = "infinity"
+
+def occurrence_key(template_id: str, occurrence_date: date) -> str:
+    """Clave determinista de una ocurrencia: '<plantilla_id>:<fecha>'."""
+    return f"{template_id}:{occurrence_date.isoformat()}"
+
+def _add_months(start: date, months: int) -> date:
+    """Sumar meses conservando el día (el último del mes si ese mes es más corto)."""
+    month = start.month - 1 + months
+    year, month = start.year + month // 12, month % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+def due_dates(start: date, frequency: str, until: date, after: Optional[date] = None) -> List[date]:
+    """Fechas de ocurrencia de una plantilla posteriores a `after` y hasta `until` inclusive."""
+    if until < start:
+        return []
+    
+    if frequency in FREQUENCY_DAYS:
+        step = FREQUENCY_DAYS[frequency]
+        # Primera ocurrencia posterior a `after` sin recorrer las anteriores
+        first = 0 if after is None or after < start else (after - start).days // step + 1
+        return [start + timedelta(days=step * k) for k in range(first, (until - start).days // step + 1)]
+    
+    if frequency in FREQUENCY_MONTHS:
+        step = FREQUENCY_MONTHS[frequency]
+        k = 0 if after is None or after < start else max(0, (after.year - start.year) * 12 + after.month - start.month) // step
+        dates = []
+        while True:
+            occurrence = _add_months(start, k * step)
+            if occurrence > until:
+                return dates
+            if after is None or occurrence > after:
+                dates.append(occurrence)
+            k += 1
+    
+    raise ValueError(f"Frecuencia no soportada: {frequency!r}")
+
+def _chunks(values: List[Any], size: int) -> Iterable[List[Any]]:
+    """Partir una lista en bloques de `size` elementos."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class RecurringService:
+    """Materializar, aprobar y rechazar ocurrencias de movimientos recurrentes."""
+    
+    def __init__(self):
+        """Inicializar servicio de movimientos recurrentes."""
+        self.supabase = supabase_service
+    
+    async def materialize(self, user_id: Optional[str] = None, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Guardar como pendientes las ocurrencias vencidas de las plantillas.
+        
+        Para cada plantilla se calculan las fechas posteriores a su
+        `ultima_materializacion` hasta hoy (o su `fecha_fin`). Las ocurrencias
+        se insertan por bloques ignorando las claves que ya existen, y solo
+        después se avanza `ultima_materializacion`: repetir o interrumpir una
+        materialización no duplica ocurrencias. Sin `user_id`, procesa todos
+        los usuarios.
+        """
+        try:
+            today = today or date.today()
+            
+            def build_query():
+                query = self.supabase.table('movimientos').select(
+                    'id, usuario_id, fecha, categoria_id, monto, tipo, descripcion, frecuencia, fecha_fin, ultima_materializacion'
+                ).eq('es_recurrente', True).lte('fecha', today.isoformat()).or_(
+                    f'ultima_materializacion.is.null,ultima_materializacion.lt.{today.isoformat()}'
+                )
+                if user_id:
+                    query = query.eq('usuario_id', user_id)
+                return query.order('id')
+            
+            templates = await self.supabase.fetch_all(build_query)
+            
+            occurrences = []
+            marks: Dict[str, List[str]] = {}
+            for template in templates:
+                start = date.fromisoformat(template["fecha"])
+                end = date.fromisoformat(template["fecha_fin"]) if template.get("fecha_fin") else None
+                last = template.get("ultima_materializacion")
+                until = min(today, end) if end else today
+                
+                try:
+                    dates = due_dates(start, template["frecuencia"], until, date.fromisoformat(last) if last else None)
+                except ValueError as e:
+                    logger.error(f"❌ Plantilla recurrente {template['id']} omitida: {e}")
+                    continue
+                
+                occurrences.extend({
+                    "clave": occurrence_key(template["id"], occurrence_date),
+                    "plantilla_id": template["id"],
+                    "usuario_id": template["usuario_id"],
+                    "fecha": occurrence_date.isoformat(),
+                    "categoria_id": template.get("categoria_id"),
+                    "monto": template["monto"],
+                    "tipo": template["tipo"],
+                    "descripcion": template.get("descripcion")
+                } for occurrence_date in dates)
+                
+                # Una plantilla que terminó no vuelve a leerse
+                mark = FINISHED if end and end <= today else today.isoformat()
+                marks.setdefault(mark, []).append(template["id"])
+            
+            created = 0
+            for chunk in _chunks(occurrences, settings.MOVEMENT_BATCH_CHUNK_SIZE):
+                result = await self.supabase.upsert_records("ocurrencias_recurrentes", chunk, on_conflict="clave")
+                if not result["success"]:
+                    return {"success": False, "error": result["error"]}
+                created += len(result["data"] or [])
+            
+            for mark, template_ids in marks.items():
+                for chunk in _chunks(template_ids, IN_FILTER_SIZE):
+                    await self.supabase.execute(
+                        self.supabase.table('movimientos').update({"ultima_materializacion": mark}).in_('id', chunk)
+                    )
+            
+            logger.info(f"✅ Recurrentes materializados: {len(templates)} plantillas, {created} ocurrencias nuevas")
+            return {
+                "success": True,
+                "data": {"templates": len(templates), "created": created}
+            }
+        
+        except Exception as e:
+            logger.error(f"❌ Error al materializar movimientos recurrentes: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_occurrences(self, user_id: str, status: OccurrenceStatus = OccurrenceStatus.PENDIENTE, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Obtener las ocurrencias del usuario en un estado, de la más antigua a la más reciente."""
+        try:
+            query = self.supabase.table('ocurrencias_recurrentes').select('*, categorias(nombre)').eq('usuario_id', user_id).eq('estado', status.value).order('fecha').order('clave')
+            if limit:
+                query = query.limit(limit)
+            
+            response = await self.supabase.execute(query)
+            return {"success": True, "data": [self._format_occurrence(row) for row in response.data or []]}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al obtener ocurrencias recurrentes: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def approve(self, user_id: str, keys: List[str]) -> Optional[Dict[str, Any]]:
+        """Aprobar ocurrencias pendientes: insertar sus movimientos por bloques.
+        
+        Cada movimiento lleva la clave de su ocurrencia (índice único), así
+        aprobar dos veces la misma ocurrencia no crea un segundo movimiento.
+        """
+        return await self._decide(user_id, keys, OccurrenceStatus.APROBADA)
+    
+    async def reject(self, user_id: str, keys: List[str]) -> Optional[Dict[str, Any]]:
+        """Rechazar ocurrencias pendientes (la plantilla sigue activa)."""
+        return await self._decide(user_id, keys, OccurrenceStatus.RECHAZADA)
+    
+    async def _decide(self, user_id: str, keys: List[str], decision: OccurrenceStatus) -> Optional[Dict[str, Any]]:
+        """Resolver varias ocurrencias; el resultado informa el estado de cada clave."""
+        try:
+            keys = list(dict.fromkeys(keys))
+            found: Dict[str, Dict[str, Any]] = {}
+            for chunk in _chunks(keys, IN_FILTER_SIZE):
+                response = await self.supabase.execute(
+                    self.supabase.table('ocurrencias_recurrentes').select('*').eq('usuario_id', user_id).in_('clave', chunk)
+                )
+                found.update({row["clave"]: row for row in response.data or []})
+            
+            results: Dict[str, Dict[str, Any]] = {}
+            pending = []
+            for key in keys:
+                row = found.get(key)
+                if row is None:
+                    results[key] = {"key": key, "success": False, "error": "Ocurrencia no encontrada"}
+                elif row["estado"] == decision.value:
+                    # Ya resuelta igual: repetir la petición no cambia nada
+                    results[key] = {"key": key, "success": True}
+                elif row["estado"] != OccurrenceStatus.PENDIENTE.value:
+                    results[key] = {"key": key, "success": False, "error": f"La ocurrencia ya fue {row['estado']}"}
+                else:
+                    pending.append(row)
+            
+            resolved_at = datetime.now(timezone.utc).isoformat()
+            for chunk in _chunks(pending, settings.MOVEMENT_BATCH_CHUNK_SIZE):
+                error = None
+                if decision == OccurrenceStatus.APROBADA:
+                    result = await self.supabase.upsert_records("movimientos", [
+                        {
+                            "usuario_id": user_id,
+                            "fecha": row["fecha"],
+                            "categoria_id": row["categoria_id"],
+                            "monto": row["monto"],
+                            "tipo": row["tipo"],
+                            "descripcion": row["descripcion"],
+                            "es_recurrente": False,
+                            "ocurrencia_clave": row["clave"]
+                        }
+                        for row in chunk
+                    ], on_conflict="ocurrencia_clave")
+                    data_version_service.bump(user_id)
+                    error = None if result["success"] else result["error"]
+                
+                if error is None:
+                    for keys_chunk in _chunks([row["clave"] for row in chunk], IN_FILTER_SIZE):
+                        await self.supabase.execute(
+                            self.supabase.table('ocurrencias_recurrentes').update({
+                                "estado": decision.value,
+                                "resuelta_at": resolved_at
+                            }).eq('usuario_id', user_id).eq('estado', OccurrenceStatus.PENDIENTE.value).in_('clave', keys_chunk)
+                        )
+                
+                for row in chunk:
+                    results[row["clave"]] = {"key": row["clave"], "success": True} if error is None else {"key": row["clave"], "success": False, "error": error}
+            
+            done = sum(1 for result in results.values() if result["success"])
+            logger.info(f"✅ {done}/{len(keys)} ocurrencias {decision.value}s para usuario {user_id}")
+            return {
+                "success": True,
+                "data": {
+                    "resolved": done,
+                    "failed": len(keys) - done,
+                    "results": [results[key] for key in keys]
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"❌ Error al resolver ocurrencias recurrentes: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _format_occurrence(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convertir una fila de ocurrencias_recurrentes al formato de la API."""
+        return {
+            "key": row["clave"],
+            "template_id": row["plantilla_id"],
+            "occurrence_date": row["fecha"],
+            "amount": float(row["monto"]),
+            "category": (row.get("categorias") or {}).get("nombre", "Sin categoría"),
+            "description": row.get("descripcion"),
+            "movement_type": row["tipo"],
+            "status": row["estado"]
+        }
+
+# Instancia global del servicio
+recurring_service = RecurringService() 
\ No newline at end of file
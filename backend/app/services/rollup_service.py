@@ -0,0 +1,43 @@
+from typing import Optional, Dict, Any
+from app.services.supabase_service import supabase_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RollupService:
+    """Servicio para mantener los totales mensuales (`resumen_mensual`).
+    
+    El trigger de la migración 005 aplica los deltas de cada escritura en
+    `movimientos`; este servicio cubre el relleno inicial y la verificación.
+    """
+    
+    def __init__(self):
+        """Inicializar servicio de totales mensuales."""
+        self.supabase = supabase_service
+    
+    async def rebuild(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Reconstruir los totales desde `movimientos` (un usuario o todos)."""
+        try:
+            response = await self.supabase.execute(self.supabase.rpc('reconstruir_resumen_mensual', {"p_usuario_id": user_id}))
+            logger.info(f"✅ Totales mensuales reconstruidos ({response.data} filas)")
+            return {"success": True, "data": {"rows": response.data}}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al reconstruir totales mensuales: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def check(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Comparar los totales guardados con los calculados desde `movimientos`."""
+        try:
+            response = await self.supabase.execute(self.supabase.rpc('verificar_resumen_mensual', {"p_usuario_id": user_id}))
+            differences = response.data or []
+            if differences:
+                logger.warning(f"⚠️ {len(differences)} totales mensuales no coinciden con movimientos")
+            return {"success": True, "data": differences}
+        
+        except Exception as e:
+            logger.error(f"❌ Error al verificar totales mensuales: {e}")
+            return {"success": False, "error": str(e)}
+
+# Instancia global del servicio
+rollup_service = RollupService() 
@@ -0,0 +1,200 @@
+from typing import Optional, Dict, Any, Callable, Awaitable
+from datetime import datetime, timezone
+from app.config import settings
+from app.services.supabase_service import supabase_service
+import asyncio
+import logging
+import os
+import random
+import secrets
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    """Tarea periódica con su intervalo, límite de concurrencia y métricas."""
+    
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        jitter: float,
+        max_concurrency: int = 1,
+        lease: bool = True,
+        timeout: Optional[float] = None
+    ):
+        """Inicializar tarea; `jitter` es la fracción del intervalo que varía al azar."""
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.lease = lease
+        self.timeout = timeout or interval
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.running = 0
+        self.next_run_at: Optional[float] = None
+        self.metrics = {
+            "runs": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped_busy": 0,
+            "skipped_lease": 0,
+            "total_seconds": 0.0,
+            "last_seconds": None,
+            "last_started_at": None,
+            "last_error": None
+        }
+    
+    def next_delay(self) -> float:
+        """Intervalo con variación al azar para que los workers no coincidan."""
+        return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas de ejecución de la tarea."""
+        runs = self.metrics["runs"]
+        return {
+            "interval_seconds": self.interval,
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "next_run_in_seconds": round(max(0.0, self.next_run_at - time.monotonic()), 1) if self.next_run_at else None,
+            "avg_ms": (self.metrics["total_seconds"] / runs * 1000) if runs else 0,
+            "last_ms": self.metrics["last_seconds"] * 1000 if self.metrics["last_seconds"] is not None else None,
+            **{key: value for key, value in self.metrics.items() if key not in ("total_seconds", "last_seconds")}
+        }
+
+class Scheduler:
+    """Planificador asíncrono en proceso para tareas periódicas.
+    
+    Cada tarea corre en su propio bucle con intervalos variados al azar. Si
+    la ejecución anterior sigue en curso y no quedan huecos de concurrencia,
+    el turno se salta (no se acumulan). Con `lease`, antes de ejecutar se toma
+    el lease de la tarea en Postgres (`tomar_lease_tarea`) por un intervalo:
+    con varios workers, cada tarea corre una vez por intervalo en total.
+    """
+    
+    def __init__(self):
+        """Inicializar planificador sin tareas."""
+        self.jobs: Dict[str, Job] = {}
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(3)}"
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._runs: set = set()
+    
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        jitter: Optional[float] = None,
+        max_concurrency: int = 1,
+        lease: bool = True,
+        timeout: Optional[float] = None
+    ) -> Job:
+        """Registrar una tarea periódica."""
+        job = Job(name, func, interval, settings.SCHEDULER_JITTER if jitter is None else jitter, max_concurrency, lease, timeout)
+        self.jobs[name] = job
+        return job
+    
+    def start(self) -> None:
+        """Iniciar los bucles de todas las tareas (desde el lifespan de la app)."""
+        for name, job in self.jobs.items():
+            if name not in self._loops:
+                self._loops[name] = asyncio.create_task(self._loop(job), name=f"scheduler:{name}")
+        logger.info(f"✅ Planificador iniciado ({self.worker_id}): {', '.join(self.jobs) or 'sin tareas'}")
+    
+    async def stop(self) -> None:
+        """Detener los bucles y cancelar las ejecuciones en curso."""
+        tasks = list(self._loops.values()) + list(self._runs)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops.clear()
+        self._runs.clear()
+    
+    async def run_now(self, name: str) -> bool:
+        """Ejecutar una tarea una vez respetando su concurrencia y su lease."""
+        return await self._run(self.jobs[name])
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas de todas las tareas (para /health)."""
+        return {
+            "enabled": bool(self._loops),
+            "worker_id": self.worker_id,
+            "jobs": {name: job.get_metrics() for name, job in self.jobs.items()}
+        }
+    
+    async def _loop(self, job: Job) -> None:
+        """Lanzar la tarea en cada turno sin esperar a que termine la anterior."""
+        # Primer turno repartido dentro del intervalo para no cargar el arranque
+        delay = random.uniform(settings.SCHEDULER_STARTUP_DELAY_SECONDS, settings.SCHEDULER_STARTUP_DELAY_SECONDS + job.interval * job.jitter)
+        while True:
+            job.next_run_at = time.monotonic() + delay
+            await asyncio.sleep(delay)
+            if job.semaphore.locked():
+                job.metrics["skipped_busy"] += 1
+                logger.info(f"⏭️ Tarea {job.name} omitida: ejecución anterior en curso")
+            else:
+                run = asyncio.create_task(self._run(job))
+                self._runs.add(run)
+                run.add_done_callback(self._runs.discard)
+            delay = job.next_delay()
+    
+    async def _run(self, job: Job) -> bool:
+        """Ejecutar la tarea una vez; devuelve si se ejecutó con éxito."""
+        async with job.semaphore:
+            if job.lease and not await self._acquire_lease(job):
+                job.metrics["skipped_lease"] += 1
+                return False
+            
+            job.running += 1
+            job.metrics["runs"] += 1
+            job.metrics["last_started_at"] = datetime.now(timezone.utc).isoformat()
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(job.func(), timeout=job.timeout)
+                job.metrics["succeeded"] += 1
+                job.metrics["last_error"] = None
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.metrics["failed"] += 1
+                job.metrics["last_error"] = str(e) or type(e).__name__
+                logger.error(f"❌ Error en la tarea {job.name}: {job.metrics['last_error']}")
+                # Liberar el lease para que otro worker la reintente en su próximo turno
+                if job.lease:
+                    await self._release_lease(job)
+                return False
+            finally:
+                elapsed = time.perf_counter() - started
+                job.running -= 1
+                job.metrics["total_seconds"] += elapsed
+                job.metrics["last_seconds"] = elapsed
+    
+    async def _acquire_lease(self, job: Job) -> bool:
+        """Tomar el lease de la tarea hasta su próximo turno (o hasta su timeout si es mayor)."""
+        try:
+            response = await supabase_service.execute(supabase_service.rpc('tomar_lease_tarea', {
+                "p_nombre": job.name,
+                "p_propietario": self.worker_id,
+                "p_segundos": int(max(job.interval * (1 - job.jitter), job.timeout))
+            }))
+            return bool(response.data)
+        except Exception as e:
+            logger.error(f"❌ Error al tomar el lease de {job.name}: {e}")
+            return False
+    
+    async def _release_lease(self, job: Job) -> None:
+        """Liberar el lease de la tarea."""
+        try:
+            await supabase_service.execute(supabase_service.rpc('liberar_lease_tarea', {
+                "p_nombre": job.name,
+                "p_propietario": self.worker_id
+            }))
+        except Exception as e:
+            logger.error(f"❌ Error al liberar el lease de {job.name}: {e}")
+
+# Instancia global del planificador
+scheduler = Scheduler() 
\ No newline at end of file
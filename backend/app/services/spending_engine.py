@@ -0,0 +1,172 @@
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from datetime import date, timedelta
+from app.config import settings
+from app.services.supabase_service import supabase_service
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (categoria_id, fecha_inicio, fecha_fin) con fechas ISO "YYYY-MM-DD"
+SpendingWindow = Tuple[Optional[str], str, str]
+
+def split_by_month(start_date: str, end_date: str) -> Tuple[Optional[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Separar un rango en meses completos y días sueltos en los extremos.
+    
+    Devuelve (primer_mes, último_mes) como primeros días de mes, o None si no
+    hay meses completos, y la lista de rangos de días que quedan fuera.
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    
+    first_month = start if start.day == 1 else _add_months(start.replace(day=1), 1)
+    after_end = end + timedelta(days=1)
+    # Mes siguiente al último mes completo
+    months_end = after_end if after_end.day == 1 else after_end.replace(day=1)
+    
+    if first_month >= months_end:
+        return None, [(start_date, end_date)]
+    
+    edges = []
+    if start < first_month:
+        edges.append((start_date, (first_month - timedelta(days=1)).isoformat()))
+    if months_end <= end:
+        edges.append((months_end.isoformat(), end_date))
+    return (first_month.isoformat(), _add_months(months_end, -1).isoformat()), edges
+
+def _add_months(month_start: date, months: int) -> date:
+    """Sumar meses a un primer día de mes."""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+class SpendingEngine:
+    """Calcular gasto por (categoria_id, rango de fechas) para muchos presupuestos a la vez."""
+    
+    def __init__(self):
+        """Inicializar motor de gasto."""
+        self.supabase = supabase_service
+    
+    async def get_totals(self, user_id: str, windows: Sequence[SpendingWindow]) -> List[float]:
+        """Obtener el gasto de cada ventana.
+        
+        Con los totales mensuales activos, los meses completos de cada ventana
+        se leen de `resumen_mensual` y solo los días sueltos de los extremos
+        desde `movimientos` (dos consultas en paralelo como máximo).
+        """
+        if not settings.ROLLUPS_ENABLED:
+            return await self._get_movement_totals(user_id, windows)
+        
+        month_windows: List[SpendingWindow] = []
+        edge_windows: List[SpendingWindow] = []
+        owners: List[Tuple[bool, int]] = []
+        for index, (category_id, start_date, end_date) in enumerate(windows):
+            months, edges = split_by_month(start_date, end_date)
+            if months:
+                month_windows.append((category_id, *months))
+                owners.append((True, index))
+            for edge in edges:
+                edge_windows.append((category_id, *edge))
+                owners.append((False, index))
+        
+        month_totals, edge_totals = await asyncio.gather(
+            self._get_rollup_totals(user_id, month_windows),
+            self._get_movement_totals(user_id, edge_windows)
+        )
+        
+        totals = [0.0] * len(windows)
+        month_iter, edge_iter = iter(month_totals), iter(edge_totals)
+        for from_rollup, index in owners:
+            totals[index] += next(month_iter) if from_rollup else next(edge_iter)
+        return totals
+    
+    async def _get_rollup_totals(self, user_id: str, windows: Sequence[SpendingWindow]) -> List[float]:
+        """Sumar meses completos desde `resumen_mensual` (fechas = primer día del mes)."""
+        ranges = self.merge_windows(windows)
+        if not ranges:
+            return [0.0] * len(windows)
+        
+        filters = ",".join(
+            f"and(categoria_id.eq.{category_id},mes.gte.{start_date},mes.lte.{end_date})"
+            for category_id, start_date, end_date in ranges
+        )
+        rows = await self.supabase.fetch_all(
+            lambda: self.supabase.table('resumen_mensual').select('categoria_id, mes, total').eq('usuario_id', user_id).eq('tipo', 'Gasto').or_(filters).order('categoria_id').order('mes')
+        )
+        return self.compute_totals(
+            [{"categoria_id": row["categoria_id"], "fecha": row["mes"], "monto": float(row["total"])} for row in rows],
+            windows
+        )
+    
+    async def _get_movement_totals(self, user_id: str, windows: Sequence[SpendingWindow]) -> List[float]:
+        """Obtener el gasto de cada ventana con una sola consulta de movimientos.
+        
+        La consulta lee solo los gastos dentro de alguna ventana (unión de
+        rangos por categoría); el índice (usuario_id, categoria_id, fecha)
+        resuelve cada rango sin recorrer el resto de movimientos del usuario.
+        """
+        ranges = self.merge_windows(windows)
+        if not ranges:
+            return [0.0] * len(windows)
+        
+        filters = ",".join(
+            f"and(categoria_id.eq.{category_id},fecha.gte.{start_date},fecha.lte.{end_date})"
+            for category_id, start_date, end_date in ranges
+        )
+        rows = await self.supabase.fetch_all(
+            lambda: self.supabase.table('movimientos').select('categoria_id, fecha, monto').eq('usuario_id', user_id).eq('tipo', 'Gasto').eq('es_recurrente', False).or_(filters).order('categoria_id').order('fecha').order('id')
+        )
+        return self.compute_totals(rows, windows)
+    
+    @staticmethod
+    def merge_windows(windows: Sequence[SpendingWindow]) -> List[SpendingWindow]:
+        """Unir las ventanas que se solapan dentro de cada categoría."""
+        merged: List[SpendingWindow] = []
+        for category_id, start_date, end_date in sorted(w for w in windows if w[0]):
+            if merged and merged[-1][0] == category_id and start_date <= merged[-1][2]:
+                if end_date > merged[-1][2]:
+                    merged[-1] = (category_id, merged[-1][1], end_date)
+            else:
+                merged.append((category_id, start_date, end_date))
+        return merged
+    
+    @staticmethod
+    def compute_totals(rows: Sequence[Dict[str, Any]], windows: Sequence[SpendingWindow]) -> List[float]:
+        """Sumar las ventanas en una pasada sobre los movimientos.
+        
+        Agrupa los movimientos por categoría (ordenados por fecha) con sumas
+        prefijas; cada ventana se resuelve con dos búsquedas binarias.
+        """
+        dates: Dict[str, List[str]] = {}
+        amounts: Dict[str, List[float]] = {}
+        for mov in rows:
+            category_id = mov["categoria_id"]
+            if category_id not in dates:
+                dates[category_id] = []
+                amounts[category_id] = []
+            dates[category_id].append(mov["fecha"])
+            amounts[category_id].append(mov["monto"])
+        
+        prefix = {}
+        for category_id, category_dates in dates.items():
+            # Las filas llegan ordenadas por fecha; ordenar solo si no es así
+            if any(a > b for a, b in zip(category_dates, category_dates[1:])):
+                pairs = sorted(zip(category_dates, amounts[category_id]))
+                dates[category_id] = [fecha for fecha, _ in pairs]
+                amounts[category_id] = [monto for _, monto in pairs]
+            prefix[category_id] = list(accumulate(amounts[category_id], initial=0))
+        
+        totals = []
+        for category_id, start_date, end_date in windows:
+            category_dates = dates.get(category_id)
+            if not category_dates:
+                totals.append(0.0)
+                continue
+            low = bisect_left(category_dates, start_date)
+            high = bisect_right(category_dates, end_date)
+            totals.append(prefix[category_id][high] - prefix[category_id][low])
+        return totals
+
+# Instancia global del servicio
+spending_engine = SpendingEngine()
@@ -1,21 +1,59 @@
-from supabase import create_client, Client
-from typing import Optional, Dict, Any, List
+from supabase import create_client, Client, AsyncClient, AsyncClientOptions
+from typing import Optional, Dict, Any, List, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
 from app.config import settings
+import asyncio
+import httpx
+import inspect
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Contador de consultas de la petición en curso (ver `count_calls`)
+_call_counter: ContextVar[Optional[Dict[str, int]]] = ContextVar("supabase_call_counter", default=None)
+
 class SupabaseService:
     """Servicio base para interactuar con Supabase."""
     
     def __init__(self):
         """Inicializar cliente de Supabase."""
         try:
+            self.mode = settings.SUPABASE_CLIENT_MODE
             self.client: Client = create_client(
                 settings.SUPABASE_URL,
                 settings.SUPABASE_KEY
             )
-            logger.info("✅ Cliente de Supabase inicializado correctamente")
+            # Pool HTTP compartido por el cliente asíncrono: las consultas
+            # concurrentes reutilizan conexiones en lugar de abrir una por petición
+            self.http_client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                timeout=settings.SUPABASE_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS
+                )
+            )
+            self.async_client: AsyncClient = AsyncClient(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                AsyncClientOptions(httpx_client=self.http_client)
+            )
+            self.executor: Optional[ThreadPoolExecutor] = None
+            self._semaphore: Optional[asyncio.Semaphore] = None
+            self._semaphore_loop = None
+            self.metrics = {
+                "waiting": 0,
+                "in_flight": 0,
+                "total_calls": 0,
+                "total_wait_seconds": 0.0,
+                "max_wait_seconds": 0.0
+            }
+            logger.info(f"✅ Cliente de Supabase inicializado correctamente (modo {self.mode})")
         except Exception as e:
             logger.error(f"❌ Error al inicializar Supabase: {e}")
             raise
@@ -24,7 +62,7 @@ class SupabaseService:
         """Probar conexión a Supabase."""
         try:
             # Intentar hacer una consulta simple
-            response = self.client.table('usuarios').select('id').limit(1).execute()
+            response = await self.execute(self.table('usuarios').select('id').limit(1))
             logger.info("✅ Conexión a Supabase exitosa")
             return True
         except Exception as e:
@@ -32,13 +70,146 @@ class SupabaseService:
             return False
     
     def get_client(self) -> Client:
-        """Obtener cliente de Supabase."""
+        """Obtener cliente síncrono de Supabase."""
         return self.client
     
+    def get_active_client(self):
+        """Obtener el cliente usado por el modo configurado."""
+        return self.async_client if self.mode == "async" else self.client
+    
+    def get_max_in_flight(self) -> int:
+        """Límite de consultas simultáneas para el modo actual."""
+        if self.mode == "threadpool":
+            return min(settings.SUPABASE_MAX_IN_FLIGHT, settings.SUPABASE_THREADPOOL_SIZE)
+        return settings.SUPABASE_MAX_IN_FLIGHT
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Obtener (o crear) el pool de hilos para el cliente síncrono."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.SUPABASE_THREADPOOL_SIZE,
+                thread_name_prefix="supabase"
+            )
+        return self.executor
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Obtener el semáforo de consultas del event loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.get_max_in_flight())
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    @asynccontextmanager
+    async def _slot(self):
+        """Esperar un hueco libre y registrar cuánto tardó en llegar."""
+        semaphore = self._get_semaphore()
+        self.metrics["waiting"] += 1
+        start = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.metrics["waiting"] -= 1
+        
+        wait = time.perf_counter() - start
+        self.metrics["total_calls"] += 1
+        self.metrics["total_wait_seconds"] += wait
+        self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], wait)
+        self.metrics["in_flight"] += 1
+        try:
+            yield
+        finally:
+            self.metrics["in_flight"] -= 1
+            semaphore.release()
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Métricas de concurrencia de las consultas a Supabase."""
+        total_calls = self.metrics["total_calls"]
+        return {
+            "mode": self.mode,
+            "max_in_flight": self.get_max_in_flight(),
+            "queue_depth": self.metrics["waiting"],
+            "in_flight": self.metrics["in_flight"],
+            "total_calls": total_calls,
+            "avg_wait_ms": (self.metrics["total_wait_seconds"] / total_calls * 1000) if total_calls else 0,
+            "max_wait_ms": self.metrics["max_wait_seconds"] * 1000
+        }
+    
+    def table(self, table_name: str):
+        """Iniciar una consulta sobre una tabla con el cliente activo."""
+        return self.get_active_client().table(table_name)
+    
+    def rpc(self, function_name: str, params: Optional[Dict[str, Any]] = None):
+        """Iniciar la llamada a una función de Postgres con el cliente activo."""
+        return self.get_active_client().rpc(function_name, params or {})
+    
+    @property
+    def auth(self):
+        """Cliente de autenticación del cliente activo."""
+        return self.get_active_client().auth
+    
+    @contextmanager
+    def count_calls(self):
+        """Contar las consultas hechas dentro del bloque (también desde las tareas que lance)."""
+        counter = {"calls": 0}
+        token = _call_counter.set(counter)
+        try:
+            yield counter
+        finally:
+            _call_counter.reset(token)
+    
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecutar una operación del cliente según el modo configurado."""
+        counter = _call_counter.get()
+        if counter is not None:
+            counter["calls"] += 1
+        
+        if self.mode == "sync":
+            # Modo original: la llamada bloquea el event loop
+            return func(*args, **kwargs)
+        
+        async with self._slot():
+            if self.mode == "threadpool":
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+            
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+    
+    async def execute(self, query) -> Any:
+        """Ejecutar una consulta construida con `table()`."""
+        return await self.call(query.execute)
+    
+    async def close(self) -> None:
+        """Cerrar las conexiones HTTP del pool y el pool de hilos."""
+        await self.http_client.aclose()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+    
+    async def fetch_all(self, build_query: Callable[[], Any], page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Leer todas las filas de una consulta ordenada, paginando con `range()`.
+        
+        PostgREST limita las filas por respuesta (1000 por defecto en Supabase),
+        así que una sola consulta grande puede devolver datos truncados.
+        `build_query` debe construir una consulta nueva en cada llamada.
+        """
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = await self.execute(build_query().range(offset, offset + page_size - 1))
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+    
     async def execute_query(self, query_func) -> Optional[Dict[str, Any]]:
         """Ejecutar una consulta con manejo de errores."""
         try:
-            result = query_func()
+            result = await self.call(query_func)
             return {"success": True, "data": result.data, "error": None}
         except Exception as e:
             logger.error(f"❌ Error en consulta Supabase: {e}")
@@ -47,7 +218,16 @@ class SupabaseService:
     async def insert_record(self, table: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Insertar un registro en una tabla."""
         try:
-            response = self.client.table(table).insert(data).execute()
+            response = await self.execute(self.table(table).insert(data))
+            return {"success": True, "data": response.data, "error": None}
+        except Exception as e:
+            logger.error(f"❌ Error al insertar en {table}: {e}")
+            return {"success": False, "data": None, "error": str(e)}
+    
+    async def upsert_records(self, table: str, data: List[Dict[str, Any]], on_conflict: str) -> Optional[Dict[str, Any]]:
+        """Insertar registros ignorando los que ya existen según `on_conflict` (devuelve solo los nuevos)."""
+        try:
+            response = await self.execute(self.table(table).upsert(data, on_conflict=on_conflict, ignore_duplicates=True))
             return {"success": True, "data": response.data, "error": None}
         except Exception as e:
             logger.error(f"❌ Error al insertar en {table}: {e}")
@@ -56,36 +236,50 @@ class SupabaseService:
     async def get_records(self, table: str, filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """Obtener registros de una tabla con filtros opcionales."""
         try:
-            query = self.client.table(table).select('*')
+            query = self.table(table).select('*')
             
             if filters:
                 for key, value in filters.items():
                     if value is not None:
                         query = query.eq(key, value)
             
-            response = query.execute()
+            response = await self.execute(query)
             return {"success": True, "data": response.data, "error": None}
         except Exception as e:
             logger.error(f"❌ Error al obtener registros de {table}: {e}")
             return {"success": False, "data": None, "error": str(e)}
     
-    async def update_record(self, table: str, record_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Actualizar un registro en una tabla."""
+    async def update_record(self, table: str, record_id: str, data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Actualizar un registro en una tabla.
+        
+        Con `user_id` solo se actualiza si el registro pertenece al usuario;
+        `data` vacío indica que no existe o no es suyo.
+        """
         try:
-            response = self.client.table(table).update(data).eq('id', record_id).execute()
+            query = self.table(table).update(data).eq('id', record_id)
+            if user_id is not None:
+                query = query.eq('usuario_id', user_id)
+            response = await self.execute(query)
             return {"success": True, "data": response.data, "error": None}
         except Exception as e:
             logger.error(f"❌ Error al actualizar en {table}: {e}")
             return {"success": False, "data": None, "error": str(e)}
     
-    async def delete_record(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
-        """Eliminar un registro de una tabla."""
+    async def delete_record(self, table: str, record_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Eliminar un registro de una tabla (con `user_id`, solo si es del usuario)."""
         try:
-            response = self.client.table(table).delete().eq('id', record_id).execute()
+            query = self.table(table).delete().eq('id', record_id)
+            if user_id is not None:
+                query = query.eq('usuario_id', user_id)
+            response = await self.execute(query)
             return {"success": True, "data": response.data, "error": None}
         except Exception as e:
             logger.error(f"❌ Error al eliminar de {table}: {e}")
             return {"success": False, "data": None, "error": str(e)}
 
-# Instancia global del servicio
-supabase_service = SupabaseService() 
\ No newline at end of file
+# Instancia global del servicio ("memory": mismo contrato sobre una base de datos en memoria)
+if settings.SUPABASE_BACKEND == "memory":
+    from app.services.memory_backend import MemorySupabaseService
+    supabase_service = MemorySupabaseService()
+else:
+    supabase_service = SupabaseService() 
\ No newline at end of file
@@ -0,0 +1 @@
+# Financial Control Backend - Benchmarks
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de la API (p50/p99) con RTT simulado hacia Supabase.
+
+Levanta el servidor de `benchmarks.postgrest_server` con los datos de un
+usuario (un año de movimientos, presupuestos y elementos del presupuesto),
+apunta el cliente `supabase` de la API a él y mide cada ruta con 20, 40 y
+80 ms de RTT por consulta. Junto a p50/p99 informa cuántas consultas hace
+cada petición a Supabase, que es lo que multiplica la latencia de red.
+
+Uso (desde backend/):
+    python -m benchmarks.api_latency
+    python -m benchmarks.api_latency --rtt 0.02 0.08 --jitter 0.005 --requests 200 --concurrency 10
+    python -m benchmarks.api_latency --error-rate 0.01 --output latencia.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import socket
+import time
+from datetime import date, timedelta
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+CATEGORIES = {
+    "Comida": "Gasto",
+    "Transporte": "Gasto",
+    "Hogar": "Gasto",
+    "Ocio": "Gasto",
+    "Salario": "Ingreso"
+}
+
+def scenarios(today: date):
+    """Rutas medidas: (nombre, método, ruta, cuerpo)."""
+    return [
+        ("login", "POST", "/api/v1/auth/login", {"email": EMAIL, "password": PASSWORD}),
+        ("movements", "GET", "/api/v1/movements?limit=50", None),
+        ("financial-summary", "GET", "/api/v1/reports/financial-summary", None),
+        ("budgets", "GET", "/api/v1/budgets", None),
+        ("budget-projections", "GET", "/api/v1/budget-projections?months=12", None),
+        ("create-movement", "POST", "/api/v1/movements", {
+            "amount": 12.5,
+            "category": "Comida",
+            "movement_type": "Gasto",
+            "movement_date": today.isoformat(),
+            "description": "benchmark"
+        })
+    ]
+
+def seed(database, movements: int, today: date, seed_value: int) -> None:
+    """Cargar un usuario con movimientos del último año, presupuestos y elementos del presupuesto."""
+    rng = random.Random(seed_value)
+    category_ids = {name: f"00000000-0000-0000-0001-{index:012d}" for index, name in enumerate(CATEGORIES)}
+    expense_categories = [name for name, kind in CATEGORIES.items() if kind == "Gasto"]
+    start = today - timedelta(days=365)
+
+    rows = []
+    for index in range(movements):
+        category = "Salario" if index % 20 == 0 else rng.choice(expense_categories)
+        rows.append({
+            "usuario_id": USER_ID,
+            "fecha": (start + timedelta(days=rng.randrange(366))).isoformat(),
+            "categoria_id": category_ids[category],
+            "monto": round(rng.uniform(2000, 4000) if category == "Salario" else rng.uniform(5, 300), 2),
+            "tipo": CATEGORIES[category],
+            "descripcion": f"Movimiento {index}"
+        })
+
+    database.load({
+        "auth_users": [{"id": USER_ID, "email": EMAIL, "password": PASSWORD, "name": "Bench"}],
+        "usuarios": [{"id": USER_ID, "email": EMAIL, "name": "Bench"}],
+        "categorias": [{"id": category_ids[name], "usuario_id": USER_ID, "nombre": name, "tipo": kind} for name, kind in CATEGORIES.items()],
+        "movimientos": rows,
+        "presupuestos": [{
+            "usuario_id": USER_ID,
+            "categoria_id": category_ids[name],
+            "monto_maximo": 800,
+            "periodo": "mensual",
+            "fecha_inicio": start.isoformat(),
+            "fecha_fin": (today + timedelta(days=365)).isoformat()
+        } for name in expense_categories],
+        "presupuesto_items": [
+            {"usuario_id": USER_ID, "nombre": "Sueldo", "monto": 3000, "tipo": "ingreso_recurrente", "categoria_id": category_ids["Salario"], "frecuencia": "mensual", "fecha_inicio": start.isoformat()},
+            {"usuario_id": USER_ID, "nombre": "Arriendo", "monto": 900, "tipo": "gasto_proyectado", "categoria_id": category_ids["Hogar"], "frecuencia": "mensual", "fecha_inicio": start.isoformat()},
+            {"usuario_id": USER_ID, "nombre": "Mercado", "monto": 120, "tipo": "gasto_proyectado", "categoria_id": category_ids["Comida"], "frecuencia": "semanal", "fecha_inicio": start.isoformat()},
+            {"usuario_id": USER_ID, "nombre": "Seguro", "monto": 600, "tipo": "gasto_proyectado", "categoria_id": category_ids["Transporte"], "frecuencia": "anual", "fecha_inicio": start.isoformat()}
+        ]
+    })
+
+def percentile(values, fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+async def measure(client, method: str, path: str, body, total: int, concurrency: int):
+    """Lanzar `total` peticiones con `concurrency` clientes; devolver latencias y errores."""
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+async def main(args):
+    # La configuración se lee al importar la app: apuntarla al servidor local antes
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["SUPABASE_KEY"] = "benchmark-key"
+    os.environ["SUPABASE_BACKEND"] = "supabase"
+
+    import httpx
+    from benchmarks.postgrest_server import Faults, PostgrestServer, create_app
+    from app.main import app
+    from app.services.supabase_service import supabase_service
+
+    # El log por petición de httpx distorsiona la medición
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    today = date.today()
+    faults = Faults(jitter=args.jitter, seed=args.seed)
+    server = PostgrestServer(create_app(faults=faults), port=port).start()
+    database = server.app.state.database
+    seed(database, args.movements, today, args.seed)
+    database.rpc_regenerar_ocurrencias_presupuesto(USER_ID, today.isoformat(), (today + timedelta(days=400)).isoformat())
+    stats = server.app.state.stats
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        # Sin latencia ni errores para el login inicial
+        response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['token']['access_token']}"
+
+        print(f"Movimientos: {args.movements}  jitter: ±{args.jitter * 1000:.0f} ms  errores inyectados: {args.error_rate:.1%}")
+        print(f"{'ruta':<22}{'RTT (ms)':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}{'consultas/pet.':>16}{'errores':>9}")
+        for rtt in args.rtt:
+            faults.latency, faults.error_rate = rtt, args.error_rate
+            for name, method, path, body in scenarios(today):
+                calls_before = stats["total"]
+                latencies, errors = await measure(client, method, path, body, args.requests, args.concurrency)
+                calls = (stats["total"] - calls_before) / args.requests
+                p50, p99 = percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+                results.append({
+                    "route": name,
+                    "rtt_ms": rtt * 1000,
+                    "p50_ms": p50,
+                    "p99_ms": p99,
+                    "supabase_calls_per_request": calls,
+                    "errors": errors,
+                    "requests": args.requests
+                })
+                print(f"{name:<22}{rtt * 1000:>10.0f}{p50:>11.1f}{p99:>11.1f}{calls:>16.1f}{errors:>9}")
+
+    await supabase_service.close()
+    server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "movements": args.movements,
+                "concurrency": args.concurrency,
+                "jitter_ms": args.jitter * 1000,
+                "error_rate": args.error_rate,
+                "results": results
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt", type=float, nargs="+", default=[0.02, 0.04, 0.08], help="RTT por consulta en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación máxima del RTT (±) en segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de que una consulta falle")
+    parser.add_argument("--requests", type=int, default=100, help="Peticiones por ruta y RTT")
+    parser.add_argument("--concurrency", type=int, default=10, help="Clientes concurrentes")
+    parser.add_argument("--movements", type=int, default=2000, help="Movimientos del usuario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Guardar resultados en un archivo JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark de peticiones por segundo: cliente Supabase síncrono vs asíncrono.
+
+Levanta un servidor HTTP local que imita PostgREST con una latencia fija por
+petición y ejecuta la API en proceso (transporte ASGI) con varios niveles de
+concurrencia, primero en modo "sync" (antes) y luego en los modos "threadpool"
+y "async" (después).
+
+Por defecto el servidor es `benchmarks.postgrest_server` en un proceso aparte.
+Con `--server stub` se usa el servidor mínimo en un hilo de este proceso: sus
+hilos compiten por el GIL con el event loop de la API y penalizan sobre todo
+al modo "async", así que no sirve para comparar modos. Además de req/s se
+mide la duración media de cada consulta a Supabase y la de un GET con httpx
+directo al mismo servidor, para separar el coste del cliente del de la red.
+
+Uso (desde backend/):
+    python -m benchmarks.async_io
+    python -m benchmarks.async_io --latency 0.05 --requests 1000 --concurrency 50 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    """Responde cualquier consulta REST tras esperar la latencia configurada."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.02
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = self.rfile.read(length) if length else b""
+
+        time.sleep(self.latency)
+
+        if self.command == "POST" and payload:
+            # Devolver las filas insertadas con un id, como return=representation
+            rows = json.loads(payload)
+            rows = [dict(row, id=str(uuid.uuid4())) for row in (rows if isinstance(rows, list) else [rows])]
+        elif self.path.startswith("/rest/v1/usuarios"):
+            rows = [{"id": USER_ID, "email": "bench@example.com", "name": "Bench"}]
+        else:
+            rows = []
+
+        body = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+class FakePostgrestServer(ThreadingHTTPServer):
+    """Servidor con cola de conexiones amplia para no limitar la concurrencia."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+def start_fake_postgrest(latency: float) -> ThreadingHTTPServer:
+    """Iniciar el servidor simulado en un puerto libre."""
+    FakePostgrestHandler.latency = latency
+    server = FakePostgrestServer(("127.0.0.1", 0), FakePostgrestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_postgrest_process(latency: float):
+    """Iniciar `benchmarks.postgrest_server` en otro proceso con el usuario del benchmark."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    fixture = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    with fixture:
+        json.dump({"usuarios": [{"id": USER_ID, "email": "bench@example.com", "name": "Bench"}]}, fixture)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.postgrest_server", "--port", str(port),
+         "--latency", str(latency), "--fixture", fixture.name],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("benchmarks.postgrest_server no arrancó")
+            time.sleep(0.05)
+    os.unlink(fixture.name)
+    return process, f"http://127.0.0.1:{port}"
+
+def time_calls(supabase_service) -> dict:
+    """Acumular la duración de cada consulta (incluida la espera por un hueco)."""
+    stats = {"calls": 0, "seconds": 0.0}
+    call = supabase_service.call
+
+    async def timed_call(func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await call(func, *args, **kwargs)
+        finally:
+            stats["calls"] += 1
+            stats["seconds"] += time.perf_counter() - start
+
+    supabase_service.call = timed_call
+    return stats
+
+async def raw_httpx_ms(url: str, total: int, concurrency: int) -> float:
+    """Duración media de un GET con httpx directo, con la misma concurrencia."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    durations = []
+    remaining = total
+
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get("/rest/v1/usuarios", params={"select": "id", "id": f"eq.{USER_ID}"})
+                response.raise_for_status()
+                durations.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return sum(durations) / len(durations) * 1000
+
+async def run_load(app, token: str, path: str, total: int, concurrency: int) -> float:
+    """Lanzar `total` peticiones con `concurrency` clientes y devolver req/s."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = total
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return total / elapsed
+
+async def main(args):
+    server = process = None
+    if args.server == "stub":
+        server = start_fake_postgrest(args.latency)
+        host, port = server.server_address
+        url = f"http://{host}:{port}"
+    else:
+        process, url = start_postgrest_process(args.latency)
+
+    # La configuración se lee al importar la app: apuntarla al servidor local
+    os.environ["SUPABASE_BACKEND"] = "supabase"
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_KEY"] = "benchmark-key"
+
+    from app.main import app
+    from app.services.supabase_service import supabase_service
+    from app.services.auth_service import auth_service
+
+    # El log por petición de httpx distorsiona la medición
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    token = auth_service.create_access_token(data={"sub": USER_ID})
+    calls = time_calls(supabase_service)
+    results = []
+
+    print(f"Servidor: {args.server}, latencia simulada por consulta: {args.latency * 1000:.0f} ms")
+    print(f"{'modo':<12}{'clientes':>10}{'peticiones':>12}{'req/s':>10}{'ms/consulta':>13}{'espera máx (ms)':>18}")
+    for concurrency in args.concurrency:
+        raw_ms = await raw_httpx_ms(url, args.requests, concurrency)
+        results.append({"mode": "httpx", "concurrency": concurrency, "requests": args.requests, "call_ms": raw_ms})
+        print(f"{'httpx':<12}{concurrency:>10}{args.requests:>12}{'':>10}{raw_ms:>13.1f}")
+    for mode in args.modes:
+        supabase_service.mode = mode
+        for concurrency in args.concurrency:
+            supabase_service.metrics["max_wait_seconds"] = 0.0
+            calls.update(calls=0, seconds=0.0)
+            rps = await run_load(app, token, args.path, args.requests, concurrency)
+            max_wait_ms = supabase_service.get_pool_metrics()["max_wait_ms"]
+            call_ms = calls["seconds"] / calls["calls"] * 1000 if calls["calls"] else 0.0
+            results.append({
+                "mode": mode,
+                "concurrency": concurrency,
+                "requests": args.requests,
+                "rps": rps,
+                "call_ms": call_ms,
+                "max_wait_ms": max_wait_ms
+            })
+            print(f"{mode:<12}{concurrency:>10}{args.requests:>12}{rps:>10.1f}{call_ms:>13.1f}{max_wait_ms:>18.1f}")
+
+    await supabase_service.close()
+    if server is not None:
+        server.shutdown()
+    if process is not None:
+        process.terminate()
+        process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"server": args.server, "latency": args.latency, "path": args.path, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["postgrest", "stub"], default="postgrest",
+                        help="postgrest: benchmarks.postgrest_server en otro proceso; stub: servidor mínimo en este proceso")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latencia por consulta en segundos")
+    parser.add_argument("--requests", type=int, default=400, help="Peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200], help="Clientes concurrentes")
+    parser.add_argument("--modes", nargs="+", default=["sync", "threadpool", "async"], help="Modos del cliente a comparar")
+    parser.add_argument("--path", default="/api/v1/movements", help="Ruta de la API a medir")
+    parser.add_argument("--output", help="Guardar resultados en un archivo JSON")
+    asyncio.run(main(parser.parse_args()))
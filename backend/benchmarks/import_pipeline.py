@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la importación de extractos (filas por segundo y memoria).
+
+Genera un CSV de extracto bancario en un archivo temporal y lo importa con
+ImportService:
+
+- "validar": lectura, normalización y armado de bloques, sin escribir;
+- "escribir": además inserta cada bloque en un servidor local que imita
+  PostgREST (ver benchmarks.async_io), con la latencia indicada.
+
+Con --memory informa el pico de memoria (tracemalloc), que no debe crecer con
+el tamaño del archivo.
+
+Uso (desde backend/):
+    python -m benchmarks.import_pipeline
+    python -m benchmarks.import_pipeline --rows 500000 --memory
+    python -m benchmarks.import_pipeline --modes escribir --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.async_io import USER_ID, start_fake_postgrest
+
+CATEGORIES = ["Comida", "Transporte", "Vivienda", "Servicios", "Salud", "Ocio", "Ropa", "Educación"]
+
+def generate_statement(path: str, rows: int, seed: int) -> None:
+    """Escribir un extracto CSV con separador ";" y montos con coma decimal."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * 5)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Fecha;Concepto;Importe;Categoría\n")
+        for i in range(rows):
+            day = start + timedelta(days=rng.randrange(365 * 5))
+            amount = rng.uniform(1, 900) * (1 if i % 10 == 0 else -1)
+            f.write(f"{day:%d/%m/%Y};Movimiento {i};{amount:.2f}".replace(".", ",") + f";{rng.choice(CATEGORIES)}\n")
+
+async def run_import(path: str, dry_run: bool, chunk_size: int, memory: bool) -> dict:
+    """Importar el archivo y devolver filas/s y pico de memoria."""
+    from app.services.import_service import import_service
+
+    if memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="") as f:
+        async for event in import_service.import_movements(USER_ID, f, chunk_size=chunk_size, dry_run=dry_run, decimal=","):
+            last = event
+    elapsed = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    return {
+        "rows": last["processed"],
+        "created": last["created"],
+        "failed": last["failed"],
+        "seconds": elapsed,
+        "rows_per_second": last["processed"] / elapsed,
+        "peak_mb": peak_mb
+    }
+
+async def main(args):
+    server = start_fake_postgrest(args.latency)
+    host, port = server.server_address
+
+    # La configuración se lee al importar la app: apuntarla al servidor local
+    os.environ["SUPABASE_URL"] = f"http://{host}:{port}"
+    os.environ["SUPABASE_KEY"] = "benchmark-key"
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    from app.services.supabase_service import supabase_service
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extracto.csv")
+        generate_statement(path, args.rows, args.seed)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Extracto: {args.rows} filas ({size_mb:.1f} MB), bloques de {args.chunk_size}")
+        print(f"{'modo':<12}{'filas/s':>12}{'segundos':>10}{'errores':>10}{'pico (MB)':>12}")
+
+        for mode in args.modes:
+            result = await run_import(path, mode == "validar", args.chunk_size, args.memory)
+            result["mode"] = mode
+            results.append(result)
+            peak = f"{result['peak_mb']:.1f}" if result["peak_mb"] is not None else "-"
+            print(f"{mode:<12}{result['rows_per_second']:>12.0f}{result['seconds']:>10.1f}{result['failed']:>10}{peak:>12}")
+
+    await supabase_service.close()
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "chunk_size": args.chunk_size, "latency": args.latency, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Filas del extracto")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Movimientos por bloque")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia por consulta en segundos (modo escribir)")
+    parser.add_argument("--modes", nargs="+", default=["validar", "escribir"], choices=["validar", "escribir"], help="Modos a medir")
+    parser.add_argument("--memory", action="store_true", help="Medir el pico de memoria (más lento)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--output", help="Guardar resultados en un archivo JSON")
+    asyncio.run(main(parser.parse_args()))
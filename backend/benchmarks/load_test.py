@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de punta a punta: sesiones como las del frontend contra la API.
+
+Cada usuario virtual se registra (con movimientos y un presupuesto iniciales),
+inicia sesión y repite flujos elegidos al azar según `--mix` hasta agotar
+`--duration`:
+
+- login: POST /auth/login (nueva sesión);
+- dashboard: financial-summary del mes, budget-summary y movimientos en paralelo;
+- create_movement: POST /movements;
+- edit_budget: PUT /budgets/{id}.
+
+La API (app.main) corre en el mismo proceso, por transporte ASGI o servida
+por uvicorn en un socket local, sobre el backend en memoria, el servidor
+PostgREST simulado con RTT/errores inyectados o la configuración del
+entorno. El informe JSON (rendimiento, percentiles por ruta y consultas a
+Supabase por petición) se puede comparar entre versiones con `--compare`.
+
+Uso (desde backend/):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --users 50 --duration 60 --transport socket
+    python -m benchmarks.load_test --backend postgrest --rtt 0.04 --mix dashboard=6,create_movement=2,edit_budget=1,login=1
+    python -m benchmarks.load_test --output nueva.json --compare anterior.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.api_latency import percentile
+
+API = "/api/v1"
+PASSWORD = "load-test-password"
+EXPENSE_CATEGORIES = ["Comida", "Transporte", "Hogar", "Ocio", "Salud"]
+DEFAULT_MIX = "dashboard=6,create_movement=2,edit_budget=1,login=1"
+
+class CallCounter:
+    """Envoltorio ASGI que cuenta las consultas a Supabase de cada petición (cabecera x-load-request)."""
+
+    def __init__(self, app, service):
+        self.app = app
+        self.service = service
+        self.calls = {}
+
+    async def __call__(self, scope, receive, send):
+        request_id = dict(scope.get("headers") or []).get(b"x-load-request")
+        if scope["type"] != "http" or request_id is None:
+            return await self.app(scope, receive, send)
+        with self.service.count_calls() as counter:
+            # Se guarda antes de responder: el cliente lo lee al recibir la respuesta
+            self.calls[request_id.decode()] = counter
+            await self.app(scope, receive, send)
+
+class LoadClient:
+    """Cliente HTTP que registra latencia, estado y consultas de cada petición por ruta."""
+
+    def __init__(self, client, counter: CallCounter):
+        self.client = client
+        self.counter = counter
+        self.recording = False
+        self.samples = defaultdict(list)
+
+    async def request(self, route: str, method: str, path: str, token: str = None, body=None):
+        request_id = uuid.uuid4().hex
+        headers = {"x-load-request": request_id}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, json=body, headers=headers)
+            status = response.status_code
+        except Exception:
+            response, status = None, 0
+        elapsed = time.perf_counter() - start
+        counter = self.counter.calls.pop(request_id, None)
+        if self.recording:
+            self.samples[route].append((elapsed, status, counter["calls"] if counter else None))
+        return response
+
+def parse_mix(text: str) -> dict:
+    """`dashboard=6,login=1` -> {"dashboard": 6.0, "login": 1.0}."""
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in FLOWS:
+            raise SystemExit(f"Flujo desconocido en --mix: {name} (disponibles: {', '.join(FLOWS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+async def login(load: LoadClient, user: dict, rng: random.Random) -> None:
+    response = await load.request("POST /auth/login", "POST", f"{API}/auth/login", body={"email": user["email"], "password": PASSWORD})
+    if response is not None and response.status_code == 200:
+        user["token"] = response.json()["token"]["access_token"]
+
+async def dashboard(load: LoadClient, user: dict, rng: random.Random) -> None:
+    today = date.today()
+    await asyncio.gather(
+        load.request("GET /reports/financial-summary", "GET", f"{API}/reports/financial-summary?start_date={today.replace(day=1)}&end_date={today}", user["token"]),
+        load.request("GET /reports/budget-summary", "GET", f"{API}/reports/budget-summary", user["token"]),
+        load.request("GET /movements", "GET", f"{API}/movements", user["token"])
+    )
+
+async def create_movement(load: LoadClient, user: dict, rng: random.Random) -> None:
+    await load.request("POST /movements", "POST", f"{API}/movements", user["token"], random_movement(rng, days=30))
+
+async def edit_budget(load: LoadClient, user: dict, rng: random.Random) -> None:
+    await load.request("PUT /budgets/{budget_id}", "PUT", f"{API}/budgets/{user['budget_id']}", user["token"], {"max_amount": round(rng.uniform(300, 1500), 2)})
+
+FLOWS = {
+    "login": login,
+    "dashboard": dashboard,
+    "create_movement": create_movement,
+    "edit_budget": edit_budget
+}
+
+def random_movement(rng: random.Random, days: int) -> dict:
+    """Movimiento de los últimos `days` días (uno de cada 15 es un ingreso)."""
+    income = rng.random() < 1 / 15
+    return {
+        "amount": round(rng.uniform(1500, 4000) if income else rng.uniform(3, 250), 2),
+        "category": "Salario" if income else rng.choice(EXPENSE_CATEGORIES),
+        "movement_type": "Ingreso" if income else "Gasto",
+        "movement_date": (date.today() - timedelta(days=rng.randrange(days))).isoformat(),
+        "description": "Prueba de carga"
+    }
+
+async def setup_user(load: LoadClient, index: int, run_id: str, movements: int, batch_size: int) -> dict:
+    """Registrar un usuario virtual con movimientos del último año y un presupuesto."""
+    rng = random.Random(index)
+    user = {"email": f"load-{run_id}-{index}@example.com"}
+    response = await load.request("POST /auth/register", "POST", f"{API}/auth/register", body={"email": user["email"], "password": PASSWORD, "name": f"Carga {index}"})
+    response.raise_for_status()
+    user["token"] = response.json()["token"]["access_token"]
+
+    for start in range(0, movements, batch_size):
+        items = [random_movement(rng, days=365) for _ in range(min(batch_size, movements - start))]
+        response = await load.request("POST /movements/batch", "POST", f"{API}/movements/batch", user["token"], {"items": items})
+        response.raise_for_status()
+
+    today = date.today()
+    response = await load.request("POST /budgets", "POST", f"{API}/budgets", user["token"], {
+        "category": "Comida",
+        "max_amount": 600,
+        "period": "mensual",
+        "start_date": today.replace(day=1).isoformat(),
+        "end_date": (today + timedelta(days=365)).isoformat()
+    })
+    response.raise_for_status()
+    user["budget_id"] = response.json()["data"]["id"]
+    return user
+
+async def run_user(load: LoadClient, user: dict, mix: dict, deadline: float, think: float, seed: int, flows: Counter) -> None:
+    """Una sesión: login y flujos al azar según el mix hasta la hora límite."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    await login(load, user, rng)
+    flows["login"] += 1
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        await FLOWS[name](load, user, rng)
+        flows[name] += 1
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    """Rendimiento, percentiles y consultas a Supabase por ruta."""
+    routes = {}
+    for route, values in sorted(samples.items()):
+        latencies = [value[0] for value in values]
+        calls = [value[2] for value in values if value[2] is not None]
+        routes[route] = {
+            "requests": len(values),
+            "errors": sum(1 for value in values if not 200 <= value[1] < 400),
+            "rps": len(values) / elapsed,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p90_ms": percentile(latencies, 0.9) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies) * 1000,
+            "supabase_calls_per_request": sum(calls) / len(calls) if calls else None,
+            "supabase_calls_max": max(calls) if calls else None
+        }
+    return routes
+
+def revision() -> str:
+    """Commit actual del repositorio (None fuera de git)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(report: dict) -> None:
+    print(f"\n{report['requests']} peticiones en {report['duration_seconds']:.1f} s: "
+          f"{report['throughput_rps']:.1f} req/s, {report['errors']} errores, "
+          f"{report['supabase_calls_per_request']:.2f} consultas a Supabase por petición")
+    print(f"{'ruta':<34}{'pet.':>7}{'req/s':>8}{'p50 (ms)':>10}{'p90 (ms)':>10}{'p99 (ms)':>10}{'consultas':>11}{'errores':>9}")
+    for route, stats in report["routes"].items():
+        calls = stats["supabase_calls_per_request"]
+        print(f"{route:<34}{stats['requests']:>7}{stats['rps']:>8.1f}{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{calls if calls is not None else float('nan'):>11.2f}{stats['errors']:>9}")
+
+def print_comparison(report: dict, previous: dict) -> None:
+    """Cambios por ruta respecto a un informe anterior."""
+    def change(new, old):
+        if new is None or old is None:
+            return "-"
+        return f"{old:.1f} -> {new:.1f} ({(new - old) / old:+.0%})" if old else f"{old:.1f} -> {new:.1f}"
+
+    print(f"\nComparación con {previous.get('revision') or 'el informe anterior'} ({previous.get('generated_at')}):")
+    print(f"{'req/s total':<34}{change(report['throughput_rps'], previous['throughput_rps'])}")
+    for route, stats in report["routes"].items():
+        old = previous["routes"].get(route)
+        if old is None:
+            print(f"{route:<34}nueva")
+            continue
+        print(f"{route:<34}p50 {change(stats['p50_ms'], old['p50_ms']):<28}p99 {change(stats['p99_ms'], old['p99_ms']):<28}"
+              f"consultas {change(stats['supabase_calls_per_request'], old['supabase_calls_per_request'])}")
+
+async def main(args):
+    mix = parse_mix(args.mix)
+
+    # La configuración se lee al importar la app: elegir el backend antes
+    server = None
+    if args.backend == "memory":
+        os.environ["SUPABASE_BACKEND"] = "memory"
+    elif args.backend == "postgrest":
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        os.environ.update(SUPABASE_BACKEND="supabase", SUPABASE_URL=f"http://127.0.0.1:{port}", SUPABASE_KEY="load-test-key")
+        from benchmarks.postgrest_server import Faults, PostgrestServer, create_app
+        server = PostgrestServer(create_app(faults=Faults(args.rtt, args.jitter, 0.0, seed=args.seed)), port=port).start()
+
+    import httpx
+    import uvicorn
+    from app.main import app
+    from app.services.supabase_service import supabase_service
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if not args.verbose:
+        # Los errores inyectados llenarían la salida con el log de cada servicio
+        logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    counter = CallCounter(app, supabase_service)
+    limits = httpx.Limits(max_connections=args.users * 3, max_keepalive_connections=args.users * 3)
+    if args.transport == "asgi":
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=counter), base_url="http://load-test", timeout=args.timeout)
+    else:
+        uvicorn_server = uvicorn.Server(uvicorn.Config(counter, host="127.0.0.1", port=0, log_level="warning"))
+        serving = asyncio.create_task(uvicorn_server.serve())
+        while not uvicorn_server.started:
+            await asyncio.sleep(0.01)
+        host, port = uvicorn_server.servers[0].sockets[0].getsockname()[:2]
+        client = httpx.AsyncClient(base_url=f"http://{host}:{port}", timeout=args.timeout, limits=limits)
+
+    load = LoadClient(client, counter)
+    run_id = uuid.uuid4().hex[:8]
+    print(f"Preparando {args.users} usuarios con {args.movements} movimientos ({args.backend}, {args.transport})...")
+    semaphore = asyncio.Semaphore(10)
+
+    async def prepare(index):
+        async with semaphore:
+            return await setup_user(load, index, run_id, args.movements, args.batch_size)
+
+    users = await asyncio.gather(*(prepare(index) for index in range(args.users)))
+
+    if server is not None:
+        server.app.state.faults.error_rate = args.error_rate
+    flows = Counter()
+    load.recording = True
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(run_user(load, user, mix, deadline, args.think, args.seed + index, flows) for index, user in enumerate(users)))
+    elapsed = time.perf_counter() - start
+    load.recording = False
+
+    await client.aclose()
+    if args.transport == "asgi":
+        await lifespan.__aexit__(None, None, None)
+    else:
+        uvicorn_server.should_exit = True
+        await serving
+    await supabase_service.close()
+    if server is not None:
+        server.stop()
+
+    routes = summarize(load.samples, elapsed)
+    total = sum(stats["requests"] for stats in routes.values())
+    calls = [value[2] for values in load.samples.values() for value in values if value[2] is not None]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "revision": revision(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        "duration_seconds": elapsed,
+        "flows": dict(flows),
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in routes.values()),
+        "throughput_rps": total / elapsed,
+        "supabase_calls_per_request": sum(calls) / len(calls) if calls else 0.0,
+        "routes": routes
+    }
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga (sin contar la preparación)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Peso de cada flujo: login, dashboard, create_movement, edit_budget")
+    parser.add_argument("--think", type=float, default=0.0, help="Pausa media entre flujos en segundos")
+    parser.add_argument("--transport", choices=["asgi", "socket"], default="asgi", help="ASGI en proceso o HTTP por un socket local")
+    parser.add_argument("--backend", choices=["memory", "postgrest", "env"], default="memory",
+                        help="Base de datos en memoria, servidor PostgREST simulado o la configuración del entorno (crea usuarios de prueba)")
+    parser.add_argument("--rtt", type=float, default=0.04, help="RTT por consulta con --backend postgrest")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación del RTT (±) con --backend postgrest")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Consultas que fallan con --backend postgrest")
+    parser.add_argument("--movements", type=int, default=500, help="Movimientos iniciales por usuario")
+    parser.add_argument("--batch-size", type=int, default=500, help="Movimientos por POST /movements/batch al preparar")
+    parser.add_argument("--timeout", type=float, default=60, help="Timeout de cada petición en segundos")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Guardar el informe en un archivo JSON")
+    parser.add_argument("--compare", help="Informe JSON anterior con el que comparar")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar el log de la API")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita PostgREST y Supabase Auth con latencia y fallos inyectados.
+
+Responde el subconjunto de la API REST que usan los servicios (filtros,
+`select` con tablas embebidas, `order`, `limit`/`offset`, inserciones,
+upserts, actualizaciones y borrados que devuelven filas, funciones en
+/rpc) y el registro/inicio de sesión de /auth/v1, guardando los datos en
+la base de datos en memoria de `app.services.memory_backend`. El cliente
+`supabase` de SupabaseService apunta a él sin cambios con SUPABASE_URL.
+
+Cada petición espera la latencia configurada (RTT ± jitter) y falla con la
+probabilidad indicada, así los benchmarks miden lo que cuesta cada viaje
+de ida y vuelta y cómo responde la API cuando Supabase falla.
+
+Uso (desde backend/):
+    python -m benchmarks.postgrest_server --port 54321 --latency 0.04 --jitter 0.01
+    python -m benchmarks.postgrest_server --fixture datos.json --error-rate 0.01
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local python run_dev.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import uvicorn
+from gotrue.errors import AuthApiError
+from postgrest.exceptions import APIError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.services.memory_backend import MemoryDatabase
+
+# Estado HTTP de cada código de error, como lo responde PostgREST
+ERROR_STATUS = {"23505": 409, "23503": 409, "42P10": 400, "PGRST100": 400, "PGRST202": 404}
+
+# Parámetros de la URL que no son filtros
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+class Faults:
+    """Latencia y errores que se inyectan en cada petición (se pueden cambiar en caliente)."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+
+    def delay(self) -> float:
+        """Segundos de espera de la próxima petición."""
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def fails(self) -> bool:
+        """Si la próxima petición debe fallar."""
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+def _json(data, status: int = 200, headers: dict = None) -> Response:
+    return Response(json.dumps(data, default=str), status_code=status, media_type="application/json", headers=headers)
+
+def _api_error(error: APIError) -> Response:
+    """Error con el cuerpo y el estado HTTP de PostgREST."""
+    body = {"code": error.code, "message": error.message, "details": error.details, "hint": error.hint}
+    return _json(body, ERROR_STATUS.get(error.code, 400))
+
+def _auth_error(error: AuthApiError) -> Response:
+    """Error con el cuerpo de GoTrue."""
+    return _json({"code": error.status, "error_code": error.code, "msg": error.message}, error.status)
+
+def _prefer(request: Request) -> dict:
+    """Opciones de la cabecera Prefer (`return=representation,count=exact`...)."""
+    options = {}
+    for item in request.headers.get("prefer", "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key:
+            options[key] = value
+    return options
+
+def _auth_user(user: dict) -> dict:
+    """Usuario con los campos que exige el modelo User de gotrue."""
+    return {
+        "id": user["id"],
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": user["email"],
+        "app_metadata": {"provider": "email"},
+        "user_metadata": user["user_metadata"],
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+def _auth_session(result) -> dict:
+    """Sesión con el formato de /auth/v1/token."""
+    return {
+        "access_token": result.session.access_token,
+        "token_type": "bearer",
+        "expires_in": 3600,
+        "expires_at": int(time.time()) + 3600,
+        "refresh_token": uuid.uuid4().hex,
+        "user": _auth_user(vars(result.user))
+    }
+
+async def table_endpoint(request: Request) -> Response:
+    """GET/HEAD/POST/PATCH/DELETE /rest/v1/<tabla>."""
+    database: MemoryDatabase = request.app.state.database
+    params = request.query_params
+    prefer = _prefer(request)
+    body = await request.body()
+    payload = json.loads(body) if body else None
+
+    query = database.query(request.path_params["table"])
+    if request.method == "POST":
+        if "resolution" in prefer:
+            query.upsert(payload, on_conflict=params.get("on_conflict", ""), ignore_duplicates=prefer["resolution"] == "ignore-duplicates")
+        else:
+            query.insert(payload)
+    elif request.method == "PATCH":
+        query.update(payload)
+    elif request.method == "DELETE":
+        query.delete()
+    query.select(params.get("select", "*"), count=prefer.get("count"))
+
+    for key, value in params.multi_items():
+        if key not in RESERVED_PARAMS:
+            query.where(key, value)
+    for item in params.get("order", "").split(","):
+        if item:
+            column, *options = item.split(".")
+            nullsfirst = True if "nullsfirst" in options else False if "nullslast" in options else None
+            query.order(column, desc="desc" in options, nullsfirst=nullsfirst)
+    offset = int(params.get("offset", 0))
+    if "limit" in params:
+        query.range(offset, offset + int(params["limit"]) - 1)
+    else:
+        query.offset = offset
+
+    try:
+        response = query.execute()
+    except APIError as error:
+        return _api_error(error)
+
+    headers = {}
+    if response.count is not None:
+        end = offset + len(response.data) - 1
+        headers["Content-Range"] = f"{offset}-{end}/{response.count}" if response.data else f"*/{response.count}"
+    status = 201 if request.method == "POST" else 200
+    if request.method == "HEAD" or prefer.get("return") == "minimal":
+        return Response(status_code=204 if request.method != "HEAD" else 200, headers=headers)
+    return _json(response.data, status, headers)
+
+async def rpc_endpoint(request: Request) -> Response:
+    """POST /rest/v1/rpc/<función>: el resultado sin envolver, como PostgREST."""
+    database: MemoryDatabase = request.app.state.database
+    body = await request.body()
+    try:
+        response = database.rpc(request.path_params["function"], json.loads(body) if body else {}).execute()
+    except APIError as error:
+        return _api_error(error)
+    except TypeError as error:
+        # Parámetros que no corresponden a la función
+        return _json({"code": "PGRST202", "message": str(error), "details": None, "hint": None}, 404)
+    if response.data is None:
+        return Response(status_code=204)
+    return _json(response.data)
+
+async def signup_endpoint(request: Request) -> Response:
+    """POST /auth/v1/signup (sin confirmación de correo: devuelve la sesión)."""
+    body = await request.json()
+    try:
+        result = request.app.state.database.auth.sign_up({
+            "email": body["email"],
+            "password": body["password"],
+            "options": {"data": body.get("data") or {}}
+        })
+    except AuthApiError as error:
+        return _auth_error(error)
+    return _json(_auth_session(result))
+
+async def token_endpoint(request: Request) -> Response:
+    """POST /auth/v1/token?grant_type=password."""
+    body = await request.json()
+    try:
+        result = request.app.state.database.auth.sign_in_with_password(body)
+    except AuthApiError as error:
+        return _auth_error(error)
+    return _json(_auth_session(result))
+
+async def admin_create_user_endpoint(request: Request) -> Response:
+    """POST /auth/v1/admin/users (usuario ya confirmado, con id opcional)."""
+    body = await request.json()
+    try:
+        result = request.app.state.database.auth.create_user(body)
+    except AuthApiError as error:
+        return _auth_error(error)
+    return _json(_auth_user(vars(result.user)))
+
+async def admin_user_endpoint(request: Request) -> Response:
+    """PUT y DELETE /auth/v1/admin/users/<id>."""
+    auth = request.app.state.database.auth
+    user_id = request.path_params["user_id"]
+    user = next((user for user in auth.users.values() if user["id"] == user_id), None)
+    if user is None:
+        return _json({"code": 404, "error_code": "user_not_found", "msg": "User not found"}, 404)
+    if request.method == "DELETE":
+        auth.delete_user(user_id)
+    else:
+        auth.update_user_by_id(user_id, await request.json())
+    return _json(_auth_user(user))
+
+async def stats_endpoint(request: Request) -> Response:
+    """GET /__stats: peticiones atendidas por método y recurso."""
+    return _json(dict(request.app.state.stats))
+
+def create_app(database: MemoryDatabase = None, faults: Faults = None) -> Starlette:
+    """Aplicación ASGI del servidor sobre `database` (una base de datos vacía por defecto)."""
+    app = Starlette(routes=[
+        Route("/rest/v1/rpc/{function}", rpc_endpoint, methods=["POST"]),
+        Route("/rest/v1/{table}", table_endpoint, methods=["GET", "HEAD", "POST", "PATCH", "DELETE"]),
+        Route("/auth/v1/signup", signup_endpoint, methods=["POST"]),
+        Route("/auth/v1/token", token_endpoint, methods=["POST"]),
+        Route("/auth/v1/admin/users", admin_create_user_endpoint, methods=["POST"]),
+        Route("/auth/v1/admin/users/{user_id}", admin_user_endpoint, methods=["PUT", "DELETE"]),
+        Route("/__stats", stats_endpoint, methods=["GET"])
+    ])
+    app.state.database = database or MemoryDatabase()
+    app.state.faults = faults or Faults()
+    app.state.stats = Counter()
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path == "/__stats":
+            return await call_next(request)
+        faults: Faults = app.state.faults
+        resource = request.url.path.split("/v1/", 1)[-1]
+        app.state.stats[f"{request.method} {resource}"] += 1
+        app.state.stats["total"] += 1
+
+        await asyncio.sleep(faults.delay())
+        if faults.fails():
+            app.state.stats["injected_errors"] += 1
+            return _json({"code": "PGRST000", "message": "Error inyectado por el servidor de pruebas", "details": None, "hint": None}, faults.error_status)
+        return await call_next(request)
+
+    return app
+
+class PostgrestServer:
+    """Servidor uvicorn en un hilo propio (su event loop no comparte tiempo con la API)."""
+
+    def __init__(self, app: Starlette, host: str = "127.0.0.1", port: int = 0):
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off")
+        self.app = app
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PostgrestServer":
+        """Iniciar y esperar a que acepte conexiones."""
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.04, help="RTT por petición en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación máxima del RTT (±) en segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de responder con error")
+    parser.add_argument("--error-status", type=int, default=503, help="Estado HTTP de los errores inyectados")
+    parser.add_argument("--seed", type=int, help="Semilla de la latencia y los errores")
+    parser.add_argument("--fixture", help="Datos iniciales: JSON {tabla: [filas]} o directorio de <tabla>.json/.jsonl")
+    args = parser.parse_args()
+
+    database = MemoryDatabase()
+    if args.fixture:
+        print(f"Datos cargados: {database.load_fixture(args.fixture)}")
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(create_app(database, faults), host=args.host, port=args.port, log_level="warning")
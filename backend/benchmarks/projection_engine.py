@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de proyecciones del presupuesto estratégico.
+
+Genera elementos (ingresos recurrentes y gastos proyectados semanales,
+mensuales y anuales) y compara, para un horizonte de N meses:
+
+- "por fechas": derivar en cada petición las ocurrencias de cada elemento
+  una a una y sumarlas en su mes;
+- "calendario": lo que hace ProjectionEngine con el calendario guardado,
+  sumar los totales por (mes, tipo) que devuelve proyeccion_presupuesto_por_mes
+  en una pasada vectorizada con NumPy y armar el resumen.
+
+Uso (desde backend/):
+    python -m benchmarks.projection_engine
+    python -m benchmarks.projection_engine --items 200 --months 60
+"""
+
+import argparse
+import calendar
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.projection_engine import ProjectionEngine, month_edges
+
+def generate_items(count: int, start: date, seed: int):
+    """Generar elementos con inicio en los dos años previos al horizonte."""
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        item_start = start - timedelta(days=rng.randrange(730))
+        item_end = item_start + timedelta(days=rng.randrange(90, 2000)) if rng.random() < 0.4 else None
+        items.append({
+            "id": f"item-{index:04d}",
+            "monto": round(rng.uniform(10, 3000), 2),
+            "tipo": rng.choice(["ingreso_recurrente", "gasto_proyectado"]),
+            "frecuencia": rng.choice(["semanal", "mensual", "anual"]),
+            "fecha_inicio": item_start.isoformat(),
+            "fecha_fin": item_end.isoformat() if item_end else None
+        })
+    return items
+
+def per_date_totals(items, start: date, months: int):
+    """Referencia: generar cada ocurrencia como fecha y acumularla en su mes."""
+    first = start.replace(day=1)
+    limit = month_edges(first, months)[-1].astype(date)
+    income = [0.0] * months
+    expenses = [0.0] * months
+    for item in items:
+        item_start = date.fromisoformat(item["fecha_inicio"])
+        item_end = date.fromisoformat(item["fecha_fin"]) if item["fecha_fin"] else date.max
+        totals = income if item["tipo"] == "ingreso_recurrente" else expenses
+        step = {"mensual": 1, "anual": 12}.get(item["frecuencia"])
+        occurrence, k = item_start, 0
+        while occurrence < limit and occurrence <= item_end:
+            index = (occurrence.year - first.year) * 12 + occurrence.month - first.month
+            if index >= 0:
+                totals[index] += item["monto"]
+            k += 1
+            if step is None:
+                occurrence = item_start + timedelta(days=7 * k)
+            else:
+                month = item_start.month - 1 + k * step
+                year, month = item_start.year + month // 12, month % 12 + 1
+                occurrence = date(year, month, min(item_start.day, calendar.monthrange(year, month)[1]))
+    return income, expenses
+
+def monthly_rows(income, expenses, start: date):
+    """Filas (mes, tipo, total) como las devuelve proyeccion_presupuesto_por_mes."""
+    edges = month_edges(start, len(income))
+    return [
+        {"mes": str(edges[index]), "tipo": kind, "total": total}
+        for kind, totals in (("ingreso_recurrente", income), ("gasto_proyectado", expenses))
+        for index, total in enumerate(totals) if total
+    ]
+
+def stored_schedule_summary(rows, edges):
+    """Proyección a partir del calendario guardado (sin movimientos reales)."""
+    income, expenses = ProjectionEngine.monthly_totals(rows, edges, "ingreso_recurrente", "gasto_proyectado")
+    zeros = np.zeros(len(edges) - 1)
+    return ProjectionEngine.build_summary(edges, income, expenses, zeros, zeros)
+
+def timed(func, repeat: int):
+    """Mejor tiempo de `repeat` ejecuciones, en milisegundos."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main(args):
+    start = date.today().replace(day=1)
+    items = generate_items(args.items, start, args.seed)
+    edges = month_edges(start, args.months)
+
+    naive_ms, naive = timed(lambda: per_date_totals(items, start, args.months), args.repeat)
+    rows = monthly_rows(*naive, start)
+    engine_ms, engine = timed(lambda: stored_schedule_summary(rows, edges), args.repeat)
+
+    assert np.allclose([month["projected_income"] for month in engine["projections"]], naive[0])
+    assert np.allclose([month["projected_expenses"] for month in engine["projections"]], naive[1])
+
+    print(f"Elementos: {len(items)}  meses: {args.months}")
+    print(f"{'enfoque':<14}{'tiempo (ms)':>14}")
+    print(f"{'por fechas':<14}{naive_ms:>14.2f}")
+    print(f"{'calendario':<14}{engine_ms:>14.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "items": len(items),
+                "months": args.months,
+                "per_date": {"ms": naive_ms},
+                "stored_schedule": {"ms": engine_ms}
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="Elementos del presupuesto")
+    parser.add_argument("--months", type=int, default=60, help="Meses del horizonte")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--output", help="Guardar resultados en un archivo JSON")
+    main(parser.parse_args())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cálculo de gasto por presupuesto.
+
+Genera en memoria los movimientos de un usuario (100k por defecto) repartidos
+en varias categorías y años, y compara:
+
+- "por presupuesto": una lectura filtrada por categoría y período por cada
+  presupuesto (lo que haría un join por presupuesto);
+- "motor": SpendingEngine.compute_totals, una sola pasada sobre los gastos.
+
+También estima las consultas a Supabase de cada enfoque (páginas de 1000 filas).
+
+Uso (desde backend/):
+    python -m benchmarks.spending_engine
+    python -m benchmarks.spending_engine --movements 100000 --budgets 50 --categories 30
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from datetime import date, timedelta
+
+from app.services.spending_engine import SpendingEngine
+
+PAGE_SIZE = 1000
+
+def generate_movements(count: int, categories: int, years: int, seed: int):
+    """Generar gastos ordenados por (categoria_id, fecha) como los devuelve la consulta."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * years)
+    days = 365 * years
+    rows = [
+        {
+            "categoria_id": f"cat-{rng.randrange(categories):03d}",
+            "fecha": (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "monto": round(rng.uniform(1, 500), 2)
+        }
+        for _ in range(count)
+    ]
+    rows.sort(key=lambda mov: (mov["categoria_id"], mov["fecha"]))
+    return rows, start, days
+
+def generate_windows(count: int, categories: int, start: date, days: int, seed: int):
+    """Generar presupuestos mensuales y anuales sobre categorías al azar."""
+    rng = random.Random(seed + 1)
+    windows = []
+    for _ in range(count):
+        length = rng.choice([30, 90, 365])
+        window_start = start + timedelta(days=rng.randrange(max(1, days - length)))
+        windows.append((
+            f"cat-{rng.randrange(categories):03d}",
+            window_start.isoformat(),
+            (window_start + timedelta(days=length)).isoformat()
+        ))
+    return windows
+
+def per_budget_totals(rows, windows):
+    """Referencia: leer los movimientos de cada presupuesto por separado."""
+    totals = []
+    queries = 0
+    rows_read = 0
+    for category_id, start_date, end_date in windows:
+        selected = [mov["monto"] for mov in rows
+                    if mov["categoria_id"] == category_id and start_date <= mov["fecha"] <= end_date]
+        totals.append(sum(selected))
+        queries += max(1, math.ceil(len(selected) / PAGE_SIZE))
+        rows_read += len(selected)
+    return totals, queries, rows_read
+
+def timed(func, repeat: int):
+    """Mejor tiempo de `repeat` ejecuciones, en milisegundos."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main(args):
+    rows, start, days = generate_movements(args.movements, args.categories, args.years, args.seed)
+    windows = generate_windows(args.budgets, args.categories, start, days, args.seed)
+
+    # Filas que leería la consulta única: la unión de las ventanas de cada categoría
+    ranges = SpendingEngine.merge_windows(windows)
+    fetched = [mov for mov in rows
+               if any(mov["categoria_id"] == category_id and start_date <= mov["fecha"] <= end_date
+                      for category_id, start_date, end_date in ranges)]
+
+    naive_ms, (naive, naive_queries, naive_rows) = timed(lambda: per_budget_totals(rows, windows), args.repeat)
+    engine_ms, engine = timed(lambda: SpendingEngine.compute_totals(fetched, windows), args.repeat)
+
+    assert all(math.isclose(a, b, abs_tol=1e-6) for a, b in zip(naive, engine)), "Los totales no coinciden"
+
+    engine_queries = max(1, math.ceil(len(fetched) / PAGE_SIZE))
+    print(f"Movimientos: {len(rows)}  presupuestos: {len(windows)}")
+    print(f"{'enfoque':<18}{'tiempo (ms)':>14}{'consultas':>12}{'filas leídas':>15}")
+    print(f"{'por presupuesto':<18}{naive_ms:>14.1f}{naive_queries:>12}{naive_rows:>15}")
+    print(f"{'motor':<18}{engine_ms:>14.1f}{engine_queries:>12}{len(fetched):>15}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "movements": len(rows),
+                "budgets": len(windows),
+                "per_budget": {"ms": naive_ms, "queries": naive_queries, "rows": naive_rows},
+                "engine": {"ms": engine_ms, "queries": engine_queries, "rows": len(fetched)}
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movements", type=int, default=100_000, help="Movimientos del usuario")
+    parser.add_argument("--budgets", type=int, default=50, help="Presupuestos a calcular")
+    parser.add_argument("--categories", type=int, default=30, help="Categorías de gasto")
+    parser.add_argument("--years", type=int, default=3, help="Años de historial")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--output", help="Guardar resultados en un archivo JSON")
+    main(parser.parse_args())
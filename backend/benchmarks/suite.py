@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de los caminos calientes de los servicios, con línea base.
+
+Corre los servicios sobre el backend en memoria (sin red, así se mide el
+código de la API y no a Supabase) con 1k, 100k y 1M movimientos de un
+usuario. Los movimientos se agregan de forma incremental: los datos de cada
+tamaño contienen los del anterior y son siempre los mismos para una semilla.
+
+Casos por tamaño:
+
+- movements.page: MovementService.get_movements con limit=50 (una página);
+- movements.export: iter_movements de todo el historial (lectura por cursor
+  y transformación de cada fila);
+- financial-summary: get_financial_summary del año en curso y sin fechas;
+- budgets: BudgetService.get_budgets (presupuestos mensuales y anuales).
+
+Casos que no dependen del número de movimientos:
+
+- movements.format: MovementService._format_movement sobre 10k filas ya
+  leídas (solo la transformación, sin el backend);
+- categories.catalogue: CategoryService con el catálogo frío (construir los
+  CategoryResponse y serializar la respuesta);
+- auth.jwt: AuthService.create_access_token + verify_token (1000 veces).
+
+De cada caso se guarda el mejor tiempo y la mediana de `--repeat` corridas
+(tras una de calentamiento; menos si el caso supera `--max-seconds`).
+`compare` vuelve a correr la suite (o lee un resultado con `--results`) y
+termina con código 1 si algún caso es más lento que la línea base en más de
+`--threshold` (20% por defecto). Antes de cada caso se mide además una carga
+fija de Python (`calibration_ms`) y `compare` escala la línea base por la
+relación entre ambas calibraciones, para que un equipo (o una máquina
+virtual) más lento en ese momento no cuente como regresión.
+
+Uso (desde backend/):
+    python -m benchmarks.suite run
+    python -m benchmarks.suite run --sizes 1000 100000 --cases movements budgets --output actual.json
+    python -m benchmarks.suite baseline
+    python -m benchmarks.suite compare --threshold 0.1
+    python -m benchmarks.suite compare --results actual.json --baseline otra_base.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.load_test import revision
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = [1_000, 100_000, 1_000_000]
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+INCOME_CATEGORIES = ["Salario", "Freelance"]
+EXPENSE_CATEGORIES = ["Comida", "Transporte", "Hogar", "Ocio", "Salud", "Educación", "Ropa", "Servicios"]
+DESCRIPTIONS = ["Supermercado", "Metro", "Arriendo", "Cine", "Farmacia", "Curso", "Zapatos", "Luz", "Agua", "Internet"]
+CATALOGUE_SIZE = 200
+JWT_ROUNDS = 1000
+FORMAT_ROWS = 10_000
+# Filas por carga: acota la memoria de la lista intermedia
+CHUNK_SIZE = 50_000
+YEARS = 3
+
+def category_id(name: str) -> str:
+    index = (INCOME_CATEGORIES + EXPENSE_CATEGORIES).index(name)
+    return f"00000000-0000-0000-0001-{index:012d}"
+
+def seed_user(database, today: date) -> None:
+    """Usuario, categorías, catálogo global y un presupuesto mensual y uno anual por categoría de gasto."""
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    database.load({
+        "usuarios": [{"id": USER_ID, "email": "suite@example.com", "name": "Suite"}],
+        "categorias": [
+            {"id": category_id(name), "usuario_id": USER_ID, "nombre": name, "tipo": "Ingreso" if name in INCOME_CATEGORIES else "Gasto"}
+            for name in INCOME_CATEGORIES + EXPENSE_CATEGORIES
+        ],
+        "categories": [
+            {"id": f"00000000-0000-0000-0002-{index:012d}", "name": f"Categoría {index}", "type": "GASTO" if index % 4 else "INGRESO", "icon": "tag", "color": "#4F46E5"}
+            for index in range(CATALOGUE_SIZE)
+        ],
+        "presupuestos": [
+            {
+                "usuario_id": USER_ID,
+                "categoria_id": category_id(name),
+                "monto_maximo": 500 if period == "mensual" else 6000,
+                "periodo": period,
+                "fecha_inicio": (month_start if period == "mensual" else today.replace(month=1, day=1)).isoformat(),
+                "fecha_fin": ((next_month - timedelta(days=1)) if period == "mensual" else today.replace(month=12, day=31)).isoformat()
+            }
+            for name in EXPENSE_CATEGORIES
+            for period in ("mensual", "anual")
+        ]
+    })
+
+def generate_movements(start: int, stop: int, today: date, seed_value: int):
+    """Movimientos `start` a `stop` de la secuencia del usuario (la misma para cada semilla)."""
+    # Una semilla por movimiento: agregar filas no cambia las ya generadas
+    days = 365 * YEARS
+    first = today - timedelta(days=days)
+    # Cadenas compartidas entre filas para que 1M de movimientos quepa en memoria
+    dates = [(first + timedelta(days=offset)).isoformat() for offset in range(days + 1)]
+    expense_ids = [category_id(name) for name in EXPENSE_CATEGORIES]
+    created_at = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for index in range(start, stop):
+        rng = random.Random(seed_value * 1_000_003 + index)
+        income = index % 25 == 0
+        rows.append({
+            "id": f"00000000-0000-0000-0003-{index:012d}",
+            "usuario_id": USER_ID,
+            "fecha": dates[rng.randrange(len(dates))],
+            "categoria_id": category_id(INCOME_CATEGORIES[index % 2]) if income else rng.choice(expense_ids),
+            "monto": round(rng.uniform(1500, 4000) if income else rng.uniform(2, 300), 2),
+            "tipo": "Ingreso" if income else "Gasto",
+            "descripcion": rng.choice(DESCRIPTIONS),
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+        if len(rows) == CHUNK_SIZE:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+async def timed(func, repeat: int, budget: float):
+    """Tiempos en ms de hasta `repeat` ejecuciones tras una de calentamiento (llena las cachés ordenadas).
+
+    Deja de repetir cuando el caso ya usó `budget` segundos (al menos una
+    ejecución medida), para que 1M de movimientos no dure minutos por caso.
+    """
+    await func()
+    samples = []
+    while len(samples) < repeat and (not samples or sum(samples) / 1000 < budget):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def calibrate(repeat: int = 3) -> float:
+    """Mejor tiempo en ms de una carga fija de Python puro (la velocidad del equipo en ese momento)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rng = random.Random(0)
+        rows = [{"fecha": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "monto": rng.random()} for _ in range(20_000)]
+        rows.sort(key=lambda row: (row["fecha"], row["monto"]))
+        json.dumps(rows)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+def sized_cases(today: date, size: int):
+    """Casos que dependen del número de movimientos: (nombre, función async)."""
+    from app.services.budget_service import budget_service
+    from app.services.movement_service import movement_service
+
+    def checked(result):
+        if not result or not result.get("success"):
+            raise RuntimeError(f"El servicio falló: {result}")
+        return result
+
+    async def movements_page():
+        checked(await movement_service.get_movements(USER_ID, limit=50))
+
+    async def movements_export():
+        count = 0
+        async for page in movement_service.iter_movements(USER_ID):
+            count += len(page)
+        if count != size:
+            raise RuntimeError(f"La exportación devolvió {count} movimientos de {size}")
+
+    async def financial_summary():
+        checked(await movement_service.get_financial_summary(USER_ID, today.replace(month=1, day=1), today))
+        checked(await movement_service.get_financial_summary(USER_ID))
+
+    async def budgets():
+        checked(await budget_service.get_budgets(USER_ID))
+
+    return [
+        ("movements.page", movements_page),
+        ("movements.export", movements_export),
+        ("financial-summary", financial_summary),
+        ("budgets", budgets)
+    ]
+
+def fixed_cases(today: date):
+    """Casos que no dependen del número de movimientos."""
+    from app.services.auth_service import auth_service
+    from app.services.category_service import category_service
+    from app.services.movement_service import movement_service
+
+    # Filas como las devuelve el select con `categorias(nombre)`
+    names = {category_id(name): {"nombre": name} for name in INCOME_CATEGORIES + EXPENSE_CATEGORIES}
+    rows = [dict(row, categorias=names[row["categoria_id"]]) for rows in generate_movements(0, FORMAT_ROWS, today, 0) for row in rows]
+
+    async def movements_format():
+        for row in rows:
+            movement_service._format_movement(row)
+
+    async def catalogue():
+        category_service.invalidate_catalogue()
+        await category_service.get_categories_json()
+
+    async def jwt_roundtrip():
+        for index in range(JWT_ROUNDS):
+            token = auth_service.create_access_token({"sub": USER_ID, "n": index})
+            if auth_service.verify_token(token) is None:
+                raise RuntimeError("verify_token rechazó un token recién emitido")
+
+    return [
+        ("movements.format", movements_format),
+        ("categories.catalogue", catalogue),
+        ("auth.jwt", jwt_roundtrip)
+    ]
+
+def selected(name: str, prefixes) -> bool:
+    return not prefixes or any(name.startswith(prefix) for prefix in prefixes)
+
+async def run_suite(args) -> dict:
+    # Backend en memoria y configuración fija antes de importar la app
+    os.environ["SUPABASE_BACKEND"] = "memory"
+    os.environ["SUPABASE_URL"] = "http://suite.invalid"
+    os.environ["SUPABASE_KEY"] = "suite-key"
+    os.environ["ROLLUPS_ENABLED"] = "true" if args.rollups else "false"
+    os.environ.pop("SUPABASE_MEMORY_FIXTURE", None)
+
+    from app.services.supabase_service import supabase_service
+
+    # Los logs por consulta distorsionan la medición
+    logging.disable(logging.INFO)
+
+    database = supabase_service.database
+    today = date.today()
+    seed_user(database, today)
+
+    results = {}
+
+    async def measure(name: str, func) -> None:
+        # La velocidad de una máquina virtual cambia durante la corrida: calibrar junto a cada caso
+        calibration = calibrate()
+        samples = await timed(func, args.repeat, args.max_seconds)
+        results[name] = {
+            "min_ms": round(min(samples), 3),
+            "median_ms": round(statistics.median(samples), 3),
+            "runs": len(samples),
+            "calibration_ms": round(calibration, 3)
+        }
+        print(f"{name:<34}{min(samples):>12.2f}{statistics.median(samples):>14.2f}{calibration:>16.1f}")
+
+    print(f"{'caso':<34}{'mejor (ms)':>12}{'mediana (ms)':>14}{'calibración':>16}")
+    for name, func in fixed_cases(today):
+        if selected(name, args.cases):
+            await measure(name, func)
+
+    loaded = 0
+    for size in sorted(args.sizes):
+        load_start = time.perf_counter()
+        for rows in generate_movements(loaded, size, today, args.seed):
+            database.load({"movimientos": rows})
+        loaded = max(loaded, size)
+        # Las filas son la base de datos, no memoria de la API: que el GC no las recorra en cada caso
+        gc.collect()
+        gc.freeze()
+        print(f"-- {size} movimientos (carga: {time.perf_counter() - load_start:.1f} s)")
+        for name, func in sized_cases(today, size):
+            if selected(name, args.cases):
+                await measure(f"{name}[{size}]", func)
+
+    return {
+        "revision": revision(),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "sizes": sorted(args.sizes),
+        "repeat": args.repeat,
+        "rollups": args.rollups,
+        "seed": args.seed,
+        "results": results
+    }
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta: float, normalize: bool = True) -> list:
+    """Imprimir la comparación por caso y devolver los casos que empeoraron más del umbral.
+
+    Con `normalize`, el tiempo base de cada caso se escala por la relación
+    entre la calibración medida junto a él en cada corrida, así un equipo más
+    lento en ese momento no aparece como regresión. Un caso cuenta como
+    regresión si empeora más de `threshold` (relativo) y más de `min_delta` ms:
+    en los casos de fracciones de ms el ruido supera el umbral relativo.
+    """
+    regressions = []
+    print(f"\nLínea base: {baseline.get('revision')} ({baseline.get('generated_at')})  actual: {current.get('revision')}")
+    print(f"{'caso':<34}{'base (ms)':>12}{'escala':>8}{'actual (ms)':>13}{'cambio':>10}")
+    for name, stats in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<34}{'-':>12}{'':>8}{stats['min_ms']:>13.2f}{'nuevo':>10}")
+            continue
+        factor = 1.0
+        if normalize and base.get("calibration_ms") and stats.get("calibration_ms"):
+            factor = stats["calibration_ms"] / base["calibration_ms"]
+        expected = base["min_ms"] * factor
+        change = stats["min_ms"] / expected - 1 if expected else 0.0
+        flag = ""
+        if change > threshold and stats["min_ms"] - expected > min_delta:
+            regressions.append(name)
+            flag = "  ❌ regresión"
+        print(f"{name:<34}{base['min_ms']:>12.2f}{factor:>8.2f}{stats['min_ms']:>13.2f}{change:>+10.1%}{flag}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"Sin medir en esta corrida: {', '.join(missing)}")
+    return regressions
+
+def write(path: str, report: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def main(args):
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if args.results:
+            with open(args.results, encoding="utf-8") as f:
+                current = json.load(f)
+        else:
+            # Mismos tamaños y opciones que la línea base, salvo que se indiquen otros
+            args.sizes = args.sizes or baseline.get("sizes", SIZES)
+            args.rollups = args.rollups or baseline.get("rollups", False)
+            current = asyncio.run(run_suite(args))
+        if args.output:
+            write(args.output, current)
+        regressions = compare(baseline, current, args.threshold, args.min_delta, not args.no_normalize)
+        if regressions:
+            print(f"\n❌ {len(regressions)} caso(s) más lentos que la línea base en más de {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ Ningún caso empeoró más de {args.threshold:.0%}")
+        return
+
+    args.sizes = args.sizes or SIZES
+    report = asyncio.run(run_suite(args))
+    if args.command == "baseline":
+        write(args.baseline, report)
+        print(f"\n✅ Línea base guardada en {args.baseline}")
+    elif args.output:
+        write(args.output, report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["run", "baseline", "compare"], help="Correr, guardar la línea base o comparar con ella")
+    parser.add_argument("--sizes", type=int, nargs="+", help=f"Movimientos del usuario (por defecto {' '.join(map(str, SIZES))})")
+    parser.add_argument("--cases", nargs="+", help="Correr solo los casos que empiezan con estos nombres")
+    parser.add_argument("--repeat", type=int, default=5, help="Corridas medidas por caso")
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="Tiempo tras el que un caso deja de repetirse")
+    parser.add_argument("--rollups", action="store_true", help="Activar los totales mensuales (ROLLUPS_ENABLED)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los movimientos")
+    parser.add_argument("--baseline", default=BASELINE, help="Archivo de la línea base")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento tolerado en compare (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.5, help="Empeoramiento mínimo en ms para contar como regresión")
+    parser.add_argument("--no-normalize", action="store_true", help="compare: no escalar la línea base por la calibración")
+    parser.add_argument("--results", help="compare: resultados ya guardados en vez de correr la suite")
+    parser.add_argument("--output", help="Guardar los resultados en un archivo JSON")
+    main(parser.parse_args())
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Generador de libros contables sintéticos para pruebas con volumen real.
+
+Crea N usuarios con varios años de historial: categorías propias,
+movimientos con la estacionalidad y el reparto por categoría de un hogar
+(más gasto en diciembre y los fines de semana, útiles escolares en
+febrero-marzo, impuestos en abril, calefacción en invierno...), plantillas
+recurrentes (sueldo, arriendo, servicios, seguros...) con sus ocurrencias
+ya aprobadas como movimientos y las más recientes pendientes, presupuestos
+mensuales y anuales, y elementos del presupuesto.
+
+Los montos del día a día se ajustan para que el gasto del mes sea una
+fracción del sueldo de cada usuario: con muchos movimientos por usuario
+(más de ~100 al mes) los montos quedan pequeños; para volumen, mejor más
+usuarios.
+
+Cada usuario se genera a partir de su propia semilla (`--seed` y su número),
+así los datos no dependen de cuántos usuarios se generen ni en qué orden:
+`--first-user` permite repartir 10^7 movimientos entre varios procesos.
+Los movimientos se generan mes a mes y se escriben por bloques, la memoria
+usada no depende del volumen.
+
+Salidas:
+
+- `--output DIR`: un `<tabla>.jsonl` por tabla (incluye `auth_users` con
+  la contraseña de `--password`), que cargan el backend en memoria
+  (SUPABASE_MEMORY_FIXTURE=DIR) y `benchmarks.postgrest_server --fixture DIR`.
+- `--supabase`: inserciones por lotes de `--chunk-size` filas con
+  SupabaseService sobre el proyecto configurado (SUPABASE_URL/SUPABASE_KEY;
+  con RLS activo hace falta la clave service_role). Los usuarios se crean con
+  la API de administración de Auth.
+
+Uso (desde backend/):
+    python -m benchmarks.synthetic_ledger --users 100 --movements 10000 --output datos/
+    python -m benchmarks.synthetic_ledger --users 500 --movements 20000 --first-user 500 --output datos_2/
+    python -m benchmarks.synthetic_ledger --users 10 --movements 5000 --supabase --chunk-size 1000 --concurrency 4
+    SUPABASE_MEMORY_FIXTURE=datos/ python run_dev.py
+"""
+
+import argparse
+import asyncio
+import calendar
+import json
+import logging
+import math
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+# Categorías de gasto: peso en el número de movimientos, monto mediano (para
+# un sueldo de referencia), dispersión del monto (lognormal) y meses con más
+# movimientos que el promedio {mes: factor}. Nombres de insert_categories.py.
+EXPENSES = {
+    "Alimentación": (30, 25, 0.8, {12: 1.3}),
+    "Transporte": (18, 8, 0.7, {1: 0.8, 2: 0.8}),
+    "Vivienda": (2, 60, 0.9, {}),
+    "Servicios": (5, 45, 0.5, {6: 1.3, 7: 1.4, 8: 1.3}),
+    "Salud": (4, 40, 0.9, {5: 1.2, 6: 1.3, 7: 1.3}),
+    "Educación": (3, 60, 0.8, {2: 2.5, 3: 2.5}),
+    "Entretenimiento": (12, 30, 0.8, {1: 1.2, 12: 1.3}),
+    "Ropa": (4, 45, 0.7, {3: 1.3, 9: 1.5, 12: 1.6}),
+    "Tecnología": (2, 150, 1.0, {11: 1.8, 12: 1.5}),
+    "Deportes": (3, 35, 0.7, {1: 1.5}),
+    "Viajes": (2, 300, 0.9, {1: 2.5, 2: 2.5, 7: 1.8, 12: 1.3}),
+    "Mascotas": (3, 30, 0.6, {}),
+    "Regalos": (2, 40, 0.8, {5: 1.5, 9: 1.2, 12: 4.0}),
+    "Impuestos": (1, 200, 0.8, {4: 5.0}),
+    "Seguros": (1, 80, 0.4, {}),
+    "Otros Gastos": (4, 20, 1.0, {})
+}
+
+DESCRIPTIONS = {
+    "Alimentación": ["Supermercado", "Almuerzo", "Panadería", "Feria", "Delivery", "Café"],
+    "Transporte": ["Metro", "Bus", "Bencina", "Taxi", "Estacionamiento", "Peaje"],
+    "Vivienda": ["Ferretería", "Reparación", "Muebles", "Artículos de aseo"],
+    "Servicios": ["Luz", "Agua", "Gas", "Calefacción"],
+    "Salud": ["Farmacia", "Consulta médica", "Dentista", "Exámenes"],
+    "Educación": ["Útiles escolares", "Libros", "Curso", "Matrícula"],
+    "Entretenimiento": ["Cine", "Restaurante", "Concierto", "Bar", "Videojuegos"],
+    "Ropa": ["Zapatos", "Ropa", "Accesorios"],
+    "Tecnología": ["Audífonos", "Celular", "Accesorios computador", "Software"],
+    "Deportes": ["Implementos", "Cancha", "Inscripción carrera"],
+    "Viajes": ["Pasajes", "Hotel", "Tour", "Arriendo auto"],
+    "Mascotas": ["Alimento mascota", "Veterinario", "Peluquería mascota"],
+    "Regalos": ["Regalo cumpleaños", "Regalo Navidad", "Flores"],
+    "Impuestos": ["Contribuciones", "Permiso de circulación", "Declaración de renta"],
+    "Seguros": ["Seguro auto", "Seguro de viaje"],
+    "Otros Gastos": ["Varios", "Comisión bancaria", "Donación"]
+}
+
+INCOMES = ["Salario", "Bonificaciones", "Freelance", "Inversiones", "Reembolsos"]
+
+# Movimientos de gasto según el día de la semana (lunes a domingo)
+WEEKDAY_FACTOR = [0.9, 0.9, 0.95, 1.0, 1.25, 1.35, 0.8]
+
+# Gasto total del mes respecto del promedio
+MONTH_FACTOR = {1: 0.9, 2: 0.9, 3: 1.05, 12: 1.25}
+
+# Sueldo mensual de referencia: los montos fijos escalan con el de cada usuario
+REFERENCE_INCOME = 2500
+
+# Fracción del sueldo que se va en gastos del día a día (el resto, en plantillas y ahorro)
+DAILY_SPENDING = 0.45
+INFLATION = 0.04
+
+# Plantillas recurrentes: (nombre, categoría, tipo, día del mes, fracción del sueldo o monto fijo, probabilidad)
+TEMPLATES = [
+    ("Sueldo", "Salario", "Ingreso", None, 1.0, 1.0),
+    ("Arriendo", "Vivienda", "Gasto", 5, 0.3, 0.85),
+    ("Internet y telefonía", "Servicios", "Gasto", 12, 40, 0.95),
+    ("Seguro de salud", "Seguros", "Gasto", 20, 70, 0.6),
+    ("Gimnasio", "Deportes", "Gasto", 3, 35, 0.4),
+    ("Streaming", "Entretenimiento", "Gasto", 15, 12, 0.7)
+]
+
+# Ocurrencias de los últimos días que quedan pendientes de aprobar
+PENDING_DAYS = 10
+
+# Tablas en orden de inserción (las hijas después de las tablas a las que referencian)
+TABLE_ORDER = ["usuarios", "categorias", "movimientos", "ocurrencias_recurrentes", "presupuestos", "presupuesto_items"]
+
+def _add_months(start: date, months: int) -> date:
+    month = start.month - 1 + months
+    year, month = start.year + month // 12, month % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+def _months(start: date, end: date):
+    """Primer día de cada mes entre `start` y `end`."""
+    current = start.replace(day=1)
+    while current <= end:
+        yield current
+        current = _add_months(current, 1)
+
+def _split(total: int, weights):
+    """Repartir `total` en enteros proporcionales a `weights` (mayores restos)."""
+    scale = sum(weights)
+    exact = [total * weight / scale for weight in weights]
+    counts = [math.floor(value) for value in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda index: exact[index] - counts[index], reverse=True)
+    for index in by_remainder[:total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+class LedgerGenerator:
+    """Genera las filas de cada usuario sintético (mismas filas para la misma semilla)."""
+
+    def __init__(self, seed: int, years: int, movements: int, end: date, password: str):
+        self.seed = seed
+        self.movements = movements
+        self.end = end
+        self.start = end.replace(year=end.year - years) + timedelta(days=1)
+        self.password = password
+        self.expense_names = list(EXPENSES)
+        # Pesos acumulados de las categorías de gasto por mes (random.choices)
+        self.month_weights = {}
+        for month in range(1, 13):
+            total, cumulative = 0.0, []
+            for weight, _, _, season in EXPENSES.values():
+                total += weight * season.get(month, 1.0)
+                cumulative.append(total)
+            self.month_weights[month] = cumulative
+
+    def user(self, index: int):
+        """Filas de un usuario como pares (tabla, filas); los movimientos, mes a mes."""
+        from app.services.recurring_service import FINISHED, due_dates, occurrence_key
+
+        rng = random.Random(f"{self.seed}:{index}")
+        new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        user_id = new_id()
+        email = f"user{index:07d}@synthetic.example"
+        name = f"Usuario {index}"
+        income = REFERENCE_INCOME * rng.lognormvariate(0, 0.45)
+        scale = income / REFERENCE_INCOME
+        # Cada usuario gasta más en unas categorías que en otras
+        taste = {category: rng.lognormvariate(0, 0.35) for category in self.expense_names}
+
+        categories = {category: new_id() for category in self.expense_names + INCOMES}
+        yield "auth_users", [{"id": user_id, "email": email, "password": self.password, "name": name}]
+        yield "usuarios", [{"id": user_id, "email": email, "name": name, "created_at": self._timestamp(rng, self.start)}]
+        yield "categorias", [
+            {"id": category_id, "usuario_id": user_id, "nombre": category, "tipo": "Ingreso" if category in INCOMES else "Gasto"}
+            for category, category_id in categories.items()
+        ]
+
+        # Plantillas recurrentes: las ocurrencias vencidas ya son movimientos
+        # aprobados, salvo las de los últimos días, que siguen pendientes
+        templates, occurrences, pending = [], [], []
+        pending_from = self.end - timedelta(days=PENDING_DAYS)
+        for template_name, category, kind, day, amount, probability in TEMPLATES:
+            if rng.random() > probability:
+                continue
+            first = self.start + timedelta(days=rng.randrange(60))
+            if day is None:
+                day = rng.choice([1, 15, 25, 28])
+            first = _add_months(first.replace(day=1), 1 if day < first.day else 0).replace(day=day)
+            ends = _add_months(first, rng.randrange(6, 36)) if kind == "Gasto" and rng.random() < 0.15 else None
+            monto = round(income * amount if isinstance(amount, float) else amount * scale, 2)
+            template_id = new_id()
+            dates = due_dates(first, "mensual", min(self.end, ends) if ends else self.end)
+            template = {
+                "id": template_id,
+                "usuario_id": user_id,
+                "fecha": first.isoformat(),
+                "categoria_id": categories[category],
+                "monto": monto,
+                "tipo": kind,
+                "descripcion": template_name,
+                "es_recurrente": True,
+                "frecuencia": "mensual",
+                "fecha_fin": ends.isoformat() if ends else None,
+                "ultima_materializacion": (FINISHED if ends and ends <= self.end else dates[-1].isoformat()) if dates else None,
+                "created_at": self._timestamp(rng, first)
+            }
+            templates.append(template)
+            for occurrence_date in dates:
+                row = {
+                    "usuario_id": user_id,
+                    "fecha": occurrence_date.isoformat(),
+                    "categoria_id": template["categoria_id"],
+                    "monto": monto,
+                    "tipo": kind,
+                    "descripcion": template_name
+                }
+                key = occurrence_key(template_id, occurrence_date)
+                created_at = self._timestamp(rng, occurrence_date)
+                approved = occurrence_date < pending_from
+                pending.append(dict(row, clave=key, plantilla_id=template_id, estado="aprobada" if approved else "pendiente",
+                                    created_at=created_at, resuelta_at=created_at if approved else None))
+                if approved:
+                    occurrences.append(dict(row, id=new_id(), ocurrencia_clave=key, es_recurrente=False,
+                                            created_at=created_at, updated_at=created_at))
+        yield "movimientos", templates
+
+        # Ingresos eventuales: aguinaldo en septiembre y diciembre, trabajos
+        # por encargo, dividendos trimestrales y reembolsos
+        extras = []
+        bonus, freelance, investor = rng.random() < 0.5, rng.random() < 0.3, rng.random() < 0.2
+        for month_start in _months(self.start, self.end):
+            month_end = min(self.end, _add_months(month_start, 1) - timedelta(days=1))
+            days = (month_end - month_start).days + 1
+            events = []
+            if bonus and month_start.month in (9, 12):
+                events.append(("Bonificaciones", "Aguinaldo", income * rng.uniform(0.2, 0.5)))
+            if freelance:
+                events += [("Freelance", "Proyecto freelance", income * rng.lognormvariate(-1.2, 0.6)) for _ in range(rng.choice([0, 0, 1, 1, 2]))]
+            if investor and month_start.month in (3, 6, 9, 12):
+                events.append(("Inversiones", "Dividendos", income * rng.uniform(0.02, 0.1)))
+            if rng.random() < 0.3:
+                events.append(("Reembolsos", "Reembolso", rng.uniform(5, 80) * scale))
+            for category, description, amount in events:
+                day = month_start + timedelta(days=rng.randrange(days))
+                extras.append(self._movement(rng, new_id(), user_id, categories[category], "Ingreso", day, amount, description))
+
+        # Gastos del día a día: el resto de `--movements`, repartidos por mes
+        # según la estación y por día según el día de la semana
+        months = list(_months(self.start, self.end))
+        expense_count = max(0, self.movements - len(templates) - len(occurrences) - len(extras))
+        month_weights = []
+        for month_start in months:
+            month_end = min(self.end, _add_months(month_start, 1) - timedelta(days=1))
+            month_weights.append(((month_end - month_start).days + 1) * MONTH_FACTOR.get(month_start.month, 1.0))
+        counts = _split(expense_count, month_weights)
+        # Los montos medianos de EXPENSES fijan la proporción entre categorías;
+        # `unit` los escala para que el gasto del mes sea DAILY_SPENDING del sueldo
+        mean_amount = sum(weight * median * taste[category] * math.exp(sigma ** 2 / 2) for category, (weight, median, sigma, _) in EXPENSES.items())
+        mean_amount /= sum(weight for weight, _, _, _ in EXPENSES.values())
+        per_month = expense_count / len(months)
+        unit = income * DAILY_SPENDING / (per_month * mean_amount) if expense_count else 0.0
+
+        by_month = {}
+        for row in occurrences + extras:
+            by_month.setdefault(row["fecha"][:7], []).append(row)
+        for month_start, count in zip(months, counts):
+            month_end = min(self.end, _add_months(month_start, 1) - timedelta(days=1))
+            days = [month_start + timedelta(days=offset) for offset in range((month_end - month_start).days + 1)]
+            day_weights = [WEEKDAY_FACTOR[day.weekday()] for day in days]
+            # Precios que suben con los años
+            price = unit * (1 + INFLATION) ** ((month_start - self.start).days / 365)
+            rows = by_month.get(month_start.isoformat()[:7], [])
+            chosen_days = rng.choices(days, weights=day_weights, k=count)
+            chosen_categories = rng.choices(self.expense_names, cum_weights=self.month_weights[month_start.month], k=count)
+            for day, category in sorted(zip(chosen_days, chosen_categories)):
+                _, median, sigma, _ = EXPENSES[category]
+                amount = median * price * taste[category] * rng.lognormvariate(0, sigma)
+                rows.append(self._movement(rng, new_id(), user_id, categories[category], "Gasto", day, amount, rng.choice(DESCRIPTIONS[category])))
+            yield "movimientos", rows
+        yield "ocurrencias_recurrentes", pending
+
+        # Presupuestos mensuales del último año para las categorías con más
+        # gasto y uno anual del año en curso
+        budgeted = sorted(self.expense_names, key=lambda category: EXPENSES[category][0] * EXPENSES[category][1] * taste[category], reverse=True)[:rng.randint(3, 8)]
+        budgets = []
+        for month_start in months[-12:]:
+            month_end = _add_months(month_start, 1) - timedelta(days=1)
+            cumulative = self.month_weights[month_start.month]
+            for category in budgeted:
+                weight, median, sigma, season = EXPENSES[category]
+                share = weight * season.get(month_start.month, 1.0) / cumulative[-1]
+                price = unit * (1 + INFLATION) ** ((month_start - self.start).days / 365)
+                expected = per_month * MONTH_FACTOR.get(month_start.month, 1.0) * share * median * price * taste[category] * math.exp(sigma ** 2 / 2)
+                budgets.append(self._budget(new_id(), user_id, categories[category], "mensual", month_start, month_end, expected * rng.uniform(0.9, 1.3)))
+        year_start = self.end.replace(month=1, day=1)
+        budgets.append(self._budget(new_id(), user_id, categories[budgeted[0]], "anual", year_start, year_start.replace(month=12, day=31), income * 12 * 0.15))
+        yield "presupuestos", budgets
+
+        yield "presupuesto_items", [
+            self._item(new_id(), user_id, "Sueldo", income, "ingreso_recurrente", categories["Salario"], "mensual"),
+            self._item(new_id(), user_id, "Arriendo", income * 0.3, "gasto_proyectado", categories["Vivienda"], "mensual"),
+            self._item(new_id(), user_id, "Mercado", 90 * scale, "gasto_proyectado", categories["Alimentación"], "semanal"),
+            self._item(new_id(), user_id, "Seguro auto", 600 * scale, "gasto_proyectado", categories["Seguros"], "anual"),
+            self._item(new_id(), user_id, "Vacaciones", 1500 * scale, "gasto_proyectado", categories["Viajes"], "anual")
+        ]
+
+    def _movement(self, rng, movement_id, user_id, category_id, kind, day, amount, description):
+        created_at = self._timestamp(rng, day)
+        return {
+            "id": movement_id,
+            "usuario_id": user_id,
+            "fecha": day.isoformat(),
+            "categoria_id": category_id,
+            "monto": round(max(amount, 0.01), 2),
+            "tipo": kind,
+            "descripcion": description,
+            "es_recurrente": False,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+
+    def _budget(self, budget_id, user_id, category_id, period, start, end, amount):
+        return {
+            "id": budget_id,
+            "usuario_id": user_id,
+            "categoria_id": category_id,
+            "monto_maximo": max(10, round(amount, -1)),
+            "periodo": period,
+            "fecha_inicio": start.isoformat(),
+            "fecha_fin": end.isoformat()
+        }
+
+    def _item(self, item_id, user_id, name, amount, kind, category_id, frequency):
+        return {
+            "id": item_id,
+            "usuario_id": user_id,
+            "nombre": name,
+            "monto": round(amount, 2),
+            "tipo": kind,
+            "categoria_id": category_id,
+            "frecuencia": frequency,
+            "fecha_inicio": self.start.isoformat()
+        }
+
+    @staticmethod
+    def _timestamp(rng, day: date) -> str:
+        """Hora del registro: durante el día, entre 7:00 y 23:00 UTC."""
+        moment = datetime(day.year, day.month, day.day, 7) + timedelta(seconds=rng.randrange(16 * 3600))
+        return moment.isoformat() + "+00:00"
+
+class FileWriter:
+    """Escribe `<tabla>.jsonl` en un directorio (SUPABASE_MEMORY_FIXTURE, --fixture)."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.files = {}
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    async def write(self, table: str, rows) -> None:
+        if table not in self.files:
+            self.files[table] = open(os.path.join(self.directory, f"{table}.jsonl"), "w", encoding="utf-8")
+        self.files[table].writelines(self.encode(row) + "\n" for row in rows)
+
+    async def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+
+class SupabaseWriter:
+    """Inserta por lotes con SupabaseService; crea los usuarios con la API de administración de Auth."""
+
+    def __init__(self, chunk_size: int, concurrency: int):
+        from app.services.supabase_service import supabase_service
+
+        self.supabase = supabase_service
+        self.chunk_size = chunk_size
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.pending = {table: set() for table in TABLE_ORDER}
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def write(self, table: str, rows) -> None:
+        if table == "auth_users":
+            for user in rows:
+                await self.supabase.call(self.supabase.auth.admin.create_user, {
+                    "id": user["id"],
+                    "email": user["email"],
+                    "password": user["password"],
+                    "email_confirm": True,
+                    "user_metadata": {"name": user["name"]}
+                })
+            return
+        buffer = self.buffers[table]
+        buffer.extend(rows)
+        while len(buffer) >= self.chunk_size:
+            await self._flush(table, buffer[:self.chunk_size])
+            del buffer[:self.chunk_size]
+
+    async def close(self) -> None:
+        for table in TABLE_ORDER:
+            if self.buffers[table]:
+                await self._flush(table, self.buffers[table])
+                self.buffers[table] = []
+        for table in TABLE_ORDER:
+            await self._wait(table)
+
+    async def _flush(self, table: str, chunk) -> None:
+        # Las tablas anteriores (usuarios, categorías) deben estar guardadas antes
+        for parent in TABLE_ORDER[:TABLE_ORDER.index(table)]:
+            if self.buffers[parent]:
+                chunk_parent, self.buffers[parent] = self.buffers[parent], []
+                await self._flush(parent, chunk_parent)
+            await self._wait(parent)
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._insert(table, chunk))
+        self.pending[table].add(task)
+        task.add_done_callback(self.pending[table].discard)
+
+    async def _insert(self, table: str, chunk) -> None:
+        try:
+            await self.supabase.execute(self.supabase.table(table).insert(chunk, returning="minimal"))
+        finally:
+            self.semaphore.release()
+
+    async def _wait(self, table: str) -> None:
+        if self.pending[table]:
+            await asyncio.gather(*self.pending[table])
+
+async def main(args):
+    if args.output:
+        # No se consulta Supabase: que importar la app no cree un cliente real
+        os.environ["SUPABASE_BACKEND"] = "memory"
+        os.environ.pop("SUPABASE_MEMORY_FIXTURE", None)
+    # Los logs por consulta distorsionan el avance
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    end = date.fromisoformat(args.end) if args.end else date.today()
+    generator = LedgerGenerator(args.seed, args.years, args.movements, end, args.password)
+    writer = FileWriter(args.output) if args.output else SupabaseWriter(args.chunk_size, args.concurrency)
+
+    totals = Counter()
+    started = time.perf_counter()
+    try:
+        for index in range(args.first_user, args.first_user + args.users):
+            for table, rows in generator.user(index):
+                await writer.write(table, rows)
+                totals[table] += len(rows)
+            done = index - args.first_user + 1
+            if done % max(1, args.users // 20) == 0 or done == args.users:
+                elapsed = time.perf_counter() - started
+                print(f"{done}/{args.users} usuarios, {totals['movimientos']} movimientos ({totals['movimientos'] / elapsed:,.0f} filas/s)")
+    finally:
+        await writer.close()
+
+    print(f"✅ Datos sintéticos del {generator.start} al {end}: {dict(totals)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="Directorio donde escribir un <tabla>.jsonl por tabla")
+    target.add_argument("--supabase", action="store_true", help="Insertar en el proyecto configurado (SUPABASE_URL/SUPABASE_KEY)")
+    parser.add_argument("--users", type=int, default=10, help="Usuarios a generar")
+    parser.add_argument("--first-user", type=int, default=0, help="Número del primer usuario (para repartir la generación)")
+    parser.add_argument("--movements", type=int, default=2000, help="Filas de movimientos por usuario (plantillas, ocurrencias aprobadas, ingresos y gastos)")
+    parser.add_argument("--years", type=int, default=3, help="Años de historial")
+    parser.add_argument("--end", help="Último día del historial (AAAA-MM-DD, hoy por defecto)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--password", default="synthetic-password", help="Contraseña de todos los usuarios")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Filas por inserción con --supabase")
+    parser.add_argument("--concurrency", type=int, default=4, help="Inserciones en paralelo con --supabase")
+    asyncio.run(main(parser.parse_args()))
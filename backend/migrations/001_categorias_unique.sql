@@ -0,0 +1,5 @@
+-- Evita categorías duplicadas cuando varios procesos intentan crear la misma
+-- categoría a la vez. CategoryResolver vuelve a leer la fila si el INSERT falla.
+-- Antes de aplicarlo, fusionar duplicados existentes si los hubiera.
+CREATE UNIQUE INDEX IF NOT EXISTS categorias_usuario_nombre_tipo_key
+    ON categorias (usuario_id, nombre, tipo);
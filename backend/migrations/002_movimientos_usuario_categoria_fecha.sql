@@ -0,0 +1,7 @@
+-- Soporta el cálculo de gasto por presupuesto (SpendingEngine): filtra por
+-- usuario y categorías dentro de un rango de fechas. Las columnas incluidas
+-- permiten resolver la consulta solo con el índice.
+-- En tablas grandes, ejecutar fuera de una transacción con CREATE INDEX CONCURRENTLY.
+CREATE INDEX IF NOT EXISTS movimientos_usuario_categoria_fecha_idx
+    ON movimientos (usuario_id, categoria_id, fecha)
+    INCLUDE (monto, tipo, es_recurrente);
@@ -0,0 +1,5 @@
+-- Soporta la paginación por cursor de GET /api/v1/movements: cada página es
+-- un recorrido del índice a partir de (fecha, id), sin OFFSET.
+-- En tablas grandes, ejecutar fuera de una transacción con CREATE INDEX CONCURRENTLY.
+CREATE INDEX IF NOT EXISTS movimientos_usuario_fecha_id_idx
+    ON movimientos (usuario_id, fecha DESC, id DESC);
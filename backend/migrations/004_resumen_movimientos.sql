@@ -0,0 +1,23 @@
+-- Totales de movimientos agrupados por tipo para el resumen financiero.
+-- Lo usan MovementService.get_financial_summary y obtener_resumen_financiero
+-- (app Streamlit) a través de supabase.rpc('resumen_movimientos', ...).
+-- SECURITY INVOKER: se aplican las mismas políticas RLS que a movimientos.
+CREATE OR REPLACE FUNCTION resumen_movimientos(
+    p_usuario_id uuid,
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL,
+    p_incluir_recurrentes boolean DEFAULT false
+)
+RETURNS TABLE (tipo text, total numeric, cantidad bigint)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    SELECT m.tipo::text, COALESCE(SUM(m.monto), 0)::numeric, COUNT(*)
+    FROM movimientos m
+    WHERE m.usuario_id = p_usuario_id
+      AND (p_incluir_recurrentes OR m.es_recurrente = false)
+      AND (p_fecha_inicio IS NULL OR m.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR m.fecha <= p_fecha_fin)
+    GROUP BY m.tipo;
+$$;
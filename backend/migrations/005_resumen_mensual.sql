@@ -0,0 +1,187 @@
+-- Totales mensuales por (usuario_id, mes, tipo, categoria_id), mantenidos por
+-- un trigger sobre movimientos: cada INSERT/UPDATE/DELETE aplica el delta del
+-- valor anterior (OLD) y del nuevo (NEW). Captura también las escrituras de la
+-- app Streamlit, que no pasan por el backend.
+-- Solo cuenta movimientos reales (es_recurrente = false).
+--
+-- Después de aplicarlo:
+--   1. Rellenar con los datos existentes:  python -m app.rollup_cli rebuild
+--   2. Verificar:                           python -m app.rollup_cli check
+--   3. Activar la lectura en el backend:    ROLLUPS_ENABLED=true
+
+CREATE TABLE IF NOT EXISTS resumen_mensual (
+    usuario_id uuid NOT NULL,
+    mes date NOT NULL,              -- primer día del mes
+    tipo text NOT NULL,
+    categoria_id uuid,
+    total numeric NOT NULL DEFAULT 0,
+    cantidad bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS resumen_mensual_key
+    ON resumen_mensual (usuario_id, mes, tipo, categoria_id) NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS resumen_mensual_usuario_categoria_mes_idx
+    ON resumen_mensual (usuario_id, categoria_id, mes);
+
+ALTER TABLE resumen_mensual ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS resumen_mensual_select_own ON resumen_mensual;
+CREATE POLICY resumen_mensual_select_own ON resumen_mensual
+    FOR SELECT USING (usuario_id = auth.uid());
+
+-- Sumar un delta a la fila del mes; borra la fila cuando queda vacía
+CREATE OR REPLACE FUNCTION resumen_mensual_aplicar(
+    p_usuario_id uuid, p_fecha date, p_tipo text, p_categoria_id uuid, p_monto numeric, p_cantidad integer
+)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO resumen_mensual AS r (usuario_id, mes, tipo, categoria_id, total, cantidad)
+    VALUES (p_usuario_id, date_trunc('month', p_fecha)::date, p_tipo, p_categoria_id, p_monto, p_cantidad)
+    ON CONFLICT (usuario_id, mes, tipo, categoria_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            cantidad = r.cantidad + EXCLUDED.cantidad,
+            updated_at = now();
+
+    DELETE FROM resumen_mensual
+    WHERE usuario_id = p_usuario_id
+      AND mes = date_trunc('month', p_fecha)::date
+      AND tipo = p_tipo
+      AND categoria_id IS NOT DISTINCT FROM p_categoria_id
+      AND cantidad = 0;
+$$;
+
+CREATE OR REPLACE FUNCTION resumen_mensual_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND NOT OLD.es_recurrente THEN
+        PERFORM resumen_mensual_aplicar(OLD.usuario_id, OLD.fecha, OLD.tipo, OLD.categoria_id, -OLD.monto, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NOT NEW.es_recurrente THEN
+        PERFORM resumen_mensual_aplicar(NEW.usuario_id, NEW.fecha, NEW.tipo, NEW.categoria_id, NEW.monto, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS movimientos_resumen_mensual ON movimientos;
+CREATE TRIGGER movimientos_resumen_mensual
+    AFTER INSERT OR DELETE OR UPDATE OF usuario_id, fecha, tipo, categoria_id, monto, es_recurrente
+    ON movimientos
+    FOR EACH ROW EXECUTE FUNCTION resumen_mensual_trigger();
+
+-- Reconstruir los totales desde movimientos (un usuario o todos).
+-- El bloqueo hace esperar a los triggers concurrentes, que aplican su delta
+-- sobre el resultado reconstruido.
+CREATE OR REPLACE FUNCTION reconstruir_resumen_mensual(p_usuario_id uuid DEFAULT NULL)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    filas bigint;
+BEGIN
+    LOCK TABLE resumen_mensual IN EXCLUSIVE MODE;
+
+    DELETE FROM resumen_mensual
+    WHERE p_usuario_id IS NULL OR usuario_id = p_usuario_id;
+
+    INSERT INTO resumen_mensual (usuario_id, mes, tipo, categoria_id, total, cantidad)
+    SELECT usuario_id, date_trunc('month', fecha)::date, tipo, categoria_id, SUM(monto), COUNT(*)
+    FROM movimientos
+    WHERE es_recurrente = false
+      AND (p_usuario_id IS NULL OR usuario_id = p_usuario_id)
+    GROUP BY usuario_id, date_trunc('month', fecha)::date, tipo, categoria_id;
+
+    GET DIAGNOSTICS filas = ROW_COUNT;
+    RETURN filas;
+END;
+$$;
+
+-- Diferencias entre los totales guardados y los calculados desde movimientos
+CREATE OR REPLACE FUNCTION verificar_resumen_mensual(p_usuario_id uuid DEFAULT NULL)
+RETURNS TABLE (
+    usuario_id uuid, mes date, tipo text, categoria_id uuid,
+    total_resumen numeric, total_real numeric, cantidad_resumen bigint, cantidad_real bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH real AS (
+        SELECT m.usuario_id, date_trunc('month', m.fecha)::date AS mes, m.tipo::text AS tipo, m.categoria_id,
+               SUM(m.monto) AS total, COUNT(*) AS cantidad
+        FROM movimientos m
+        WHERE m.es_recurrente = false
+          AND (p_usuario_id IS NULL OR m.usuario_id = p_usuario_id)
+        GROUP BY 1, 2, 3, 4
+    ),
+    guardado AS (
+        SELECT r.usuario_id, r.mes, r.tipo, r.categoria_id, r.total, r.cantidad
+        FROM resumen_mensual r
+        WHERE p_usuario_id IS NULL OR r.usuario_id = p_usuario_id
+    )
+    SELECT COALESCE(g.usuario_id, x.usuario_id), COALESCE(g.mes, x.mes), COALESCE(g.tipo, x.tipo),
+           COALESCE(g.categoria_id, x.categoria_id),
+           g.total, x.total, g.cantidad, x.cantidad
+    FROM guardado g
+    FULL OUTER JOIN real x
+        ON g.usuario_id = x.usuario_id AND g.mes = x.mes AND g.tipo = x.tipo
+       AND g.categoria_id IS NOT DISTINCT FROM x.categoria_id
+    WHERE g.total IS DISTINCT FROM x.total OR g.cantidad IS DISTINCT FROM x.cantidad;
+$$;
+
+-- Resumen por tipo leyendo los meses completos de resumen_mensual y solo los
+-- días sueltos de los extremos del rango desde movimientos.
+CREATE OR REPLACE FUNCTION resumen_movimientos_mensual(
+    p_usuario_id uuid,
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (tipo text, total numeric, cantidad bigint)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    WITH limites AS (
+        -- Primer y último mes completos dentro del rango
+        SELECT
+            CASE WHEN p_fecha_inicio IS NULL THEN NULL
+                 WHEN p_fecha_inicio = date_trunc('month', p_fecha_inicio)::date THEN p_fecha_inicio
+                 ELSE (date_trunc('month', p_fecha_inicio) + interval '1 month')::date
+            END AS mes_desde,
+            CASE WHEN p_fecha_fin IS NULL THEN NULL
+                 WHEN p_fecha_fin = (date_trunc('month', p_fecha_fin) + interval '1 month - 1 day')::date
+                     THEN date_trunc('month', p_fecha_fin)::date
+                 ELSE (date_trunc('month', p_fecha_fin) - interval '1 month')::date
+            END AS mes_hasta
+    ),
+    partes AS (
+        SELECT r.tipo, r.total, r.cantidad
+        FROM resumen_mensual r, limites l
+        WHERE r.usuario_id = p_usuario_id
+          AND (l.mes_desde IS NULL OR r.mes >= l.mes_desde)
+          AND (l.mes_hasta IS NULL OR r.mes <= l.mes_hasta)
+        UNION ALL
+        SELECT m.tipo::text, m.monto, 1
+        FROM movimientos m, limites l
+        WHERE m.usuario_id = p_usuario_id
+          AND m.es_recurrente = false
+          AND (p_fecha_inicio IS NULL OR m.fecha >= p_fecha_inicio)
+          AND (p_fecha_fin IS NULL OR m.fecha <= p_fecha_fin)
+          AND ((l.mes_desde IS NOT NULL AND m.fecha < l.mes_desde)
+               OR (l.mes_hasta IS NOT NULL AND m.fecha >= l.mes_hasta + interval '1 month'))
+    )
+    SELECT p.tipo, SUM(p.total), SUM(p.cantidad)::bigint
+    FROM partes p
+    GROUP BY p.tipo;
+$$;
+
+-- Las funciones de mantenimiento solo se ejecutan con la clave de servicio
+REVOKE EXECUTE ON FUNCTION resumen_mensual_aplicar(uuid, date, text, uuid, numeric, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION reconstruir_resumen_mensual(uuid) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION verificar_resumen_mensual(uuid) FROM PUBLIC, anon, authenticated;
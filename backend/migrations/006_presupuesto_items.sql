@@ -0,0 +1,49 @@
+-- Elementos del presupuesto estratégico (/budget-items, /budget-projections):
+-- ingresos recurrentes y gastos proyectados con su frecuencia. El motor de
+-- proyecciones los expande en importes mensuales y los compara con los
+-- movimientos reales.
+CREATE TABLE IF NOT EXISTS presupuesto_items (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    usuario_id uuid NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+    nombre text NOT NULL,
+    monto numeric NOT NULL CHECK (monto > 0),
+    tipo text NOT NULL CHECK (tipo IN ('ingreso_recurrente', 'gasto_proyectado')),
+    categoria_id uuid REFERENCES categorias (id) ON DELETE SET NULL,
+    frecuencia text NOT NULL CHECK (frecuencia IN ('semanal', 'mensual', 'anual')),
+    fecha_inicio date NOT NULL,
+    fecha_fin date,
+    activo boolean NOT NULL DEFAULT true,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    CHECK (fecha_fin IS NULL OR fecha_fin >= fecha_inicio)
+);
+
+CREATE INDEX IF NOT EXISTS presupuesto_items_usuario_idx
+    ON presupuesto_items (usuario_id) WHERE activo;
+
+ALTER TABLE presupuesto_items ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS presupuesto_items_own ON presupuesto_items;
+CREATE POLICY presupuesto_items_own ON presupuesto_items
+    FOR ALL USING (usuario_id = auth.uid()) WITH CHECK (usuario_id = auth.uid());
+
+-- Totales reales por mes y tipo para comparar con la proyección
+-- (ProjectionEngine; con ROLLUPS_ENABLED se lee resumen_mensual directamente).
+-- SECURITY INVOKER: se aplican las mismas políticas RLS que a movimientos.
+CREATE OR REPLACE FUNCTION resumen_movimientos_por_mes(
+    p_usuario_id uuid,
+    p_fecha_inicio date,
+    p_fecha_fin date
+)
+RETURNS TABLE (mes date, tipo text, total numeric)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    SELECT date_trunc('month', m.fecha)::date, m.tipo::text, SUM(m.monto)::numeric
+    FROM movimientos m
+    WHERE m.usuario_id = p_usuario_id
+      AND m.es_recurrente = false
+      AND m.fecha >= p_fecha_inicio
+      AND m.fecha <= p_fecha_fin
+    GROUP BY 1, 2;
+$$;
@@ -0,0 +1,113 @@
+-- Calendario precalculado de cada elemento del presupuesto estratégico: una
+-- fila por ocurrencia (fecha y monto). Se regenera solo cuando el elemento
+-- cambia (BudgetItemService) o cuando el horizonte guardado se queda corto;
+-- las proyecciones suman estas filas por mes en lugar de derivar las fechas
+-- en cada petición.
+ALTER TABLE presupuesto_items
+    -- Fecha hasta la que el calendario está generado; 'infinity' si está
+    -- completo (elemento con fin o inactivo) y '-infinity' si hay que generarlo
+    ADD COLUMN IF NOT EXISTS ocurrencias_hasta date NOT NULL DEFAULT '-infinity';
+
+CREATE TABLE IF NOT EXISTS presupuesto_item_ocurrencias (
+    item_id uuid NOT NULL REFERENCES presupuesto_items (id) ON DELETE CASCADE,
+    usuario_id uuid NOT NULL,
+    fecha date NOT NULL,
+    monto numeric NOT NULL,
+    tipo text NOT NULL,
+    PRIMARY KEY (item_id, fecha)
+);
+
+CREATE INDEX IF NOT EXISTS presupuesto_item_ocurrencias_usuario_fecha_idx
+    ON presupuesto_item_ocurrencias (usuario_id, fecha) INCLUDE (tipo, monto);
+
+ALTER TABLE presupuesto_item_ocurrencias ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS presupuesto_item_ocurrencias_own ON presupuesto_item_ocurrencias;
+CREATE POLICY presupuesto_item_ocurrencias_own ON presupuesto_item_ocurrencias
+    FOR ALL USING (usuario_id = auth.uid()) WITH CHECK (usuario_id = auth.uid());
+
+-- Regenerar el calendario desde el mes de p_desde hasta p_hasta: de un
+-- elemento (p_item_id) o de todos los del usuario cuyo calendario no llega a
+-- p_hasta. Mensual y anual repiten el día de fecha_inicio (el último del mes
+-- si ese mes es más corto). Devuelve las ocurrencias generadas.
+CREATE OR REPLACE FUNCTION regenerar_ocurrencias_presupuesto(
+    p_usuario_id uuid,
+    p_desde date,
+    p_hasta date,
+    p_item_id uuid DEFAULT NULL
+)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_items uuid[];
+    v_generadas bigint;
+BEGIN
+    SELECT array_agg(i.id) INTO v_items
+    FROM (
+        SELECT id
+        FROM presupuesto_items
+        WHERE usuario_id = p_usuario_id
+          AND (CASE WHEN p_item_id IS NULL THEN ocurrencias_hasta < p_hasta ELSE id = p_item_id END)
+        ORDER BY id
+        FOR UPDATE
+    ) i;
+
+    IF v_items IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    DELETE FROM presupuesto_item_ocurrencias WHERE item_id = ANY (v_items);
+
+    INSERT INTO presupuesto_item_ocurrencias (item_id, usuario_id, fecha, monto, tipo)
+    SELECT i.id, i.usuario_id, o.fecha, i.monto, i.tipo
+    FROM presupuesto_items i
+    CROSS JOIN LATERAL (
+        SELECT s::date AS fecha
+        FROM generate_series(i.fecha_inicio, LEAST(i.fecha_fin, p_hasta), interval '7 days') s
+        WHERE i.frecuencia = 'semanal'
+        UNION ALL
+        SELECT (i.fecha_inicio + k * CASE i.frecuencia WHEN 'anual' THEN interval '1 year' ELSE interval '1 month' END)::date
+        FROM generate_series(
+            0,
+            ((extract(year FROM LEAST(i.fecha_fin, p_hasta)) - extract(year FROM i.fecha_inicio)) * 12
+             + extract(month FROM LEAST(i.fecha_fin, p_hasta)) - extract(month FROM i.fecha_inicio))::integer
+            / CASE i.frecuencia WHEN 'anual' THEN 12 ELSE 1 END
+        ) k
+        WHERE i.frecuencia IN ('mensual', 'anual')
+    ) o
+    WHERE i.id = ANY (v_items)
+      AND i.activo
+      AND o.fecha >= date_trunc('month', p_desde)::date
+      AND o.fecha <= LEAST(i.fecha_fin, p_hasta);
+    GET DIAGNOSTICS v_generadas = ROW_COUNT;
+
+    UPDATE presupuesto_items
+    SET ocurrencias_hasta = CASE
+            WHEN activo AND (fecha_fin IS NULL OR fecha_fin > p_hasta) THEN p_hasta
+            ELSE 'infinity'::date
+        END
+    WHERE id = ANY (v_items);
+
+    RETURN v_generadas;
+END;
+$$;
+
+-- Totales proyectados por mes y tipo a partir del calendario guardado
+CREATE OR REPLACE FUNCTION proyeccion_presupuesto_por_mes(
+    p_usuario_id uuid,
+    p_fecha_inicio date,
+    p_fecha_fin date
+)
+RETURNS TABLE (mes date, tipo text, total numeric)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    SELECT date_trunc('month', o.fecha)::date, o.tipo, SUM(o.monto)::numeric
+    FROM presupuesto_item_ocurrencias o
+    WHERE o.usuario_id = p_usuario_id
+      AND o.fecha >= p_fecha_inicio
+      AND o.fecha <= p_fecha_fin
+    GROUP BY 1, 2;
+$$;
@@ -0,0 +1,75 @@
+-- Materialización de movimientos recurrentes (RecurringService).
+-- Las plantillas siguen siendo filas de movimientos con es_recurrente = true
+-- (frecuencia diario/semanal/mensual/anual, fecha = primera ocurrencia, fecha_fin).
+-- Cada ocurrencia vencida se guarda una sola vez como pendiente con una clave
+-- determinista '<plantilla_id>:<fecha>'; al aprobarla se inserta el movimiento
+-- real con esa misma clave, así repetir una materialización o una aprobación
+-- no duplica nada.
+
+-- Última fecha hasta la que se calcularon las ocurrencias de la plantilla.
+-- Al crear la columna se rellena para las plantillas anteriores: el flujo
+-- original copiaba la plantilla como movimiento normal con la fecha de
+-- aprobación, sin enlazarlos, así que se parte de la última copia (mismo
+-- usuario, categoría, monto, tipo y descripción) o, si no hay, de hoy. Sin esto
+-- la primera materialización crearía como pendientes todas las ocurrencias
+-- desde `fecha`. Las plantillas que empiezan hoy o después quedan en NULL.
+-- Solo corre en la ejecución que crea la columna: volver a aplicar el script
+-- no toca plantillas creadas después.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'movimientos' AND column_name = 'ultima_materializacion'
+    ) THEN
+        ALTER TABLE movimientos ADD COLUMN ultima_materializacion date;
+        
+        UPDATE movimientos plantilla
+        SET ultima_materializacion = COALESCE(
+            (
+                SELECT max(copia.fecha)
+                FROM movimientos copia
+                WHERE copia.usuario_id = plantilla.usuario_id
+                  AND NOT copia.es_recurrente
+                  AND copia.categoria_id IS NOT DISTINCT FROM plantilla.categoria_id
+                  AND copia.monto = plantilla.monto
+                  AND copia.tipo = plantilla.tipo
+                  AND copia.descripcion IS NOT DISTINCT FROM plantilla.descripcion
+                  AND copia.fecha >= plantilla.fecha
+            ),
+            CURRENT_DATE
+        )
+        WHERE plantilla.es_recurrente
+          AND plantilla.fecha < CURRENT_DATE;
+    END IF;
+END;
+$$;
+
+-- Clave de la ocurrencia que originó el movimiento (NULL en movimientos manuales)
+ALTER TABLE movimientos ADD COLUMN IF NOT EXISTS ocurrencia_clave text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS movimientos_ocurrencia_clave_key
+    ON movimientos (ocurrencia_clave);
+CREATE INDEX IF NOT EXISTS movimientos_recurrentes_idx
+    ON movimientos (ultima_materializacion NULLS FIRST) WHERE es_recurrente;
+
+CREATE TABLE IF NOT EXISTS ocurrencias_recurrentes (
+    clave text PRIMARY KEY,
+    plantilla_id uuid NOT NULL REFERENCES movimientos (id) ON DELETE CASCADE,
+    usuario_id uuid NOT NULL,
+    fecha date NOT NULL,
+    categoria_id uuid REFERENCES categorias (id) ON DELETE SET NULL,
+    monto numeric NOT NULL,
+    tipo text NOT NULL,
+    descripcion text,
+    estado text NOT NULL DEFAULT 'pendiente' CHECK (estado IN ('pendiente', 'aprobada', 'rechazada')),
+    created_at timestamptz NOT NULL DEFAULT now(),
+    resuelta_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS ocurrencias_recurrentes_usuario_estado_fecha_idx
+    ON ocurrencias_recurrentes (usuario_id, estado, fecha);
+
+ALTER TABLE ocurrencias_recurrentes ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS ocurrencias_recurrentes_own ON ocurrencias_recurrentes;
+CREATE POLICY ocurrencias_recurrentes_own ON ocurrencias_recurrentes
+    FOR ALL USING (usuario_id = auth.uid()) WITH CHECK (usuario_id = auth.uid());
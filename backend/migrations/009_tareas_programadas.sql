@@ -0,0 +1,47 @@
+-- Leases de las tareas en segundo plano del backend (app/services/scheduler.py).
+-- Con varios workers o réplicas, cada tarea la ejecuta solo quien toma el
+-- lease; el lease vence solo, así un worker caído no bloquea la tarea.
+CREATE TABLE IF NOT EXISTS tareas_programadas (
+    nombre text PRIMARY KEY,
+    propietario text NOT NULL,
+    vence_at timestamptz NOT NULL,
+    tomado_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE tareas_programadas ENABLE ROW LEVEL SECURITY;
+
+-- Tomar (o renovar) el lease de una tarea durante p_segundos; false si otro
+-- propietario lo tiene vigente
+CREATE OR REPLACE FUNCTION tomar_lease_tarea(p_nombre text, p_propietario text, p_segundos integer)
+RETURNS boolean
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH tomado AS (
+        INSERT INTO tareas_programadas (nombre, propietario, vence_at, tomado_at)
+        VALUES (p_nombre, p_propietario, now() + make_interval(secs => p_segundos), now())
+        ON CONFLICT (nombre) DO UPDATE
+            SET propietario = EXCLUDED.propietario, vence_at = EXCLUDED.vence_at, tomado_at = EXCLUDED.tomado_at
+            WHERE tareas_programadas.vence_at <= now()
+               OR tareas_programadas.propietario = EXCLUDED.propietario
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM tomado);
+$$;
+
+-- Liberar el lease antes de que venza (por ejemplo, si la tarea falló)
+CREATE OR REPLACE FUNCTION liberar_lease_tarea(p_nombre text, p_propietario text)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE tareas_programadas
+    SET vence_at = now()
+    WHERE nombre = p_nombre AND propietario = p_propietario;
+$$;
+
+-- Solo el backend (clave de servicio) toma leases
+REVOKE EXECUTE ON FUNCTION tomar_lease_tarea(text, text, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION liberar_lease_tarea(text, text) FROM PUBLIC, anon, authenticated;
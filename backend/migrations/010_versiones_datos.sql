@@ -0,0 +1,82 @@
+-- Versión de los datos de cada usuario para los ETag de la API (app/services/data_version.py).
+-- Triggers por sentencia sobre las tablas que muestran las respuestas
+-- condicionales suben la versión en cada INSERT/UPDATE/DELETE, así todos los
+-- workers y réplicas, y también las escrituras de la app Streamlit, ven el
+-- mismo valor. El alcance es el usuario_id, o '*' para el catálogo global
+-- (`categories`).
+--
+-- Debe aplicarse antes de desplegar el backend: sin esta tabla la API
+-- responde sin ETag (nunca 304).
+
+CREATE TABLE IF NOT EXISTS versiones_datos (
+    alcance text PRIMARY KEY,
+    version bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE versiones_datos ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS versiones_datos_select_own ON versiones_datos;
+CREATE POLICY versiones_datos_select_own ON versiones_datos
+    FOR SELECT USING (alcance = auth.uid()::text OR alcance = '*');
+
+-- Subir una vez la versión de cada alcance tocado por la sentencia
+CREATE OR REPLACE FUNCTION versiones_datos_subir()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'categories' THEN
+        INSERT INTO versiones_datos AS v (alcance, version)
+        VALUES ('*', 1)
+        ON CONFLICT (alcance) DO UPDATE SET version = v.version + 1, updated_at = now();
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO versiones_datos AS v (alcance, version)
+        SELECT DISTINCT usuario_id::text, 1 FROM filas_nuevas WHERE usuario_id IS NOT NULL
+        ON CONFLICT (alcance) DO UPDATE SET version = v.version + 1, updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO versiones_datos AS v (alcance, version)
+        SELECT usuario_id::text, 1 FROM filas_nuevas WHERE usuario_id IS NOT NULL
+        UNION
+        SELECT usuario_id::text, 1 FROM filas_viejas WHERE usuario_id IS NOT NULL
+        ON CONFLICT (alcance) DO UPDATE SET version = v.version + 1, updated_at = now();
+    ELSE
+        INSERT INTO versiones_datos AS v (alcance, version)
+        SELECT DISTINCT usuario_id::text, 1 FROM filas_viejas WHERE usuario_id IS NOT NULL
+        ON CONFLICT (alcance) DO UPDATE SET version = v.version + 1, updated_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Un trigger por operación: cada una expone tablas de transición distintas
+DO $$
+DECLARE
+    tabla text;
+BEGIN
+    FOREACH tabla IN ARRAY ARRAY[
+        'movimientos', 'categorias', 'presupuestos', 'presupuesto_items',
+        'presupuesto_item_ocurrencias', 'ocurrencias_recurrentes', 'categories'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tabla || '_version_insert', tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tabla || '_version_update', tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tabla || '_version_delete', tabla);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS filas_nuevas '
+            'FOR EACH STATEMENT EXECUTE FUNCTION versiones_datos_subir()',
+            tabla || '_version_insert', tabla
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas '
+            'FOR EACH STATEMENT EXECUTE FUNCTION versiones_datos_subir()',
+            tabla || '_version_update', tabla
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS filas_viejas '
+            'FOR EACH STATEMENT EXECUTE FUNCTION versiones_datos_subir()',
+            tabla || '_version_delete', tabla
+        );
+    END LOOP;
+END;
+$$;
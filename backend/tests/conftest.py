@@ -0,0 +1,55 @@
+"""
+Configuración común de las pruebas.
+
+Las pruebas corren sobre el backend en memoria (SUPABASE_BACKEND=memory):
+no necesitan red ni un proyecto de Supabase. La configuración de la app se
+lee al importarla, así que el entorno se fija antes de cualquier import de `app`.
+
+Uso (desde backend/):
+    python -m pytest -q
+"""
+
+import os
+
+os.environ["SUPABASE_BACKEND"] = "memory"
+os.environ["SUPABASE_URL"] = "http://127.0.0.1:54321"
+os.environ["SUPABASE_KEY"] = "local"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["ROLLUPS_ENABLED"] = "false"
+os.environ.pop("SUPABASE_MEMORY_FIXTURE", None)
+
+import logging
+
+import pytest
+
+from app.services.supabase_service import supabase_service
+from app.services.category_resolver import category_resolver
+from app.services.category_service import category_service
+from app.services.data_version import data_version_service
+
+# Los logs por consulta del backend en memoria no aportan en las pruebas
+logging.getLogger("app").setLevel(logging.WARNING)
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+@pytest.fixture(autouse=True)
+def database():
+    """Base de datos en memoria vacía y cachés del proceso limpias en cada prueba."""
+    supabase_service.database.clear()
+    category_resolver.cache.clear()
+    category_service.invalidate_catalogue()
+    data_version_service.cache.clear()
+    return supabase_service.database
+
+@pytest.fixture
+def client():
+    """Cliente HTTP de la API autenticado como USER_ID (sin pasar por Auth)."""
+    from fastapi.testclient import TestClient
+    from app.main import app, get_current_user
+    from app.models.user import UserResponse
+    
+    app.dependency_overrides[get_current_user] = lambda: UserResponse(id=USER_ID, email="test@example.com", name="Test")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
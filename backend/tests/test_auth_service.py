@@ -0,0 +1,153 @@
+"""Pruebas de la verificación de tokens, el perfil y las cachés de usuarios."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.config import settings
+from app.services import cache as cache_module
+from app.services.auth_service import AuthService
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+SECRET = "supabase-jwt-secret-de-prueba"
+KID = "clave-1"
+
+@pytest.fixture
+def supabase_auth(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "supabase")
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", SECRET)
+    return AuthService()
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    public_pem = private.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+    return private_pem, public_pem
+
+def claims(**changes):
+    payload = {
+        "sub": USER_ID,
+        "email": "ana@example.com",
+        "aud": settings.SUPABASE_JWT_AUDIENCE,
+        "role": "authenticated",
+        "user_metadata": {"name": "Ana"},
+        "exp": int(time.time()) + 3600
+    }
+    payload.update(changes)
+    return {key: value for key, value in payload.items() if value is not None}
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def test_hs256_secret(supabase_auth):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    assert supabase_auth.verify_supabase_token(token)["sub"] == USER_ID
+    assert supabase_auth.verify_supabase_token(jwt.encode(claims(), "otro-secreto", algorithm="HS256")) is None
+
+def test_jwks_key_by_kid(supabase_auth, rsa_key):
+    private_pem, public_pem = rsa_key
+    supabase_auth.supabase_jwks = {KID: dict(jwk.construct(public_pem, "RS256").to_dict(), kid=KID)}
+
+    token = jwt.encode(claims(), private_pem, algorithm="RS256", headers={"kid": KID})
+    assert supabase_auth.verify_supabase_token(token)["sub"] == USER_ID
+    # Un kid desconocido cae en el secreto HS256 y la firma RS256 no sirve
+    assert supabase_auth.verify_supabase_token(jwt.encode(claims(), private_pem, algorithm="RS256", headers={"kid": "otra"})) is None
+
+def test_wrong_audience_expired_and_missing_sub(supabase_auth):
+    assert supabase_auth.verify_supabase_token(jwt.encode(claims(aud="anon"), SECRET, algorithm="HS256")) is None
+    assert supabase_auth.verify_supabase_token(jwt.encode(claims(exp=int(time.time()) - 10), SECRET, algorithm="HS256")) is None
+    assert supabase_auth.verify_supabase_token(jwt.encode(claims(sub=None), SECRET, algorithm="HS256")) is None
+    assert supabase_auth.verify_supabase_token("no-es-un-token") is None
+
+def test_hs256_signed_with_jwks_public_key_is_rejected(supabase_auth, rsa_key):
+    # Confusión de algoritmo: HMAC con la clave pública como secreto y el kid de la JWKS
+    _, public_pem = rsa_key
+    supabase_auth.supabase_jwks = {KID: dict(jwk.construct(public_pem, "RS256").to_dict(), kid=KID)}
+    for header in ({"alg": "HS256", "typ": "JWT", "kid": KID}, {"alg": "HS256", "typ": "JWT"}):
+        signing_input = f"{b64(json.dumps(header).encode())}.{b64(json.dumps(claims()).encode())}"
+        signature = hmac.new(public_pem.encode(), signing_input.encode(), hashlib.sha256).digest()
+        assert supabase_auth.verify_supabase_token(f"{signing_input}.{b64(signature)}") is None
+
+def test_login_backfills_missing_name(supabase_auth, database):
+    # Usuario registrado antes de AUTH_MODE=supabase: nombre solo en `usuarios`
+    database.auth.add_user("ana@example.com", "secreta123", {}, USER_ID)
+    database.load({"usuarios": [{"id": USER_ID, "email": "ana@example.com", "name": "Ana María"}]})
+
+    result = asyncio.run(supabase_auth.authenticate_user("ana@example.com", "secreta123"))
+    assert result["success"], result
+    assert result["user"].name == "Ana María"
+    assert asyncio.run(supabase_auth.get_current_user(result["token"].access_token)).name == "Ana María"
+
+    # La siguiente sesión ya trae el nombre en sus claims
+    session = database.auth.sign_in_with_password({"email": "ana@example.com", "password": "secreta123"}).session
+    assert AuthService().user_from_claims(jwt.get_unverified_claims(session.access_token)).name == "Ana María"
+
+class FakeClock:
+    """Reloj de la caché adelantable, sin esperar de verdad."""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def time(self):
+        return time.time() + self.offset
+
+    def monotonic(self):
+        return time.monotonic() + self.offset
+
+def test_profile_update_invalidates_cached_user(database):
+    auth = AuthService()
+    database.load({"usuarios": [{"id": USER_ID, "email": "ana@example.com", "name": "Ana"}]})
+    token = auth.create_access_token({"sub": USER_ID})
+
+    assert asyncio.run(auth.get_current_user(token)).name == "Ana"
+    with supabase_service.count_calls() as counter:
+        assert asyncio.run(auth.get_current_user(token)).name == "Ana"
+    assert counter["calls"] == 0
+
+    assert asyncio.run(auth.update_user_profile(USER_ID, {"name": "Ana María"}))["success"]
+    assert asyncio.run(auth.get_current_user(token)).name == "Ana María"
+
+def test_profile_update_overrides_token_claims(supabase_auth, database):
+    database.load({"usuarios": [{"id": USER_ID, "email": "ana@example.com", "name": "Ana"}]})
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    assert asyncio.run(supabase_auth.get_current_user(token)).name == "Ana"
+
+    assert asyncio.run(supabase_auth.update_user_profile(USER_ID, {"name": "Ana María"}))["success"]
+    # El token conserva los claims viejos; este proceso ya sirve el perfil nuevo
+    assert asyncio.run(supabase_auth.get_current_user(token)).name == "Ana María"
+
+def test_cached_token_expires_with_the_token(database, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    auth = AuthService()
+    database.load({"usuarios": [{"id": USER_ID, "email": "ana@example.com", "name": "Ana"}]})
+    # Vence antes que USER_CACHE_TTL_SECONDS: la entrada no puede durar más que el token
+    token = auth.create_access_token({"sub": USER_ID}, expires_delta=timedelta(seconds=settings.USER_CACHE_TTL_SECONDS / 2))
+
+    assert asyncio.run(auth.get_current_user(token)).id == USER_ID
+    assert auth.token_cache.get(token) == USER_ID
+
+    clock.offset = settings.USER_CACHE_TTL_SECONDS / 2 + 1
+    assert auth.token_cache.get(token) is None
+
+def test_cached_supabase_user_expires_with_the_token(supabase_auth, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    token = jwt.encode(claims(exp=int(time.time()) + 20), SECRET, algorithm="HS256")
+
+    assert asyncio.run(supabase_auth.get_current_user(token)).name == "Ana"
+    assert supabase_auth.token_cache.get(token) is not None
+
+    clock.offset = 21
+    assert supabase_auth.token_cache.get(token) is None
@@ -0,0 +1,76 @@
+"""Pruebas de BudgetService."""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.budget_service import budget_service
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+CATEGORIES = ["Alimentación", "Transporte", "Salud", "Ocio", "Hogar"]
+
+def seed_budgets(database, count: int):
+    """Cargar `count` presupuestos con movimientos en sus categorías."""
+    categories = [{"id": f"cat-{index}", "usuario_id": USER_ID, "nombre": name, "tipo": "Gasto"} for index, name in enumerate(CATEGORIES)]
+    budgets = [
+        {
+            "id": f"budget-{index}",
+            "usuario_id": USER_ID,
+            "categoria_id": f"cat-{index % len(CATEGORIES)}",
+            "monto_maximo": 500,
+            "periodo": "mensual",
+            # Ventanas que empiezan y terminan a mitad de mes
+            "fecha_inicio": f"2026-{index % 12 + 1:02d}-10",
+            "fecha_fin": f"2026-{index % 12 + 1:02d}-28"
+        }
+        for index in range(count)
+    ]
+    movements = [
+        {
+            "id": f"mov-{index}",
+            "usuario_id": USER_ID,
+            "fecha": f"2026-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+            "categoria_id": f"cat-{index % len(CATEGORIES)}",
+            "monto": 10,
+            "tipo": "Gasto",
+            "es_recurrente": False
+        }
+        for index in range(400)
+    ]
+    database.load({"categorias": categories, "presupuestos": budgets, "movimientos": movements})
+    return budgets, movements
+
+async def count_get_budgets():
+    """Consultas que hace `get_budgets` y los presupuestos que devuelve."""
+    with supabase_service.count_calls() as counter:
+        result = await budget_service.get_budgets(USER_ID)
+    assert result["success"], result
+    return counter["calls"], result["data"]
+
+@pytest.mark.parametrize("rollups", [False, True])
+def test_get_budgets_query_count_does_not_grow_with_budgets(database, monkeypatch, rollups):
+    """El número de consultas no depende de cuántos presupuestos tenga el usuario (sin N+1)."""
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", rollups)
+    calls = {}
+    for count in (1, 50):
+        database.clear()
+        seed_budgets(database, count)
+        calls[count], budgets = asyncio.run(count_get_budgets())
+        assert len(budgets) == count
+    assert calls[1] == calls[50]
+
+def test_get_budgets_spending_matches_movements(database):
+    """El gasto de cada presupuesto es la suma de sus movimientos en la ventana."""
+    budgets, movements = seed_budgets(database, 12)
+    _, result = asyncio.run(count_get_budgets())
+    by_id = {budget["id"]: budget for budget in budgets}
+    for budget in result:
+        stored = by_id[budget["id"]]
+        expected = sum(
+            movement["monto"] for movement in movements
+            if movement["categoria_id"] == stored["categoria_id"]
+            and stored["fecha_inicio"] <= movement["fecha"] <= stored["fecha_fin"]
+        )
+        assert budget["current_amount"] == expected
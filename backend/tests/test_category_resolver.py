@@ -0,0 +1,86 @@
+"""Pruebas del resolvedor compartido de ids de `categorias`."""
+
+import asyncio
+import uuid
+
+from app.services.category_resolver import CategoryResolver
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+def categories(database):
+    return database.query("categorias").select("*").eq("usuario_id", USER_ID).execute().data
+
+def slow_backend(monkeypatch):
+    """Latencia de red: sin ella el backend en memoria responde sin ceder el event loop."""
+    execute = supabase_service.execute
+
+    async def slow_execute(query):
+        await asyncio.sleep(0.01)
+        return await execute(query)
+
+    monkeypatch.setattr(supabase_service, "execute", slow_execute)
+
+def test_concurrent_get_or_create_inserts_once(database, monkeypatch):
+    slow_backend(monkeypatch)
+    resolver = CategoryResolver()
+
+    async def scenario():
+        with supabase_service.count_calls() as counter:
+            ids = await asyncio.gather(*[resolver.get_or_create(USER_ID, "Mercado", "Gasto") for _ in range(10)])
+        # Una lectura y una inserción compartidas por las diez llamadas
+        assert counter["calls"] == 2
+        return ids
+
+    ids = asyncio.run(scenario())
+    assert len(set(ids)) == 1
+    assert [row["id"] for row in categories(database)] == [ids[0]]
+
+def test_unique_violation_rereads_instead_of_failing(database, monkeypatch):
+    # Otro proceso crea la categoría entre la lectura y la inserción
+    resolver = CategoryResolver()
+    select = resolver._select
+    existing = str(uuid.UUID(int=5))
+
+    async def stale_select(user_id, name, movement_type):
+        if not categories(database):
+            database.load({"categorias": [{"id": existing, "usuario_id": USER_ID, "nombre": name, "tipo": movement_type}]})
+            return None
+        return await select(user_id, name, movement_type)
+
+    monkeypatch.setattr(resolver, "_select", stale_select)
+    assert asyncio.run(resolver.get_or_create(USER_ID, "Mercado", "Gasto")) == existing
+    assert len(categories(database)) == 1
+
+def test_get_or_create_many_selects_and_inserts_once(database):
+    database.load({"categorias": [{"id": str(uuid.UUID(int=1)), "usuario_id": USER_ID, "nombre": "Salario", "tipo": "Ingreso"}]})
+    resolver = CategoryResolver()
+    keys = [("Salario", "Ingreso"), ("Mercado", "Gasto"), ("Transporte", "Gasto"), ("Mercado", "Gasto")]
+
+    with supabase_service.count_calls() as counter:
+        result = asyncio.run(resolver.get_or_create_many(USER_ID, keys))
+    assert counter["calls"] == 2
+    assert result[("Salario", "Ingreso")] == str(uuid.UUID(int=1))
+    stored = {(row["nombre"], row["tipo"]): row["id"] for row in categories(database)}
+    assert result == stored
+
+    # Todo queda en caché: repetir no consulta nada
+    with supabase_service.count_calls() as counter:
+        assert asyncio.run(resolver.get_or_create_many(USER_ID, keys)) == result
+    assert counter["calls"] == 0
+
+def test_negative_cache_does_not_hide_a_later_category(database):
+    resolver = CategoryResolver()
+    assert asyncio.run(resolver.lookup(USER_ID, "Mercado", "Gasto")) is None
+
+    # Creada por fuera después de la búsqueda: get_or_create la encuentra en vez de duplicarla
+    existing = str(uuid.UUID(int=7))
+    database.load({"categorias": [{"id": existing, "usuario_id": USER_ID, "nombre": "Mercado", "tipo": "Gasto"}]})
+    assert asyncio.run(resolver.get_or_create(USER_ID, "Mercado", "Gasto")) == existing
+    assert len(categories(database)) == 1
+    assert asyncio.run(resolver.lookup(USER_ID, "Mercado", "Gasto")) == existing
+
+    # Una creación propia tampoco queda oculta por la búsqueda negativa anterior
+    assert asyncio.run(resolver.lookup(USER_ID, "Cine", "Gasto")) is None
+    created = asyncio.run(resolver.get_or_create(USER_ID, "Cine", "Gasto"))
+    assert created is not None
+    assert asyncio.run(resolver.lookup(USER_ID, "Cine", "Gasto")) == created
@@ -0,0 +1,102 @@
+"""Pruebas del catálogo global de categorías en memoria."""
+
+import asyncio
+import uuid
+
+from app.models.category import CategoryCreate, MovementType
+from app.services.category_service import CategoryService
+from app.services.data_version import data_version_service, GLOBAL_SCOPE
+from app.services.supabase_service import supabase_service
+
+CATEGORIES = "/api/v1/categories"
+
+def seed(database):
+    database.load({"categories": [
+        {"id": str(uuid.UUID(int=1)), "name": "Salario", "type": "INGRESO"},
+        {"id": str(uuid.UUID(int=2)), "name": "Arriendo", "type": "GASTO"}
+    ]})
+
+def test_write_invalidates_catalogue(database):
+    seed(database)
+    service = CategoryService()
+
+    async def scenario():
+        # Versión global y catálogo; la segunda lectura no consulta nada
+        with supabase_service.count_calls() as counter:
+            first = await service.get_categories()
+            assert await service.get_categories() == first
+        assert counter["calls"] == 2
+
+        generation = service._catalogue_generation
+        await service.create_category(CategoryCreate(name="Mercado", type=MovementType.GASTO))
+        assert service._catalogue_generation == generation + 1
+
+        with supabase_service.count_calls() as counter:
+            names = [category.name for category in await service.get_categories()]
+        assert counter["calls"] == 2
+        assert sorted(names) == ["Arriendo", "Mercado", "Salario"]
+
+    asyncio.run(scenario())
+
+def test_concurrent_readers_load_once(database, monkeypatch):
+    # Instancia nueva: el lock del catálogo queda ligado al event loop de cada prueba
+    seed(database)
+    service = CategoryService()
+    execute = supabase_service.execute
+
+    async def slow_execute(query):
+        # Latencia de red: sin ella el backend en memoria responde sin ceder el event loop
+        await asyncio.sleep(0.01)
+        return await execute(query)
+
+    monkeypatch.setattr(supabase_service, "execute", slow_execute)
+
+    async def scenario():
+        # En una petición la dependencia del ETag ya leyó la versión
+        await data_version_service.get(GLOBAL_SCOPE)
+        with supabase_service.count_calls() as counter:
+            results = await asyncio.gather(*[service.get_categories_json() for _ in range(10)])
+        assert counter["calls"] == 1
+        assert len(set(results)) == 1
+
+    asyncio.run(scenario())
+
+def test_write_during_load_is_not_cached(database, monkeypatch):
+    seed(database)
+    service = CategoryService()
+    load = service._load_categories
+
+    async def racing_load(type=None):
+        categories = await load(type)
+        service.invalidate_catalogue()
+        return categories
+
+    async def scenario():
+        monkeypatch.setattr(service, "_load_categories", racing_load)
+        await service.get_categories()
+        monkeypatch.setattr(service, "_load_categories", load)
+
+        with supabase_service.count_calls() as counter:
+            await service.get_categories()
+        assert counter["calls"] == 1
+
+    asyncio.run(scenario())
+
+def test_write_outside_the_api_reloads_catalogue(client, database):
+    # Otro worker, la app Streamlit o SQL: el proceso solo ve el cambio de versión
+    seed(database)
+    first = client.get(CATEGORIES)
+    assert len(first.json()["data"]) == 2
+
+    database.load({"categories": [{"id": str(uuid.UUID(int=3)), "name": "Mercado", "type": "GASTO"}]})
+    data_version_service.cache.clear()
+    second = client.get(CATEGORIES, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert sorted(row["name"] for row in second.json()["data"]) == ["Arriendo", "Mercado", "Salario"]
+
+    # Con el ETag nuevo, 304 corresponde al catálogo nuevo
+    assert client.get(CATEGORIES, headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+    with supabase_service.count_calls() as counter:
+        assert client.get(CATEGORIES).content == second.content
+    assert counter["calls"] == 0
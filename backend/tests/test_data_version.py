@@ -0,0 +1,128 @@
+"""Pruebas de los ETag derivados de `versiones_datos` (migración 010)."""
+
+import asyncio
+import uuid
+
+from app.services.data_version import data_version_service, GLOBAL_SCOPE
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+MOVEMENTS = "/api/v1/movements"
+CATEGORIES = "/api/v1/categories"
+
+def seed(database):
+    category = {"id": str(uuid.UUID(int=1)), "usuario_id": USER_ID, "nombre": "Alimentación", "tipo": "Gasto"}
+    database.load({"categorias": [category]})
+    return category
+
+def movement_row(category, **changes):
+    row = {
+        "id": str(uuid.uuid4()),
+        "usuario_id": USER_ID,
+        "fecha": "2026-03-15",
+        "categoria_id": category["id"],
+        "monto": 10,
+        "tipo": "Gasto",
+        "es_recurrente": False
+    }
+    row.update(changes)
+    return row
+
+def test_unchanged_data_returns_304(client, database):
+    seed(database)
+    first = client.get(MOVEMENTS)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get(MOVEMENTS, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+
+def test_api_write_changes_etag(client, database):
+    category = seed(database)
+    etag = client.get(MOVEMENTS).headers["ETag"]
+
+    created = client.post(MOVEMENTS, json={
+        "amount": 25,
+        "category": category["nombre"],
+        "movement_type": "Gasto",
+        "movement_date": "2026-03-16"
+    })
+    assert created.status_code == 200, created.text
+
+    after = client.get(MOVEMENTS, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert len(after.json()["data"]) == 1
+
+def test_write_outside_the_api_changes_etag(client, database):
+    # Escritura directa en la base (otro worker o la app Streamlit): solo la ve el trigger
+    category = seed(database)
+    etag = client.get(MOVEMENTS).headers["ETag"]
+
+    supabase_service.table("movimientos").insert(movement_row(category)).execute()
+    # Dentro de DATA_VERSION_CACHE_SECONDS se sirve la versión guardada por el proceso
+    assert client.get(MOVEMENTS, headers={"If-None-Match": etag}).status_code == 304
+    data_version_service.cache.clear()
+    after = client.get(MOVEMENTS, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+
+    etag = after.headers["ETag"]
+    supabase_service.table("movimientos").update({"monto": 99}).eq("usuario_id", USER_ID).execute()
+    data_version_service.cache.clear()
+    assert client.get(MOVEMENTS, headers={"If-None-Match": etag}).status_code == 200
+
+def test_other_users_writes_keep_etag(client, database):
+    category = seed(database)
+    etag = client.get(MOVEMENTS).headers["ETag"]
+
+    other = str(uuid.UUID(int=2))
+    database.load({"movimientos": [movement_row(category, usuario_id=other)]})
+    assert client.get(MOVEMENTS, headers={"If-None-Match": etag}).status_code == 304
+
+def test_global_catalogue_etag(client, database):
+    database.load({"categories": [{"id": str(uuid.UUID(int=11)), "name": "Salario", "type": "INGRESO"}]})
+    etag = client.get(CATEGORIES).headers["ETag"]
+    assert client.get(CATEGORIES, headers={"If-None-Match": etag}).status_code == 304
+
+    database.load({"categories": [{"id": str(uuid.UUID(int=12)), "name": "Arriendo", "type": "GASTO"}]})
+    data_version_service.cache.clear()
+    assert client.get(CATEGORIES, headers={"If-None-Match": etag}).status_code == 200
+    assert asyncio.run(data_version_service.get(GLOBAL_SCOPE)).startswith("2.")
+
+def test_missing_version_table_disables_etag(client, database, monkeypatch):
+    async def failing_get(scope):
+        return None
+
+    monkeypatch.setattr(data_version_service, "get", failing_get)
+    response = client.get(MOVEMENTS, headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+def test_repeated_polls_read_the_version_once(client, database):
+    seed(database)
+    etag = client.get(MOVEMENTS).headers["ETag"]
+
+    with supabase_service.count_calls() as counter:
+        for _ in range(5):
+            assert client.get(MOVEMENTS, headers={"If-None-Match": etag}).status_code == 304
+    assert counter["calls"] == 0
+
+    # Vencido el TTL se vuelve a leer una vez
+    data_version_service.cache.clear()
+    with supabase_service.count_calls() as counter:
+        assert client.get(MOVEMENTS, headers={"If-None-Match": etag}).status_code == 304
+    assert counter["calls"] == 1
+
+def test_unreadable_version_is_cached_too(database, monkeypatch):
+    calls = []
+
+    async def failing_execute(query):
+        calls.append(query)
+        raise RuntimeError("relation versiones_datos does not exist")
+
+    monkeypatch.setattr(data_version_service.supabase, "execute", failing_execute)
+    assert asyncio.run(data_version_service.etag(USER_ID, MOVEMENTS)) is None
+    assert asyncio.run(data_version_service.etag(USER_ID, MOVEMENTS)) is None
+    assert len(calls) == 1
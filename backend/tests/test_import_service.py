@@ -0,0 +1,110 @@
+"""Pruebas de la importación de extractos (importes, separador decimal y lectura por bloques)."""
+
+import asyncio
+import io
+import json
+import threading
+
+import pytest
+
+from app.services.import_service import ImportService, import_service, parse_amount
+from tests.conftest import USER_ID
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234,56", 1234.56),
+    ("-1,234.56", -1234.56),
+    ("(45.00)", -45.0),
+    ("$ 1.234,5", 1234.5),
+    ("1.234.567", 1234567.0),
+    ("1,234,567", 1234567.0),
+    ("1,5", 1.5),
+    ("12.50", 12.5),
+    ("0,07", 0.07),
+    ("1234", 1234.0),
+    ("1.2345", 1.2345)
+])
+def test_parse_amount_guesses_unambiguous_separators(text, expected):
+    assert parse_amount(text) == pytest.approx(expected)
+
+@pytest.mark.parametrize("text", ["1.234", "1,234", "-12.500", "", "abc", "1.234,56,7"])
+def test_parse_amount_rejects_ambiguous_or_invalid(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234", 1234.0),
+    ("1.234,5", 1234.5),
+    ("1.234.567,89", 1234567.89),
+    ("1,5", 1.5),
+    ("-12.500", -12500.0)
+])
+def test_parse_amount_with_decimal_comma(text, expected):
+    assert parse_amount(text, decimal=",") == pytest.approx(expected)
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234", 1.234),
+    ("1,234", 1234.0),
+    ("1,234.5", 1234.5)
+])
+def test_parse_amount_with_decimal_point(text, expected):
+    assert parse_amount(text, decimal=".") == pytest.approx(expected)
+
+@pytest.mark.parametrize("text, decimal", [("1.23", ","), ("1,234.56", ","), ("1.234,56", "."), ("12,34", ".")])
+def test_parse_amount_rejects_separators_that_do_not_match_the_locale(text, decimal):
+    with pytest.raises(ValueError):
+        parse_amount(text, decimal=decimal)
+
+CSV = "fecha;descripcion;monto\n01/03/2026;Arriendo;-1.234\n02/03/2026;Café;-2,50\n03/03/2026;Sueldo;2.500,00\n"
+
+def run_import(lines, **kwargs):
+    async def collect():
+        return [event async for event in import_service.import_movements(USER_ID, lines, **kwargs)]
+    return asyncio.run(collect())
+
+def stored_amounts(database):
+    return sorted(row["monto"] for row in database.query("movimientos").select("*").execute().data)
+
+def test_import_with_decimal_comma(database):
+    events = run_import(io.StringIO(CSV), decimal=",")
+    assert events[-1]["done"] and events[-1]["created"] == 3 and events[-1]["failed"] == 0
+    assert stored_amounts(database) == [2.5, 1234.0, 2500.0]
+
+def test_import_without_decimal_reports_ambiguous_amounts(database):
+    events = run_import(io.StringIO(CSV))
+    assert events[-1]["created"] == 2 and events[-1]["failed"] == 1
+    assert events[-1]["errors"][0]["line"] == 2
+    assert "ambiguo" in events[-1]["errors"][0]["error"]
+    assert stored_amounts(database) == [2.5, 2500.0]
+
+def test_ofx_amounts_use_a_decimal_separator_only(database):
+    ofx = "<OFX><STMTTRN><DTPOSTED>20260301<TRNAMT>-1.234<NAME>Compra</STMTTRN><STMTTRN><DTPOSTED>20260302<TRNAMT>-12,50<NAME>Otra</STMTTRN></OFX>"
+    events = run_import(io.StringIO(ofx), file_format="ofx")
+    assert events[-1]["created"] == 2
+    assert stored_amounts(database) == pytest.approx([1.234, 12.5])
+
+def test_offset_and_blocks_are_read_off_the_event_loop(database, monkeypatch):
+    """Los bloques se leen en otro hilo; el offset omite lo ya importado."""
+    threads = set()
+    read_block = ImportService._read_block
+    def spy(self, *args):
+        threads.add(threading.get_ident())
+        return read_block(self, *args)
+    monkeypatch.setattr(ImportService, "_read_block", spy)
+    
+    lines = ["fecha,monto,descripcion\n"] + [f"2026-01-{day:02d},-{day}.00,Compra {day}\n" for day in range(1, 26)]
+    events = run_import(iter(lines), offset=5, chunk_size=7)
+    assert threading.get_ident() not in threads
+    assert [event["offset"] for event in events] == [12, 19, 25]
+    assert events[-1]["created"] == 20
+    assert stored_amounts(database) == [float(day) for day in range(6, 26)]
+
+def test_import_endpoint_passes_decimal(client, database):
+    response = client.post(
+        "/api/v1/movements/import",
+        params={"decimal": ","},
+        files={"file": ("extracto.csv", CSV.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]["done"] and events[-1]["created"] == 3
+    assert client.post("/api/v1/movements/import", params={"decimal": ";"}, files={"file": ("a.csv", b"x", "text/csv")}).status_code == 422
@@ -0,0 +1,79 @@
+"""Pruebas de la creación de movimientos en lote (POST /movements/batch)."""
+
+import asyncio
+import uuid
+
+from app.config import settings
+from app.models.movement import MovementCreate
+from app.services.movement_service import movement_service
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+CATEGORIES = ["Alimentación", "Transporte", "Cine"]
+
+def items(count: int):
+    return [
+        {
+            "amount": index + 1,
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "movement_type": "Gasto",
+            "movement_date": f"2026-03-{index + 1:02d}"
+        }
+        for index in range(count)
+    ]
+
+def fail_second_chunk(monkeypatch):
+    """Hacer fallar la segunda inserción de movimientos, como un error de la base de datos."""
+    insert_record = supabase_service.insert_record
+    inserts = []
+
+    async def flaky_insert(table, data):
+        if table == "movimientos":
+            inserts.append(data)
+            if len(inserts) == 2:
+                return {"success": False, "data": None, "error": "duplicate key value violates unique constraint"}
+        return await insert_record(table, data)
+
+    monkeypatch.setattr(supabase_service, "insert_record", flaky_insert)
+    return inserts
+
+def stored_amounts(database):
+    return sorted(row["monto"] for row in database.query("movimientos").select("monto").eq("usuario_id", USER_ID).execute().data)
+
+def test_failed_chunk_reports_its_items(client, database, monkeypatch):
+    monkeypatch.setattr(settings, "MOVEMENT_BATCH_CHUNK_SIZE", 3)
+    inserts = fail_second_chunk(monkeypatch)
+
+    response = client.post("/api/v1/movements/batch", json={"items": items(7)})
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert len(inserts) == 3
+    assert (data["created"], data["failed"]) == (4, 3)
+
+    results = data["results"]
+    assert [result["index"] for result in results] == list(range(7))
+    assert [result["success"] for result in results] == [True, True, True, False, False, False, True]
+    assert all("duplicate key" in result["error"] for result in results[3:6])
+
+    # Los otros bloques quedan guardados y cada id corresponde al ítem de su índice
+    assert stored_amounts(database) == [1, 2, 3, 7]
+    rows = {row["id"]: row for row in database.query("movimientos").select("*").execute().data}
+    for result in results:
+        if result["success"]:
+            assert rows[result["id"]]["monto"] == result["index"] + 1
+
+def test_categories_are_resolved_once_per_batch(database, monkeypatch):
+    monkeypatch.setattr(settings, "MOVEMENT_BATCH_CHUNK_SIZE", 3)
+    database.load({"categorias": [
+        {"id": str(uuid.UUID(int=1)), "usuario_id": USER_ID, "nombre": "Alimentación", "tipo": "Gasto"},
+        {"id": str(uuid.UUID(int=2)), "usuario_id": USER_ID, "nombre": "Transporte", "tipo": "Gasto"}
+    ]})
+    batch = [MovementCreate(**item) for item in items(7)]
+
+    with supabase_service.count_calls() as counter:
+        result = asyncio.run(movement_service.create_movements(USER_ID, batch))
+    assert result["success"], result
+    assert result["data"]["created"] == 7
+    # Una lectura de categorías, una inserción de la que falta y tres bloques de movimientos
+    assert counter["calls"] == 1 + 1 + 3
+    assert len(database.query("categorias").select("id").execute().data) == 3
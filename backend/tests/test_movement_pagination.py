@@ -0,0 +1,91 @@
+"""Pruebas de la paginación por cursor (fecha, id) de movimientos."""
+
+import asyncio
+import base64
+import json
+import random
+import uuid
+
+import pytest
+
+from app.services.movement_service import movement_service, encode_cursor, decode_cursor
+from tests.conftest import USER_ID
+
+def seed_movements(database, dates, per_date: int):
+    """Cargar `per_date` movimientos en cada fecha (ids aleatorios, en orden aleatorio)."""
+    rng = random.Random(7)
+    category = {"id": str(uuid.UUID(int=1)), "usuario_id": USER_ID, "nombre": "Alimentación", "tipo": "Gasto"}
+    movements = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "usuario_id": USER_ID,
+            "fecha": movement_date,
+            "categoria_id": category["id"],
+            "monto": 10,
+            "tipo": "Gasto",
+            "es_recurrente": False
+        }
+        for movement_date in dates
+        for _ in range(per_date)
+    ]
+    rng.shuffle(movements)
+    database.load({"categorias": [category], "movimientos": movements})
+    return movements
+
+def expected_order(movements):
+    return [row["id"] for row in sorted(movements, key=lambda row: (row["fecha"], row["id"]), reverse=True)]
+
+def test_cursor_round_trip():
+    movement_id = str(uuid.uuid4())
+    cursor = encode_cursor("2026-03-15", movement_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2026-03-15", movement_id)
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "no-es-base64!",
+    base64.urlsafe_b64encode(b"[1, 2, 3]").decode(),
+    base64.urlsafe_b64encode(json.dumps(["2026-13-01", str(uuid.uuid4())]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["2026-03-01", "1),id.gt.(0"]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps({"fecha": "2026-03-01"}).encode()).decode()
+])
+def test_decode_cursor_rejects_invalid(cursor):
+    assert decode_cursor(cursor) is None
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 10])
+def test_pages_with_repeated_dates_have_no_duplicates_or_gaps(database, limit):
+    """Recorrer todas las páginas devuelve cada movimiento una vez, en orden (fecha, id) descendente."""
+    movements = seed_movements(database, ["2026-01-31", "2026-02-01", "2026-02-15"], per_date=10)
+    
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            result = await movement_service.get_movements(USER_ID, limit=limit, cursor=cursor)
+            assert result["success"], result
+            assert len(result["data"]) <= limit
+            seen += [movement["id"] for movement in result["data"]]
+            cursor = result["next_cursor"]
+            if cursor is None:
+                return seen
+    
+    assert asyncio.run(walk()) == expected_order(movements)
+
+def test_export_pages_cover_every_movement(database):
+    movements = seed_movements(database, ["2026-05-01", "2026-05-02"], per_date=25)
+    
+    async def export():
+        return [movement["id"] async for page in movement_service.iter_movements(USER_ID, page_size=7) for movement in page]
+    
+    assert asyncio.run(export()) == expected_order(movements)
+
+def test_api_pages_and_rejects_tampered_cursor(client, database):
+    movements = seed_movements(database, ["2026-04-10", "2026-04-11"], per_date=6)
+    first = client.get("/api/v1/movements", params={"limit": 5})
+    assert first.status_code == 200
+    second = client.get("/api/v1/movements", params={"limit": 5, "cursor": first.json()["next_cursor"]})
+    assert [row["id"] for row in first.json()["data"] + second.json()["data"]] == expected_order(movements)[:10]
+    
+    tampered = first.json()["next_cursor"][:-2] + "xx"
+    response = client.get("/api/v1/movements", params={"limit": 5, "cursor": tampered})
+    assert response.status_code == 400
+    assert client.get("/api/v1/movements", params={"limit": 5, "cursor": "basura"}).status_code == 400
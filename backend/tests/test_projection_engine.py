@@ -0,0 +1,109 @@
+"""Pruebas de las proyecciones mensuales contra totales calculados a mano."""
+
+import asyncio
+import uuid
+from datetime import date
+
+from app.services.projection_engine import projection_engine, month_edges
+from app.services.supabase_service import supabase_service
+from tests.conftest import USER_ID
+
+FIRST_DAY, LAST_DAY = "2026-01-01", "2026-06-30"
+
+def item(number: int, amount: float, kind: str, frequency: str, start: str, end: str = None):
+    return {
+        "id": str(uuid.UUID(int=number)),
+        "usuario_id": USER_ID,
+        "nombre": f"Elemento {number}",
+        "monto": amount,
+        "tipo": kind,
+        "categoria_id": None,
+        "frecuencia": frequency,
+        "fecha_inicio": start,
+        "fecha_fin": end
+    }
+
+def movement(amount: float, kind: str, movement_date: str):
+    return {
+        "id": str(uuid.uuid4()),
+        "usuario_id": USER_ID,
+        "fecha": movement_date,
+        "categoria_id": None,
+        "monto": amount,
+        "tipo": kind,
+        "es_recurrente": False
+    }
+
+def seed(database):
+    database.load({
+        "presupuesto_items": [
+            # Jueves desde el 1 de enero: 5, 4, 4, 5, 4 y 4 ocurrencias por mes
+            item(1, 10, "gasto_proyectado", "semanal", "2026-01-01"),
+            item(2, 1000, "ingreso_recurrente", "mensual", "2025-12-15"),
+            # Día 31: el último día de los meses más cortos, una vez por mes
+            item(3, 100, "gasto_proyectado", "mensual", "2026-01-31"),
+            item(4, 500, "gasto_proyectado", "anual", "2025-03-10"),
+            # Termina a mitad del horizonte: enero, febrero y marzo
+            item(5, 200, "gasto_proyectado", "mensual", "2026-01-05", "2026-03-20")
+        ],
+        "movimientos": [
+            movement(1200, "Ingreso", "2026-01-20"),
+            movement(30, "Gasto", "2026-02-10"),
+            movement(45, "Gasto", "2026-02-28"),
+            movement(99, "Gasto", "2026-07-01")
+        ]
+    })
+    # Calendario guardado para el horizonte, como lo deja regenerate_schedule
+    asyncio.run(supabase_service.execute(supabase_service.rpc("regenerar_ocurrencias_presupuesto", {
+        "p_usuario_id": USER_ID,
+        "p_desde": FIRST_DAY,
+        "p_hasta": LAST_DAY,
+        "p_item_id": None
+    })))
+
+def test_schedule_clamps_day_31(database):
+    seed(database)
+    rows = database.query("presupuesto_item_ocurrencias").select("*").eq("item_id", str(uuid.UUID(int=3))).execute().data
+    assert sorted(row["fecha"] for row in rows) == [
+        "2026-01-31", "2026-02-28", "2026-03-31", "2026-04-30", "2026-05-31", "2026-06-30"
+    ]
+
+def test_projection_matches_hand_totals(database):
+    seed(database)
+    with supabase_service.count_calls() as counter:
+        summary = asyncio.run(projection_engine.get_projection(USER_ID, 6, date(2026, 1, 15)))
+    # Calendario al día: proyección, comprobación de vencidos y reales, sin regenerar
+    assert counter["calls"] == 3
+
+    weekly = [50, 40, 40, 50, 40, 40]
+    monthly_31 = [100] * 6
+    yearly = [0, 0, 500, 0, 0, 0]
+    ending = [200, 200, 200, 0, 0, 0]
+    expected_expenses = [sum(values) for values in zip(weekly, monthly_31, yearly, ending)]
+    assert expected_expenses == [350, 340, 840, 150, 140, 140]
+
+    projections = summary["projections"]
+    assert [row["month"] for row in projections] == [f"2026-0{month}-01" for month in range(1, 7)]
+    assert [row["projected_expenses"] for row in projections] == expected_expenses
+    assert [row["projected_income"] for row in projections] == [1000] * 6
+    assert [row["actual_income"] for row in projections] == [1200, 0, 0, 0, 0, 0]
+    assert [row["actual_expenses"] for row in projections] == [0, 75, 0, 0, 0, 0]
+    assert projections[1]["variance_expenses"] == 75 - 340
+    assert summary["total_projected_expenses"] == 1960
+    assert summary["total_projected_income"] == 6000
+    assert summary["total_projected_balance"] == 4040
+    assert summary["period_months"] == 6
+
+def test_monthly_totals_ignores_rows_outside_horizon():
+    edges = month_edges(date(2026, 1, 1), 3)
+    rows = [
+        {"mes": "2025-12-01", "tipo": "Gasto", "total": 7},
+        {"mes": "2026-01-01", "tipo": "Gasto", "total": 1.5},
+        {"mes": "2026-01-01T00:00:00+00:00", "tipo": "Gasto", "total": "2.5"},
+        {"mes": "2026-03-01", "tipo": "Ingreso", "total": 10},
+        {"mes": "2026-04-01", "tipo": "Ingreso", "total": 9}
+    ]
+    income, expenses = projection_engine.monthly_totals(rows, edges)
+    assert income.tolist() == [0, 0, 10]
+    assert expenses.tolist() == [4, 0, 0]
+    assert [array.tolist() for array in projection_engine.monthly_totals([], edges)] == [[0, 0, 0], [0, 0, 0]]
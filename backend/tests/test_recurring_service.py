@@ -0,0 +1,80 @@
+"""Pruebas de la materialización de movimientos recurrentes."""
+
+import asyncio
+import uuid
+from datetime import date
+
+import pytest
+
+from app.models.recurring import RecurringFrequency
+from app.services.recurring_service import recurring_service, due_dates
+from tests.conftest import USER_ID
+
+def template(number: int, frequency: str, start: str, **changes):
+    row = {
+        "id": str(uuid.UUID(int=number)),
+        "usuario_id": USER_ID,
+        "fecha": start,
+        "categoria_id": None,
+        "monto": 50,
+        "tipo": "Gasto",
+        "es_recurrente": True,
+        "frecuencia": frequency
+    }
+    row.update(changes)
+    return row
+
+def test_due_dates_by_frequency():
+    start, until = date(2024, 2, 29), date(2026, 3, 31)
+    assert due_dates(start, "diario", date(2024, 3, 2)) == [date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 2)]
+    assert due_dates(start, "semanal", date(2024, 3, 14)) == [date(2024, 2, 29), date(2024, 3, 7), date(2024, 3, 14)]
+    assert due_dates(start, "mensual", date(2024, 5, 31))[-2:] == [date(2024, 4, 29), date(2024, 5, 29)]
+    # Anual: 29 de febrero cae el 28 en los años no bisiestos
+    assert due_dates(start, "anual", until) == [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28)]
+    assert due_dates(start, "anual", until, after=date(2025, 2, 28)) == [date(2026, 2, 28)]
+    assert due_dates(start, "anual", until, after=date(2025, 3, 1)) == [date(2026, 2, 28)]
+    assert due_dates(start, "anual", date(2026, 2, 27), after=date(2025, 2, 28)) == []
+
+def test_month_steps_match_naive_loop():
+    start = date(2023, 1, 31)
+    for frequency, step in (("mensual", 1), ("anual", 12)):
+        everything = due_dates(start, frequency, date(2030, 12, 31))
+        assert len(everything) == (8 * 12 if step == 1 else 8)
+        for after in (date(2023, 1, 30), date(2024, 2, 29), date(2025, 1, 31), date(2027, 6, 15)):
+            assert due_dates(start, frequency, date(2030, 12, 31), after=after) == [d for d in everything if d > after]
+
+def test_unknown_frequency_raises():
+    with pytest.raises(ValueError):
+        due_dates(date(2026, 1, 1), "quincenal", date(2026, 3, 1))
+
+def test_every_model_frequency_is_supported():
+    for frequency in RecurringFrequency:
+        assert due_dates(date(2026, 1, 1), frequency.value, date(2027, 1, 1))
+
+def test_materialize_yearly_template(database):
+    database.load({"movimientos": [template(1, "anual", "2024-03-15")]})
+
+    result = asyncio.run(recurring_service.materialize(USER_ID, today=date(2026, 3, 20)))
+    assert result["success"], result
+    rows = database.query("ocurrencias_recurrentes").select("*").eq("usuario_id", USER_ID).execute().data
+    assert sorted(row["fecha"] for row in rows) == ["2024-03-15", "2025-03-15", "2026-03-15"]
+
+    # Repetir antes de la siguiente fecha no crea nada
+    asyncio.run(recurring_service.materialize(USER_ID, today=date(2027, 3, 14)))
+    assert len(database.query("ocurrencias_recurrentes").select("*").execute().data) == 3
+
+def test_listing_occurrences_is_read_only(client, database):
+    database.load({"movimientos": [template(1, "semanal", "2026-01-01", fecha_fin="2026-01-31")]})
+
+    listed = client.get("/api/v1/recurring/occurrences")
+    assert listed.status_code == 200
+    assert listed.json()["data"] == []
+    assert database.query("ocurrencias_recurrentes").select("*").execute().data == []
+    assert database.query("movimientos").select("ultima_materializacion").execute().data == [{"ultima_materializacion": None}]
+
+    materialized = client.post("/api/v1/recurring/materialize")
+    assert materialized.status_code == 200
+    listed = client.get("/api/v1/recurring/occurrences")
+    assert [row["occurrence_date"] for row in listed.json()["data"]] == [
+        "2026-01-01", "2026-01-08", "2026-01-15", "2026-01-22", "2026-01-29"
+    ]
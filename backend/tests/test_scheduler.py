@@ -0,0 +1,116 @@
+"""Pruebas del planificador y sus leases sobre el backend en memoria."""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from app.jobs import register_jobs
+from app.services.recurring_service import recurring_service
+from app.services.scheduler import Scheduler
+from tests.conftest import USER_ID
+
+JOB = "tarea_de_prueba"
+
+def lease(database):
+    return database.table("tareas_programadas").rows.get((JOB,))
+
+def competing_schedulers(func):
+    schedulers = [Scheduler(), Scheduler()]
+    for scheduler in schedulers:
+        scheduler.add_job(JOB, func, interval=60, jitter=0)
+    return schedulers
+
+def test_only_one_scheduler_runs_a_leased_job(database):
+    calls = []
+
+    async def job():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        first, second = competing_schedulers(job)
+        results = await asyncio.gather(first.run_now(JOB), second.run_now(JOB))
+        return first, second, results
+
+    first, second, results = asyncio.run(scenario())
+    assert sorted(results) == [False, True]
+    assert len(calls) == 1
+    winner, loser = (first, second) if results[0] else (second, first)
+    assert lease(database)["propietario"] == winner.worker_id
+    assert loser.jobs[JOB].metrics["skipped_lease"] == 1
+    assert winner.jobs[JOB].metrics["succeeded"] == 1
+
+def test_expired_lease_can_be_taken_over(database):
+    calls = []
+
+    async def job():
+        calls.append(1)
+
+    async def scenario():
+        first, second = competing_schedulers(job)
+        assert await first.run_now(JOB)
+        # El lease sigue vigente hasta el próximo turno de `first`
+        assert not await second.run_now(JOB)
+
+        lease(database)["vence_at"] = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+        assert await second.run_now(JOB)
+        return second
+
+    second = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert lease(database)["propietario"] == second.worker_id
+
+def test_failed_job_releases_its_lease(database):
+    async def failing():
+        raise RuntimeError("sin conexión")
+
+    async def job():
+        return None
+
+    async def scenario():
+        first = Scheduler()
+        first.add_job(JOB, failing, interval=60, jitter=0)
+        second = Scheduler()
+        second.add_job(JOB, job, interval=60, jitter=0)
+
+        assert not await first.run_now(JOB)
+        # Otro worker la reintenta sin esperar a que venza el lease
+        assert await second.run_now(JOB)
+        return first
+
+    first = asyncio.run(scenario())
+    metrics = first.jobs[JOB].get_metrics()
+    assert metrics["failed"] == 1
+    assert metrics["succeeded"] == 0
+    assert metrics["last_error"] == "sin conexión"
+    assert metrics["running"] == 0
+
+def test_registered_recurring_job(database, monkeypatch):
+    database.load({"movimientos": [{
+        "id": "00000000-0000-0000-0000-0000000000aa",
+        "usuario_id": USER_ID,
+        "fecha": (date.today() - timedelta(days=1)).isoformat(),
+        "categoria_id": None,
+        "monto": 50,
+        "tipo": "Gasto",
+        "es_recurrente": True,
+        "frecuencia": "diario"
+    }]})
+
+    async def scenario():
+        scheduler = Scheduler()
+        register_jobs(scheduler)
+        assert await scheduler.run_now("materializar_recurrentes")
+
+        async def failing_materialize(*args, **kwargs):
+            return {"success": False, "error": "fallo simulado"}
+
+        # Un resultado con error cuenta como fallo de la tarea y libera el lease
+        monkeypatch.setattr(recurring_service, "materialize", failing_materialize)
+        assert not await scheduler.run_now("materializar_recurrentes")
+        return scheduler.jobs["materializar_recurrentes"].get_metrics()
+
+    metrics = asyncio.run(scenario())
+    assert len(database.query("ocurrencias_recurrentes").select("*").execute().data) == 2
+    assert metrics["succeeded"] == 1
+    assert metrics["failed"] == 1
+    assert metrics["last_error"] == "fallo simulado"
@@ -0,0 +1,130 @@
+"""Pruebas del motor de gasto por presupuesto (sumas prefijas y meses de resumen_mensual)."""
+
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services.spending_engine import SpendingEngine, spending_engine, split_by_month
+from tests.conftest import USER_ID
+
+CATEGORIES = ["cat-a", "cat-b", "cat-c"]
+
+def days(start: str, end: str):
+    """Días de un rango ISO, ambos extremos incluidos."""
+    current, last = date.fromisoformat(start), date.fromisoformat(end)
+    while current <= last:
+        yield current
+        current += timedelta(days=1)
+
+def month_end(month_start: str) -> str:
+    """Último día del mes que empieza en `month_start`."""
+    first = date.fromisoformat(month_start)
+    return ((first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).isoformat()
+
+def naive_totals(rows, windows):
+    """Gasto de cada ventana con un recorrido simple de los movimientos."""
+    return [
+        sum(row["monto"] for row in rows if row["categoria_id"] == category_id and start <= row["fecha"] <= end)
+        for category_id, start, end in windows
+    ]
+
+def random_rows(rng, count: int):
+    start = date(2025, 1, 1)
+    return [
+        {"categoria_id": rng.choice(CATEGORIES), "fecha": (start + timedelta(days=rng.randrange(730))).isoformat(), "monto": rng.randint(1, 500)}
+        for _ in range(count)
+    ]
+
+def random_windows(rng, count: int):
+    windows = []
+    for _ in range(count):
+        start = date(2025, 1, 1) + timedelta(days=rng.randrange(730))
+        end = start + timedelta(days=rng.choice([0, 1, 13, 30, 31, 59, 200, 400]))
+        windows.append((rng.choice(CATEGORIES + [None]), start.isoformat(), end.isoformat()))
+    return windows
+
+@pytest.mark.parametrize("start, end, months, edges", [
+    ("2026-03-01", "2026-03-31", ("2026-03-01", "2026-03-01"), []),
+    ("2026-03-10", "2026-03-20", None, [("2026-03-10", "2026-03-20")]),
+    ("2026-03-10", "2026-04-05", None, [("2026-03-10", "2026-04-05")]),
+    ("2026-03-10", "2026-05-31", ("2026-04-01", "2026-05-01"), [("2026-03-10", "2026-03-31")]),
+    ("2026-03-01", "2026-05-15", ("2026-03-01", "2026-04-01"), [("2026-05-01", "2026-05-15")]),
+    ("2025-11-15", "2026-02-14", ("2025-12-01", "2026-01-01"), [("2025-11-15", "2025-11-30"), ("2026-02-01", "2026-02-14")]),
+    ("2024-02-01", "2024-02-29", ("2024-02-01", "2024-02-01"), []),
+    ("2024-02-01", "2024-02-28", None, [("2024-02-01", "2024-02-28")]),
+    ("2026-12-31", "2026-12-31", None, [("2026-12-31", "2026-12-31")])
+])
+def test_split_by_month(start, end, months, edges):
+    assert split_by_month(start, end) == (months, edges)
+
+def test_split_by_month_covers_every_day_once():
+    """Meses completos y días sueltos cubren el rango sin huecos ni solapes."""
+    rng = random.Random(3)
+    for _ in range(300):
+        start = date(2024, 1, 1) + timedelta(days=rng.randrange(900))
+        end = start + timedelta(days=rng.randrange(500))
+        months, edges = split_by_month(start.isoformat(), end.isoformat())
+        covered = [day for edge in edges for day in days(*edge)]
+        if months:
+            first, last = months
+            assert first.endswith("-01") and last.endswith("-01")
+            covered += list(days(first, month_end(last)))
+        assert sorted(covered) == list(days(start.isoformat(), end.isoformat()))
+
+def test_merge_windows_joins_overlapping_and_touching_ranges():
+    windows = [
+        ("cat-a", "2026-01-10", "2026-02-10"),
+        ("cat-a", "2026-02-10", "2026-03-05"),   # toca el final de la anterior
+        ("cat-a", "2026-01-15", "2026-01-20"),   # contenida
+        ("cat-a", "2026-04-01", "2026-04-30"),   # separada
+        ("cat-b", "2026-01-01", "2026-01-31"),
+        (None, "2026-01-01", "2026-12-31")       # sin categoría: no se consulta
+    ]
+    assert SpendingEngine.merge_windows(windows) == [
+        ("cat-a", "2026-01-10", "2026-03-05"),
+        ("cat-a", "2026-04-01", "2026-04-30"),
+        ("cat-b", "2026-01-01", "2026-01-31")
+    ]
+
+def test_merged_windows_cover_the_same_days():
+    rng = random.Random(5)
+    windows = random_windows(rng, 60)
+    merged = SpendingEngine.merge_windows(windows)
+    covered = lambda ranges: {(category, day) for category, start, end in ranges if category for day in days(start, end)}
+    assert covered(merged) == covered(windows)
+    for previous, current in zip(merged, merged[1:]):
+        assert previous[0] != current[0] or previous[2] < current[1]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compute_totals_matches_naive_sum(seed):
+    rng = random.Random(seed)
+    rows = random_rows(rng, 500)
+    windows = random_windows(rng, 40) + [("cat-a", "2025-03-15", "2025-03-15"), ("cat-z", "2025-01-01", "2026-12-31")]
+    # Filas ordenadas como las devuelve la consulta y en desorden
+    for ordered in (sorted(rows, key=lambda row: (row["categoria_id"], row["fecha"])), rows):
+        assert SpendingEngine.compute_totals(ordered, windows) == naive_totals(rows, windows)
+
+@pytest.mark.parametrize("rollups", [False, True])
+def test_get_totals_matches_naive_sum(database, monkeypatch, rollups):
+    """Con y sin resumen_mensual, el gasto de ventanas a mitad de mes coincide con la suma directa."""
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", rollups)
+    rng = random.Random(11)
+    rows = random_rows(rng, 800)
+    movements = [
+        dict(row, id=f"mov-{index}", usuario_id=USER_ID, tipo="Gasto" if index % 5 else "Ingreso", es_recurrente=False)
+        for index, row in enumerate(rows)
+    ]
+    database.load({
+        "categorias": [{"id": category, "usuario_id": USER_ID, "nombre": category, "tipo": "Gasto"} for category in CATEGORIES],
+        "movimientos": movements
+    })
+    windows = random_windows(rng, 30) + [
+        ("cat-a", "2025-02-15", "2025-05-10"),
+        ("cat-b", "2025-06-01", "2025-08-31"),
+        ("cat-c", "2025-12-20", "2026-01-10")
+    ]
+    expenses = [row for row in movements if row["tipo"] == "Gasto"]
+    assert asyncio.run(spending_engine.get_totals(USER_ID, windows)) == pytest.approx(naive_totals(expenses, windows))
@@ -0,0 +1,65 @@
+"""Prueba de humo del generador de libros contables sintéticos."""
+
+import argparse
+import asyncio
+import json
+import os
+from datetime import date
+
+from app.models.budget import BudgetPeriod
+from app.models.budget_item import BudgetItemType
+from app.models.movement import MovementType
+from app.models.recurring import RecurringFrequency, OccurrenceStatus
+from app.services.recurring_service import recurring_service, due_dates
+from benchmarks.synthetic_ledger import main
+
+END = "2026-06-30"
+
+def generate(directory) -> dict:
+    args = argparse.Namespace(
+        output=str(directory), supabase=False, users=3, first_user=0, movements=300,
+        years=2, end=END, seed=7, password="synthetic-password", chunk_size=1000, concurrency=4
+    )
+    asyncio.run(main(args))
+    tables = {}
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name), encoding="utf-8") as f:
+            tables[file_name[:-len(".jsonl")]] = [json.loads(line) for line in f]
+    return tables
+
+def test_same_seed_same_ledger(tmp_path):
+    first = generate(tmp_path / "a")
+    second = generate(tmp_path / "b")
+    assert first == second
+    assert len({row["id"] for row in first["usuarios"]}) == 3
+
+def test_generated_values_are_accepted_by_the_services(tmp_path, database):
+    tables = generate(tmp_path / "ledger")
+    categories = {(row["usuario_id"], row["id"]): row["tipo"] for row in tables["categorias"]}
+    movement_types = {kind.value for kind in MovementType}
+
+    # Cada categoría referenciada es del mismo usuario y del mismo tipo que la fila
+    for table in ("movimientos", "ocurrencias_recurrentes"):
+        for row in tables[table]:
+            assert categories[(row["usuario_id"], row["categoria_id"])] == row["tipo"], (table, row)
+            assert row["tipo"] in movement_types
+    for table in ("presupuestos", "presupuesto_items"):
+        for row in tables[table]:
+            assert (row["usuario_id"], row["categoria_id"]) in categories, (table, row)
+
+    templates = [row for row in tables["movimientos"] if row["es_recurrente"]]
+    assert templates
+    for row in templates:
+        assert row["frecuencia"] in {frequency.value for frequency in RecurringFrequency}
+        assert due_dates(date.fromisoformat(row["fecha"]), row["frecuencia"], date.fromisoformat(END))
+    assert {row["estado"] for row in tables["ocurrencias_recurrentes"]} <= {status.value for status in OccurrenceStatus}
+    assert {row["periodo"] for row in tables["presupuestos"]} <= {period.value for period in BudgetPeriod}
+    assert {row["frecuencia"] for row in tables["presupuesto_items"]} <= {period.value for period in BudgetPeriod}
+    assert {row["tipo"] for row in tables["presupuesto_items"]} <= {kind.value for kind in BudgetItemType}
+
+    # Cargado en el backend en memoria, materializar al cierre no crea ocurrencias nuevas
+    database.load_fixture(str(tmp_path / "ledger"))
+    occurrences = len(tables["ocurrencias_recurrentes"])
+    result = asyncio.run(recurring_service.materialize(today=date.fromisoformat(END)))
+    assert result["success"], result
+    assert len(database.query("ocurrencias_recurrentes").select("clave").execute().data) == occurrences
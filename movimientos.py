@@ -1,5 +1,13 @@
 from supabase_config import get_supabase_client
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from collections import OrderedDict
+import calendar
+import threading
+
+# Caché de ids de categorías por (usuario_id, nombre, tipo)
+_CATEGORIAS_MAX = 1000
+_categorias_cache = OrderedDict()
+_categorias_lock = threading.Lock()
 
 def registrar_movimiento_DB(usuario_id, fecha, categoria_nombre, monto, tipo, descripcion):
     """
@@ -40,29 +48,43 @@ def registrar_movimiento_DB(usuario_id, fecha, categoria_nombre, monto, tipo, de
 def obtener_o_crear_categoria(usuario_id, nombre_categoria, tipo):
     """
     Obtiene una categoría existente o crea una nueva.
+    Los ids se guardan en caché para no consultar la tabla en cada movimiento.
     """
+    clave = (usuario_id, nombre_categoria, tipo)
+    categoria_id = _categorias_cache.get(clave)
+    if categoria_id:
+        return categoria_id
+    
     try:
-        supabase = get_supabase_client()
-        
-        # Buscar categoría existente
-        response = supabase.table('categorias').select('id').eq('usuario_id', usuario_id).eq('nombre', nombre_categoria).eq('tipo', tipo).execute()
-        
-        if response.data:
-            return response.data[0]['id']
-        
-        # Crear nueva categoría
-        categoria_data = {
-            "nombre": nombre_categoria,
-            "tipo": tipo,
-            "usuario_id": usuario_id
-        }
-        
-        response = supabase.table('categorias').insert(categoria_data).execute()
-        
-        if response.data:
-            return response.data[0]['id']
-        
-        return None
+        # Un solo hilo busca/crea a la vez para no duplicar la categoría
+        with _categorias_lock:
+            categoria_id = _categorias_cache.get(clave)
+            if categoria_id:
+                return categoria_id
+            
+            supabase = get_supabase_client()
+            
+            # Buscar categoría existente
+            response = supabase.table('categorias').select('id').eq('usuario_id', usuario_id).eq('nombre', nombre_categoria).eq('tipo', tipo).execute()
+            
+            if not response.data:
+                # Crear nueva categoría
+                categoria_data = {
+                    "nombre": nombre_categoria,
+                    "tipo": tipo,
+                    "usuario_id": usuario_id
+                }
+                
+                response = supabase.table('categorias').insert(categoria_data).execute()
+            
+            if not response.data:
+                return None
+            
+            categoria_id = response.data[0]['id']
+            _categorias_cache[clave] = categoria_id
+            if len(_categorias_cache) > _CATEGORIAS_MAX:
+                _categorias_cache.popitem(last=False)
+            return categoria_id
         
     except Exception as e:
         print(f"❌ Error al obtener/crear categoría: {e}")
@@ -79,15 +101,17 @@ def obtener_resumen_financiero(usuario_id):
         fecha_actual = datetime.now().strftime('%Y-%m-%d')
         primer_dia_mes = datetime.now().replace(day=1).strftime('%Y-%m-%d')
         
-        # Obtener ingresos del mes
-        response_ingresos = supabase.table('movimientos').select('monto').eq('usuario_id', usuario_id).eq('tipo', 'Ingreso').gte('fecha', primer_dia_mes).lte('fecha', fecha_actual).execute()
-        
-        total_ingresos = sum(mov['monto'] for mov in response_ingresos.data) if response_ingresos.data else 0
+        # Obtener ingresos y gastos del mes agrupados por tipo en la base de datos
+        response = supabase.rpc('resumen_movimientos', {
+            'p_usuario_id': usuario_id,
+            'p_fecha_inicio': primer_dia_mes,
+            'p_fecha_fin': fecha_actual,
+            'p_incluir_recurrentes': True
+        }).execute()
         
-        # Obtener gastos del mes
-        response_gastos = supabase.table('movimientos').select('monto').eq('usuario_id', usuario_id).eq('tipo', 'Gasto').gte('fecha', primer_dia_mes).lte('fecha', fecha_actual).execute()
-        
-        total_gastos = sum(mov['monto'] for mov in response_gastos.data) if response_gastos.data else 0
+        totales = {fila['tipo']: fila['total'] for fila in response.data or []}
+        total_ingresos = totales.get('Ingreso', 0)
+        total_gastos = totales.get('Gasto', 0)
         
         # Calcular balance
         balance = total_ingresos - total_gastos
@@ -156,9 +180,44 @@ def obtener_movimientos_recurrentes_pendientes(usuario_id):
         print(f"❌ Error al obtener movimientos recurrentes: {e}")
         return []
 
+# Días entre ocurrencias; mensual y anual se cuentan por meses (como en recurring_service del backend)
+_FRECUENCIA_DIAS = {"diario": 1, "semanal": 7}
+_FRECUENCIA_MESES = {"mensual": 1, "anual": 12}
+
+def _sumar_meses(inicio, meses):
+    """Sumar meses conservando el día (el último del mes si ese mes es más corto)."""
+    mes = inicio.month - 1 + meses
+    anio, mes = inicio.year + mes // 12, mes % 12 + 1
+    return date(anio, mes, min(inicio.day, calendar.monthrange(anio, mes)[1]))
+
+def _ocurrencia_vencida(plantilla, hoy):
+    """Fecha de la última ocurrencia vencida de una plantilla (None si todavía no hay)."""
+    inicio = date.fromisoformat(plantilla['fecha'])
+    hasta = hoy
+    if plantilla.get('fecha_fin'):
+        hasta = min(hasta, date.fromisoformat(plantilla['fecha_fin']))
+    if hasta < inicio:
+        return None
+    
+    frecuencia = plantilla.get('frecuencia')
+    if frecuencia in _FRECUENCIA_DIAS:
+        paso = _FRECUENCIA_DIAS[frecuencia]
+        return inicio + timedelta(days=(hasta - inicio).days // paso * paso)
+    if frecuencia in _FRECUENCIA_MESES:
+        paso = _FRECUENCIA_MESES[frecuencia]
+        k = ((hasta.year - inicio.year) * 12 + hasta.month - inicio.month) // paso
+        fecha = _sumar_meses(inicio, k * paso)
+        return fecha if fecha <= hasta else _sumar_meses(inicio, (k - 1) * paso)
+    raise ValueError(f"Frecuencia no soportada: {frecuencia!r}")
+
 def aprobar_movimiento_recurrente(movimiento_id):
     """
-    Aprueba un movimiento recurrente.
+    Aprueba la ocurrencia vencida de un movimiento recurrente.
+    
+    El movimiento lleva la fecha de la ocurrencia y su clave
+    '<plantilla_id>:<fecha>' (índice único `ocurrencia_clave`), igual que al
+    aprobarla desde la API: aprobar dos veces, o aquí y en la API, no la
+    cuenta de nuevo.
     """
     try:
         supabase = get_supabase_client()
@@ -171,24 +230,34 @@ def aprobar_movimiento_recurrente(movimiento_id):
             return False
         
         movimiento = response.data[0]
+        fecha = _ocurrencia_vencida(movimiento, date.today())
+        if fecha is None:
+            print("❌ El movimiento recurrente no tiene ocurrencias vencidas.")
+            return False
+        clave = f"{movimiento['id']}:{fecha.isoformat()}"
         
-        # Crear movimiento regular
+        # Crear movimiento regular (si la ocurrencia ya estaba aprobada no se duplica)
         nuevo_movimiento = {
             "usuario_id": movimiento['usuario_id'],
-            "fecha": datetime.now().strftime('%Y-%m-%d'),
+            "fecha": fecha.isoformat(),
             "categoria_id": movimiento['categoria_id'],
             "monto": movimiento['monto'],
             "tipo": movimiento['tipo'],
             "descripcion": movimiento['descripcion'],
-            "es_recurrente": False
+            "es_recurrente": False,
+            "ocurrencia_clave": clave
         }
         
-        response = supabase.table('movimientos').insert(nuevo_movimiento).execute()
+        supabase.table('movimientos').upsert(nuevo_movimiento, on_conflict='ocurrencia_clave', ignore_duplicates=True).execute()
         
-        if response.data:
-            print("✅ Movimiento aprobado y registrado exitosamente.")
-            return True
-        return False
+        # Si el backend ya la materializó, deja de figurar como pendiente
+        supabase.table('ocurrencias_recurrentes').update({
+            "estado": "aprobada",
+            "resuelta_at": datetime.now().astimezone().isoformat()
+        }).eq('clave', clave).eq('estado', 'pendiente').execute()
+        
+        print("✅ Movimiento aprobado y registrado exitosamente.")
+        return True
         
     except Exception as e:
         print(f"❌ Error al aprobar movimiento: {e}")
@@ -212,9 +281,10 @@ def rechazar_movimiento_recurrente(movimiento_id):
         print(f"❌ Error al rechazar movimiento: {e}")
         return False
 
-def obtener_historial_movimientos(usuario_id, filtros=None):
+def obtener_historial_movimientos(usuario_id, filtros=None, limite=None):
     """
     Obtiene el historial de movimientos con filtros opcionales.
+    Con `limite` solo trae los movimientos más recientes.
     """
     try:
         supabase = get_supabase_client()
@@ -238,8 +308,11 @@ def obtener_historial_movimientos(usuario_id, filtros=None):
             if filtros.get('monto_max'):
                 query = query.lte('monto', filtros['monto_max'])
         
-        # Ordenar por fecha descendente
-        response = query.order('fecha', desc=True).execute()
+        # Ordenar por fecha descendente (id desempata para un orden estable)
+        query = query.order('fecha', desc=True).order('id', desc=True)
+        if limite:
+            query = query.limit(limite)
+        response = query.execute()
         
         return response.data if response.data else []
         